@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangocrud.settings')
+# Las URLs públicas de lectura usan sus vistas async (ver tasks/urls.py)
+os.environ.setdefault('VISTAS_ASYNC', '1')
 
 application = get_asgi_application()
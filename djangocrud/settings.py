@@ -21,6 +21,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero: su medición incluye a todos los demás middlewares
+    'tasks.middleware.TiemposPeticionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -33,9 +35,17 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'djangocrud.urls'
 
+# Tiempos por fase: el encabezado Server-Timing expone nombres de templates y
+# cantidad de consultas, por eso en producción solo se envía si se pide.
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '1' if DEBUG else '0') == '1'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Con SERVER_TIMING, DjangoTemplates que además mide cada render
+        'BACKEND': (
+            'tasks.plantillas.PlantillasMedidas' if SERVER_TIMING
+            else 'django.template.backends.django.DjangoTemplates'
+        ),
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -59,6 +69,20 @@ DATABASES = {
     )
 }
 
+# Cachés en memoria por proceso. Las claves incluyen la versión del CV,
+# así que nunca hace falta invalidarlas: las viejas simplemente expiran.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragmentos-cv',
+        'TIMEOUT': 86400,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -78,6 +102,81 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # Archivos media (fotos subidas por usuarios)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Entrega por el proxy: 'x-accel-redirect' (nginx) o 'x-sendfile' (Apache/lighttpd).
+# Vacío: Django transmite el archivo con soporte de Range y ETag.
+MEDIA_ACCEL = os.environ.get('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/media-interno/')
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 30 * 24 * 3600))
+
+# Caché en disco de los PDFs generados (LRU limitada por tamaño)
+CV_PDF_CACHE_DIR = os.environ.get('CV_PDF_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'pdf'))
+CV_PDF_CACHE_MAX_BYTES = int(os.environ.get('CV_PDF_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+
+# Bajo ASGI los PDFs se renderizan en un pool de procesos por worker
+# (tasks/pool_pdf.py): 0 = un proceso por núcleo disponible. Con todos
+# ocupados y CV_PDF_COLA esperando, descargar_pdf responde 503.
+CV_PDF_PROCESOS = int(os.environ.get('CV_PDF_PROCESOS', 0))
+CV_PDF_COLA = int(os.environ.get('CV_PDF_COLA', 4))
+
+# Control de admisión de descargar_pdf (tasks/admision.py). GLOBAL reparte
+# cupos entre todos los workers a través de CACHE, que debe ser compartida
+# (Redis, Memcached o base de datos): con locmem cada proceso cuenta aparte.
+# FICHAS_POR_MINUTO=0 desactiva la cubeta por IP. Detrás de un proxy,
+# ENCABEZADO_IP='HTTP_X_FORWARDED_FOR' toma la IP que agregó el proxy.
+CV_PDF_ADMISION = {
+    'POR_PROCESO': int(os.environ.get('CV_PDF_POR_PROCESO', 0)),  # 0 = un render por núcleo
+    'GLOBAL': int(os.environ.get('CV_PDF_GLOBAL', 8)),             # 0 = sin tope global
+    'SEGUNDOS_CUPO': 120,
+    'FICHAS_POR_MINUTO': int(os.environ.get('CV_PDF_FICHAS_POR_MINUTO', 30)),
+    'RAFAGA': int(os.environ.get('CV_PDF_RAFAGA', 10)),
+    'CACHE': os.environ.get('CV_PDF_ADMISION_CACHE', 'default'),
+    'ENCABEZADO_IP': os.environ.get('CV_PDF_ENCABEZADO_IP', ''),
+}
+
+# Exportación estática de CVs públicos (comando exportar_cvs)
+CV_EXPORT_DIR = os.environ.get('CV_EXPORT_DIR', os.path.join(BASE_DIR, 'cv_export'))
+CV_EXPORT_SERVIR = os.environ.get('CV_EXPORT_SERVIR', '') == '1'
+
+# Vistas públicas async (cv_publico, buscar_por_habilidades, descargar_pdf): las activa
+# djangocrud/asgi.py; bajo WSGI y en los tests se usan las síncronas.
+VISTAS_ASYNC = os.environ.get('VISTAS_ASYNC', '') == '1'
+
+# Presupuesto de SQL por petición (solo con DEBUG): avisa cuando una vista
+# supera sus consultas o su tiempo de SQL. MODO 'error' hace fallar la petición.
+SQL_PRESUPUESTO = {
+    'CONSULTAS': int(os.environ.get('SQL_PRESUPUESTO_CONSULTAS', 40)),
+    'TIEMPO_MS': int(os.environ.get('SQL_PRESUPUESTO_TIEMPO_MS', 250)),
+    'MODO': os.environ.get('SQL_PRESUPUESTO_MODO', 'log'),
+    # Rutas calientes: mismas cotas que PresupuestoConsultasTests (tasks/tests.py)
+    'POR_VISTA': {
+        'home': 3,
+        'cv_publico': 12,
+        'descargar_pdf': 8,
+        'buscar_perfiles': 4,
+        'buscar_por_habilidades': 5,
+        'autocompletar_habilidades': 1,
+    },
+}
+
+# /metricas/ responde únicamente a estas IPs.
+METRICAS_IPS = os.environ.get('METRICAS_IPS', '127.0.0.1,::1').split(',')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'consola': {'class': 'logging.StreamHandler'}},
+    'loggers': {
+        # Una línea JSON por petición con sus fases, solo con METRICAS_LOG_NIVEL=INFO
+        'tasks.metricas': {
+            'handlers': ['consola'],
+            'level': os.environ.get('METRICAS_LOG_NIVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+if DEBUG:
+    # Primero de la lista: también cuenta las consultas de sesión y autenticación
+    MIDDLEWARE.insert(0, 'tasks.middleware.PresupuestoSQLMiddleware')
 
 # WhiteNoise: sirve archivos estáticos Y media
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
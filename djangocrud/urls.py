@@ -1,12 +1,12 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from tasks.medios import servir_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('tasks.urls')),
+    # Archivos media: el proxy los entrega si MEDIA_ACCEL está configurado,
+    # si no se transmiten con Range, ETag y Cache-Control (tasks/medios.py)
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<ruta>.+)$', servir_media, name='media'),
 ]
-
-# Servir archivos media SIEMPRE (desarrollo y producción)
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
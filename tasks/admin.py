@@ -1,10 +1,14 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import (
     DatosPersonales, Direccion, ExperienciaLaboral, Reconocimiento,
     CursoRealizado, ProductoAcademico, ProductoLaboral,
-    VentaGarage, Habilidad
+    VentaGarage, Habilidad, TrabajoPDF, BlobMedia, TerminoHabilidad
 )
+from .contadores import marcar_como_vendidos
+from .volcado import FORMATOS, registros_cv, usuarios_a_volcar
 
 # ==========================================
 # ADMIN: DATOS PERSONALES
@@ -15,6 +19,7 @@ class DatosPersonalesAdmin(admin.ModelAdmin):
     list_filter = ['perfil_activo', 'sexo', 'estado_civil', 'nacionalidad']
     search_fields = ['nombres', 'apellidos', 'numero_cedula', 'email_personal']
     readonly_fields = ['fecha_creacion', 'fecha_actualizacion']
+    actions = ['exportar_ndjson', 'exportar_csv']
     
     fieldsets = (
         ('⚙️ Control del Perfil', {
@@ -47,6 +52,23 @@ class DatosPersonalesAdmin(admin.ModelAdmin):
         return "N/A"
     edad_display.short_description = "Edad"
     
+    def _exportar(self, queryset, formato):
+        # Respuesta en streaming: el archivo se genera mientras se descarga
+        generar, content_type, extension = FORMATOS[formato]
+        usuarios = usuarios_a_volcar().filter(pk__in=queryset.values('user_id'))
+        response = StreamingHttpResponse(generar(registros_cv(usuarios)), content_type=content_type)
+        nombre = f"cvs_{timezone.now():%Y%m%d_%H%M}.{extension}"
+        response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        return response
+    
+    def exportar_ndjson(self, request, queryset):
+        return self._exportar(queryset, 'ndjson')
+    exportar_ndjson.short_description = "📦 Exportar CVs completos (NDJSON)"
+    
+    def exportar_csv(self, request, queryset):
+        return self._exportar(queryset, 'csv')
+    exportar_csv.short_description = "📦 Exportar CVs completos (CSV)"
+    
     # ✅ AGREGAR ESTA FUNCIÓN PARA QUE EL ADMIN PUEDA GUARDAR
     def save_model(self, request, obj, form, change):
         # Si no tiene usuario asignado, asignar el usuario actual
@@ -82,7 +104,8 @@ class VentaGarageAdmin(admin.ModelAdmin):
     actions = ['marcar_como_vendido']
 
     def marcar_como_vendido(self, request, queryset):
-        queryset.update(vendido=True)
+        # queryset.update() no dispara señales: versión y contadores se ajustan aparte
+        marcar_como_vendidos(queryset)
     marcar_como_vendido.short_description = "💰 Marcar seleccionados como VENDIDOS"
 
     def valor_formateado(self, obj):
@@ -98,6 +121,9 @@ admin.site.register(CursoRealizado)
 admin.site.register(ProductoAcademico)
 admin.site.register(ProductoLaboral)
 admin.site.register(Habilidad)
+admin.site.register(TrabajoPDF)
+admin.site.register(BlobMedia)
+admin.site.register(TerminoHabilidad)
 
 # ==========================================
 # PERSONALIZACIÓN VISUAL FINAL
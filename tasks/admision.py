@@ -0,0 +1,169 @@
+import math
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from .pool_pdf import procesos_disponibles
+
+# ==========================================
+# CONTROL DE ADMISIÓN DE descargar_pdf
+# ==========================================
+# Un PDF fuera de la caché cuesta segundos de CPU y la URL es pública: un solo
+# cliente en bucle puede ocupar todos los workers y dejar esperando hasta a
+# /cv/<username>/. Tres barreras, de la más barata a la más cara:
+#   1. Cubeta de fichas por IP, en todas las peticiones: 429.
+#   2. Renders simultáneos en este proceso (semáforo): 503.
+#   3. Renders simultáneos entre todos los workers (cupos en la caché): 503.
+# Los aciertos de la caché de PDFs y los 304 solo pasan por la primera.
+# Siempre se rechaza con Retry-After; nunca se encola sin límite.
+
+
+class Rechazo(Exception):
+
+    def __init__(self, status, segundos, motivo):
+        super().__init__(motivo)
+        self.status = status
+        self.segundos = segundos
+        self.motivo = motivo
+
+    def respuesta(self):
+        response = HttpResponse(f'{self.motivo}, reintenta en unos segundos.',
+                                status=self.status, content_type='text/plain; charset=utf-8')
+        response['Retry-After'] = str(max(1, math.ceil(self.segundos)))
+        return response
+
+
+class CubetaFichas:
+    """
+    `rafaga` fichas por cliente que se reponen a `por_minuto`; cada petición
+    gasta una. Lectura y escritura en la caché no son atómicas: con carreras
+    entre workers puede pasar alguna petición de más, nunca de menos.
+    """
+
+    def __init__(self, cache, por_minuto, rafaga):
+        self.cache = cache
+        self.por_segundo = por_minuto / 60
+        self.rafaga = rafaga
+
+    def tomar(self, cliente):
+        """0 si la petición pasa; si no, segundos hasta la próxima ficha."""
+        if not self.por_segundo:
+            return 0
+        clave = f'pdf_fichas:{cliente}'
+        ahora = time.time()
+        fichas, instante = self.cache.get(clave, (self.rafaga, ahora))
+        fichas = min(self.rafaga, fichas + (ahora - instante) * self.por_segundo)
+        if fichas < 1:
+            return (1 - fichas) / self.por_segundo
+        # Vence cuando la cubeta ya estaría llena otra vez
+        self.cache.set(clave, (fichas - 1, ahora), timeout=math.ceil(self.rafaga / self.por_segundo) + 1)
+        return 0
+
+
+class CuposRender:
+    """
+    Cupos por proceso (semáforo) y globales: `total` claves en la caché que
+    se toman con add() (atómico en Redis, Memcached y la caché de base de
+    datos). Cada cupo vence a los `segundos`: si un worker muere a mitad de
+    un render, su cupo se libera solo.
+    """
+
+    def __init__(self, por_proceso, total, cache, segundos):
+        self.semaforo = threading.BoundedSemaphore(por_proceso or procesos_disponibles())
+        self.total = total
+        self.cache = cache
+        self.segundos = segundos
+
+    def tomar(self):
+        """Ficha para soltar(); lanza Rechazo si no hay cupo."""
+        if not self.semaforo.acquire(blocking=False):
+            raise Rechazo(503, 5, 'Este servidor ya está generando todos los PDFs que admite')
+        if not self.total:
+            return None
+        dueno = uuid.uuid4().hex
+        # Empezar en un cupo al azar reparte los intentos entre workers
+        inicio = random.randrange(self.total)
+        for numero in range(self.total):
+            clave = f'pdf_cupo:{(inicio + numero) % self.total}'
+            if self.cache.add(clave, dueno, timeout=self.segundos):
+                return clave, dueno
+        self.semaforo.release()
+        raise Rechazo(503, 5, 'Se están generando demasiados PDFs')
+
+    def soltar(self, ficha):
+        if ficha is not None:
+            clave, dueno = ficha
+            # Si venció y lo tomó otro, no es nuestro para borrar
+            if self.cache.get(clave) == dueno:
+                self.cache.delete(clave)
+        self.semaforo.release()
+
+    @contextmanager
+    def ocupar(self):
+        ficha = self.tomar()
+        try:
+            yield
+        finally:
+            self.soltar(ficha)
+
+
+class AdmisionPDF:
+
+    def __init__(self, config):
+        cache = caches[config.get('CACHE', 'default')]
+        self.encabezado_ip = config.get('ENCABEZADO_IP', '')
+        self.fichas = CubetaFichas(cache, config.get('FICHAS_POR_MINUTO', 30), config.get('RAFAGA', 10))
+        self.cupos = CuposRender(config.get('POR_PROCESO', 0), config.get('GLOBAL', 0),
+                                 cache, config.get('SEGUNDOS_CUPO', 120))
+
+    def cliente(self, request):
+        if self.encabezado_ip and request.META.get(self.encabezado_ip):
+            # El último valor lo agregó nuestro proxy; los anteriores los elige el cliente
+            return request.META[self.encabezado_ip].split(',')[-1].strip()
+        return request.META.get('REMOTE_ADDR', '')
+
+    def revisar_cliente(self, request):
+        espera = self.fichas.tomar(self.cliente(request))
+        if espera:
+            raise Rechazo(429, espera, 'Demasiadas descargas de PDF desde esta dirección')
+
+
+_admision = None
+_lock = threading.Lock()
+
+
+def admision_pdf():
+    """Límites del proceso, según settings.CV_PDF_ADMISION."""
+    global _admision
+    if _admision is None:
+        with _lock:
+            if _admision is None:
+                _admision = AdmisionPDF(getattr(settings, 'CV_PDF_ADMISION', {}))
+    return _admision
+
+
+def limitar_por_cliente(vista):
+    """Cubeta de fichas antes de la vista (síncrona o async) y de cualquier consulta."""
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envuelta(request, *args, **kwargs):
+            try:
+                await sync_to_async(admision_pdf().revisar_cliente, thread_sensitive=False)(request)
+            except Rechazo as rechazo:
+                return rechazo.respuesta()
+            return await vista(request, *args, **kwargs)
+    else:
+        @wraps(vista)
+        def envuelta(request, *args, **kwargs):
+            try:
+                admision_pdf().revisar_cliente(request)
+            except Rechazo as rechazo:
+                return rechazo.respuesta()
+            return vista(request, *args, **kwargs)
+    return envuelta
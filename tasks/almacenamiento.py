@@ -0,0 +1,121 @@
+import hashlib
+import os
+import re
+import tempfile
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.db.models import F
+from .metricas import medir
+
+# ==========================================
+# ALMACENAMIENTO DEDUPLICADO POR CONTENIDO
+# ==========================================
+# Cada archivo subido se llama <carpeta de upload_to>/<sha256><extensión>.
+# Dos subidas idénticas (re-guardar el formulario, la misma foto en dos
+# perfiles) comparten un único archivo; la tabla BlobMedia lleva cuántas
+# filas lo usan y el archivo se borra cuando deja de usarlo la última.
+
+EXTENSION_VALIDA = re.compile(r'^\.[a-z0-9]{1,5}$')
+
+
+def _extension(nombre):
+    extension = os.path.splitext(nombre)[1].lower()
+    # El nombre final debe entrar en los 100 caracteres de FileField
+    return extension if EXTENSION_VALIDA.match(extension) else ''
+
+
+def nombre_por_contenido(nombre, sha256):
+    """perfiles/foto.JPG -> perfiles/<sha256>.jpg"""
+    return '/'.join(filter(None, [os.path.dirname(nombre), sha256 + _extension(nombre)]))
+
+
+def sha256_archivo(ruta, tamano_bloque=1024 * 1024):
+    sha256 = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b''):
+            sha256.update(bloque)
+    return sha256.hexdigest()
+
+
+def campos_archivo(modelo):
+    """Nombres de los FileField/ImageField de un modelo."""
+    return [campo.name for campo in modelo._meta.get_fields() if isinstance(campo, models.FileField)]
+
+
+class AlmacenamientoDeduplicado(FileSystemStorage):
+
+    def url(self, name):
+        with medir('media'):
+            return super().url(name)
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre real lo decide el hash en _save: no hace falta buscar uno libre
+        return name
+
+    def _save(self, name, content):
+        carpeta = os.path.dirname(name)
+        directorio = self.path(carpeta)
+        os.makedirs(directorio, exist_ok=True)
+
+        # Se calcula el hash mientras se escribe: el archivo se lee una sola vez
+        fd, temporal = tempfile.mkstemp(dir=directorio, suffix='.subiendo')
+        try:
+            sha256 = hashlib.sha256()
+            tamano = 0
+            with os.fdopen(fd, 'wb') as destino:
+                for bloque in content.chunks():
+                    sha256.update(bloque)
+                    destino.write(bloque)
+                    tamano += len(bloque)
+            nombre = nombre_por_contenido(name, sha256.hexdigest())
+            self._registrar(nombre, temporal, sha256.hexdigest(), tamano)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+        return nombre
+
+    def _registrar(self, nombre, origen, sha256, tamano, referencias=1):
+        """Mueve origen a su nombre por contenido (si no existía ya) y suma referencias."""
+        BlobMedia = apps.get_model('tasks', 'BlobMedia')
+        with transaction.atomic():
+            # El bloqueo de la fila ordena esta subida frente a un delete() concurrente
+            blob = BlobMedia.objects.select_for_update().filter(nombre=nombre).first()
+            ruta = self.path(nombre)
+            if not os.path.exists(ruta):
+                if self.file_permissions_mode is not None:
+                    os.chmod(origen, self.file_permissions_mode)
+                os.replace(origen, ruta)
+            else:
+                # Reutilizado: renueva la fecha para que limpiar_media lo trate como reciente
+                os.utime(ruta)
+            if blob is None:
+                BlobMedia.objects.create(nombre=nombre, sha256=sha256, tamano=tamano, referencias=referencias)
+            else:
+                BlobMedia.objects.filter(pk=blob.pk).update(referencias=F('referencias') + referencias)
+
+    def delete(self, name):
+        """Libera una referencia; el archivo se borra cuando no queda ninguna."""
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        BlobMedia = apps.get_model('tasks', 'BlobMedia')
+        with transaction.atomic():
+            blob = BlobMedia.objects.select_for_update().filter(nombre=name).first()
+            if blob is not None and blob.referencias > 1:
+                BlobMedia.objects.filter(pk=blob.pk).update(referencias=F('referencias') - 1)
+                return
+            if blob is not None:
+                blob.delete()
+            # Sin fila en el índice: archivo anterior a la deduplicación, de un solo uso
+            super().delete(name)
+
+
+_almacenamiento = None
+
+
+def almacenamiento_media():
+    """Storage de todos los FileField/ImageField de la app (instancia única)."""
+    global _almacenamiento
+    if _almacenamiento is None:
+        _almacenamiento = AlmacenamientoDeduplicado()
+    return _almacenamiento
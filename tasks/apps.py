@@ -3,3 +3,14 @@ from django.apps import AppConfig
 
 class TasksConfig(AppConfig):
     name = 'tasks'
+
+    def ready(self):
+        # Registra las señales que mantienen la versión de cada CV
+        from . import signals  # noqa: F401
+        # Medición de SQL por petición (tasks/metricas.py) en toda conexión
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+        from .metricas import instalar_envoltura_sql
+        connection_created.connect(instalar_envoltura_sql, dispatch_uid='tasks_envoltura_sql')
+        for conexion in connections.all(initialized_only=True):
+            instalar_envoltura_sql(connection=conexion)
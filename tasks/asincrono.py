@@ -0,0 +1,24 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+# ==========================================
+# LECTURAS CONCURRENTES DESDE VISTAS ASYNC
+# ==========================================
+# El ORM async de Django 5.0 (afirst, async for) pasa cada consulta por
+# sync_to_async(thread_sensitive=True): todas las de una petición corren en
+# el mismo hilo, una detrás de otra, aunque se las junte con asyncio.gather.
+# Para que lecturas independientes se superpongan de verdad, cada una corre
+# en el pool de hilos con la conexión propia de ese hilo (persistente según
+# CONN_MAX_AGE, como la de un worker WSGI).
+
+
+def en_pool(funcion):
+    """Versión awaitable de funcion que corre en el pool de hilos."""
+    def en_hilo(*args, **kwargs):
+        # Lo que hace Django al empezar cada petición: descartar conexiones caídas o vencidas
+        close_old_connections()
+        return funcion(*args, **kwargs)
+    return sync_to_async(en_hilo, thread_sensitive=False)
+
+
+leer_lista = en_pool(list)
@@ -0,0 +1,218 @@
+import http.cookiejar
+import os
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from .cache_pdf import SECCIONES_PDF
+
+# ==========================================
+# PRUEBA DE CARGA CONTRA UN SERVIDOR LOCAL
+# ==========================================
+# Cada escenario corre por separado: N clientes (hilos) piden URLs del
+# escenario sin pausa durante D segundos. Se mide la latencia de cada
+# respuesta completa (cuerpo leído). Los clientes que necesitan sesión entran
+# una vez por /signin/ con un usuario sintético distinto cada uno.
+
+LISTAS = ('experiencias', 'cursos', 'habilidades', 'reconocimientos',
+          'productos-academicos', 'productos-laborales', 'venta-garage')
+
+
+def _pdf(rng, username):
+    # Combinaciones al azar de secciones: mezcla aciertos y fallos de la caché de PDFs
+    params = {f'incluir_{seccion}': 'on' for seccion in SECCIONES_PDF if rng.random() < 0.7}
+    return f'/cv/{username}/pdf/?{urllib.parse.urlencode(params)}'
+
+
+# nombre -> (requiere sesión, ruta a pedir)
+ESCENARIOS = {
+    'cv_publico': (False, lambda rng, username: f'/cv/{username}/'),
+    'descargar_pdf': (False, _pdf),
+    'home': (True, lambda rng, username: '/'),
+    'listas': (True, lambda rng, username: f'/{rng.choice(LISTAS)}/'),
+}
+
+CSRF = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def percentil(ordenados, p):
+    """Percentil p (0-100) con interpolación lineal entre rangos."""
+    if not ordenados:
+        return None
+    posicion = (len(ordenados) - 1) * p / 100
+    abajo = int(posicion)
+    arriba = min(abajo + 1, len(ordenados) - 1)
+    return ordenados[abajo] + (ordenados[arriba] - ordenados[abajo]) * (posicion - abajo)
+
+
+class ClienteHTTP:
+
+    def __init__(self, base, timeout=60):
+        self.base = base.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def pedir(self, ruta, datos=None, encabezados=None):
+        """(estado, cuerpo). Los 4xx/5xx se devuelven, no se lanzan."""
+        solicitud = urllib.request.Request(self.base + ruta, data=datos, headers=encabezados or {})
+        try:
+            with self.opener.open(solicitud, timeout=self.timeout) as respuesta:
+                return respuesta.status, respuesta.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+
+    def entrar(self, username, password):
+        estado, cuerpo = self.pedir('/signin/')
+        token = CSRF.search(cuerpo.decode('utf-8', 'replace'))
+        if estado != 200 or not token:
+            raise RuntimeError(f'No se pudo abrir /signin/ ({estado})')
+        datos = urllib.parse.urlencode({
+            'username': username, 'password': password, 'csrfmiddlewaretoken': token.group(1),
+        }).encode()
+        estado, cuerpo = self.pedir('/signin/', datos, {'Referer': self.base + '/signin/'})
+        if b'Credenciales incorrectas' in cuerpo:
+            raise RuntimeError(f'Credenciales incorrectas para {username}')
+
+
+def correr_escenario(base, nombre, usernames, password, clientes, duracion, semilla=0):
+    """Resultados del escenario: latencias en ms, peticiones por segundo y errores."""
+    requiere_sesion, ruta_de = ESCENARIOS[nombre]
+    latencias, errores, bloqueo = [], [], threading.Lock()
+    # Todos los clientes entran antes de empezar a medir
+    preparados = []
+    for numero in range(clientes):
+        cliente = ClienteHTTP(base)
+        rng = random.Random(semilla * 1000 + numero)
+        username = usernames[numero % len(usernames)]
+        if requiere_sesion:
+            cliente.entrar(username, password)
+        preparados.append((cliente, rng, username))
+
+    def trabajar(cliente, rng, username, fin):
+        propias, fallidas = [], []
+        while time.perf_counter() < fin:
+            ruta = ruta_de(rng, username if requiere_sesion else rng.choice(usernames))
+            inicio = time.perf_counter()
+            try:
+                estado, _ = cliente.pedir(ruta)
+            except OSError as error:
+                estado = type(error).__name__
+            propias.append((time.perf_counter() - inicio) * 1000)
+            if not isinstance(estado, int) or estado >= 400:
+                fallidas.append(f'{estado} {ruta}')
+        with bloqueo:
+            latencias.extend(propias)
+            errores.extend(fallidas)
+
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    hilos = [threading.Thread(target=trabajar, args=(*preparado, fin)) for preparado in preparados]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        'peticiones': len(latencias),
+        'errores': len(errores),
+        'ejemplos_error': sorted(set(errores))[:5],
+        'rps': round(len(latencias) / transcurrido, 1),
+        **{f'p{p}_ms': round(percentil(latencias, p), 1) if latencias else None for p in (50, 95, 99)},
+        'max_ms': round(latencias[-1], 1) if latencias else None,
+    }
+
+
+# ==========================================
+# SERVIDOR: gunicorn local y memoria de sus procesos
+# ==========================================
+def _procesos_hijos(pid):
+    hijos = []
+    for entrada in os.listdir('/proc'):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entrada}/stat') as stat:
+                # El nombre del programa va entre paréntesis y puede tener espacios
+                ppid = int(stat.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            hijos.append(int(entrada))
+    return hijos
+
+
+def rss_pico_kb(pid):
+    """{pid: VmHWM en kB} del proceso y sus hijos (Linux); vacío si /proc no está disponible."""
+    picos = {}
+    for proceso in [pid, *_procesos_hijos(pid)]:
+        try:
+            with open(f'/proc/{proceso}/status') as status:
+                for linea in status:
+                    if linea.startswith('VmHWM:'):
+                        picos[proceso] = int(linea.split()[1])
+        except OSError:
+            continue
+    return picos
+
+
+class ServidorGunicorn:
+    """
+    Levanta djangocrud.wsgi con gunicorn en un puerto libre y lo detiene al
+    salir. Con asgi=True sirve djangocrud.asgi con workers de uvicorn (las
+    vistas async; hilos no aplica).
+    """
+
+    def __init__(self, workers=2, hilos=1, asgi=False, timeout_arranque=30):
+        self.workers = workers
+        self.hilos = hilos
+        self.asgi = asgi
+        self.timeout_arranque = timeout_arranque
+        self.proceso = None
+        with socket.socket() as libre:
+            libre.bind(('127.0.0.1', 0))
+            self.puerto = libre.getsockname()[1]
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.puerto}'
+
+    def __enter__(self):
+        if self.asgi:
+            aplicacion = ['djangocrud.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker']
+        else:
+            aplicacion = ['djangocrud.wsgi:application', '--threads', str(self.hilos)]
+        # Todos los clientes salen de 127.0.0.1: la cubeta por IP de descargar_pdf
+        # los frenaría como a un solo scraper (los cupos de render sí se miden)
+        entorno = {'CV_PDF_FICHAS_POR_MINUTO': '0', **os.environ}
+        self.proceso = subprocess.Popen([
+            sys.executable, '-m', 'gunicorn', *aplicacion,
+            '--bind', f'127.0.0.1:{self.puerto}', '--workers', str(self.workers), '--log-level', 'warning',
+        ], env=entorno)
+        limite = time.monotonic() + self.timeout_arranque
+        while time.monotonic() < limite:
+            if self.proceso.poll() is not None:
+                raise RuntimeError(f'gunicorn terminó al arrancar (código {self.proceso.returncode})')
+            try:
+                ClienteHTTP(self.url, timeout=2).pedir('/signin/')
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f'gunicorn no respondió en {self.timeout_arranque}s')
+
+    def __exit__(self, *exc):
+        if self.proceso and self.proceso.poll() is None:
+            self.proceso.send_signal(signal.SIGTERM)
+            try:
+                self.proceso.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proceso.kill()
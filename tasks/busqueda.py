@@ -0,0 +1,144 @@
+import re
+from django.db import connection, transaction
+from .models import DocumentoBusqueda, DatosPersonales, ExperienciaLaboral, Habilidad, CursoRealizado
+
+# ==========================================
+# BÚSQUEDA DE TEXTO COMPLETO EN CVs PÚBLICOS
+# ==========================================
+# Un DocumentoBusqueda por perfil activo con solo el contenido visible.
+# Postgres: tsvector ponderado (A/B/C) con índice GIN de expresión.
+# SQLite: tabla FTS5 con bm25 y los mismos pesos.
+
+CONFIG_POSTGRES = 'spanish'
+PESOS_FTS5 = (10.0, 4.0, 1.0)
+MAX_TERMINOS = 8
+TERMINO = re.compile(r'\w+')
+
+# Tablas cuyos cambios alteran el documento de búsqueda
+MODELOS_BUSQUEDA = (DatosPersonales, ExperienciaLaboral, Habilidad, CursoRealizado)
+
+
+def _unir(textos):
+    return '\n'.join(texto for texto in textos if texto)
+
+
+def actualizar_documento(user_id):
+    """Recalcula el documento del usuario; lo elimina si el perfil no es público."""
+    return actualizar_documentos([user_id]).get(user_id)
+
+
+def actualizar_documentos(user_ids):
+    """
+    Versión por lotes (importaciones, reindexado): una consulta por tabla para
+    todos los usuarios. Devuelve {user_id: documento} de los perfiles públicos.
+    """
+    user_ids = list(user_ids)
+    perfiles = {
+        datos['user_id']: datos for datos in DatosPersonales.objects.filter(
+            user_id__in=user_ids, perfil_activo=True
+        ).values('user_id', 'nombres', 'apellidos', 'titulo_profesional', 'descripcion_perfil')
+    }
+    visibles = {'user_id__in': list(perfiles), 'activar_para_que_se_vea_en_front': True}
+    experiencias, habilidades, cursos = {}, {}, {}
+    for user_id, cargo, funciones in ExperienciaLaboral.objects.filter(**visibles).values_list(
+            'user_id', 'cargo_desempenado', 'descripcion_funciones'):
+        experiencias.setdefault(user_id, []).append((cargo, funciones))
+    for user_id, nombre in Habilidad.objects.filter(**visibles).values_list('user_id', 'nombre'):
+        habilidades.setdefault(user_id, []).append(nombre)
+    for user_id, nombre in CursoRealizado.objects.filter(**visibles).values_list('user_id', 'nombre_curso'):
+        cursos.setdefault(user_id, []).append(nombre)
+
+    documentos = {}
+    for user_id, datos in perfiles.items():
+        propias = experiencias.get(user_id, [])
+        documentos[user_id] = DocumentoBusqueda(
+            user_id=user_id,
+            titulo=_unir([f"{datos['nombres']} {datos['apellidos']}", datos['titulo_profesional']]),
+            perfil=_unir([datos['descripcion_perfil'], *(cargo for cargo, _ in propias), *habilidades.get(user_id, [])]),
+            detalle=_unir([*(funciones for _, funciones in propias), *cursos.get(user_id, [])]),
+            resumen=(datos['descripcion_perfil'] or '')[:300],
+        )
+    # Reemplazo completo: los perfiles que dejaron de ser públicos pierden su documento
+    with transaction.atomic():
+        DocumentoBusqueda.objects.filter(user_id__in=user_ids).delete()
+        DocumentoBusqueda.objects.bulk_create(documentos.values())
+    return documentos
+
+
+def terminos_busqueda(texto):
+    return TERMINO.findall((texto or '').lower())[:MAX_TERMINOS]
+
+
+# ==========================================
+# CONSULTA (resultado paginable con django.core.paginator)
+# ==========================================
+CAMPOS_RESULTADO = ('user_id', 'username', 'titulo', 'resumen')
+
+
+def _buscar_postgres(terminos):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+    from django.db.models import F
+
+    # Misma expresión que el índice GIN de la migración 0014
+    vector = (
+        SearchVector('titulo', weight='A', config=CONFIG_POSTGRES)
+        + SearchVector('perfil', weight='B', config=CONFIG_POSTGRES)
+        + SearchVector('detalle', weight='C', config=CONFIG_POSTGRES)
+    )
+    # Todos los términos, cada uno también como prefijo ("desarro" -> desarrollador)
+    consulta = SearchQuery(
+        ' & '.join(f'{termino}:*' for termino in terminos), config=CONFIG_POSTGRES, search_type='raw'
+    )
+    return (
+        DocumentoBusqueda.objects
+        .annotate(vector=vector, rango=SearchRank(vector, consulta), username=F('user__username'))
+        .filter(vector=consulta)
+        .order_by('-rango', 'user_id')
+        .values(*CAMPOS_RESULTADO)
+    )
+
+
+class ResultadosFTS5:
+    """Resultados de la tabla FTS5 con la interfaz que espera Paginator (count y slicing)."""
+
+    def __init__(self, terminos):
+        # Frase entre comillas con * = prefijo; los términos vienen de \w+ y no llevan comillas
+        self.expresion = ' '.join(f'"{termino}"*' for termino in terminos)
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT count(*) FROM tasks_documentobusqueda_fts WHERE tasks_documentobusqueda_fts MATCH %s',
+                [self.expresion]
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, corte):
+        if not isinstance(corte, slice):
+            return self[corte:corte + 1][0]
+        inicio = corte.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''SELECT d.user_id, u.username, d.titulo, d.resumen
+                    FROM tasks_documentobusqueda_fts
+                    JOIN tasks_documentobusqueda d ON d.user_id = tasks_documentobusqueda_fts.rowid
+                    JOIN auth_user u ON u.id = d.user_id
+                    WHERE tasks_documentobusqueda_fts MATCH %s
+                    ORDER BY bm25(tasks_documentobusqueda_fts, {", ".join(map(str, PESOS_FTS5))}), d.user_id
+                    LIMIT %s OFFSET %s''',
+                [self.expresion, corte.stop - inicio, inicio]
+            )
+            return [dict(zip(CAMPOS_RESULTADO, fila)) for fila in cursor.fetchall()]
+
+
+def buscar_perfiles(texto):
+    """Perfiles públicos que contienen todos los términos, del más relevante al menos."""
+    terminos = terminos_busqueda(texto)
+    if not terminos:
+        return []
+    if connection.vendor == 'postgresql':
+        return _buscar_postgres(terminos)
+    return ResultadosFTS5(terminos)
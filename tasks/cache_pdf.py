@@ -0,0 +1,153 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+from django.conf import settings
+from .versiones import clave_cache
+
+# Secciones opcionales del PDF, en el orden de sus bits en la máscara
+SECCIONES_PDF = (
+    'experiencias',
+    'cursos',
+    'reconocimientos',
+    'productos_academicos',
+    'productos_laborales',
+    'habilidades',
+)
+
+# Subir este número cuando cambie cv_pdf.html para descartar PDFs viejos
+FORMATO_PDF = 1
+
+
+def mascara_secciones(params):
+    """Convierte los parámetros incluir_* del GET en una máscara de bits (0-63)."""
+    mascara = 0
+    for bit, seccion in enumerate(SECCIONES_PDF):
+        if params.get(f'incluir_{seccion}') == 'on':
+            mascara |= 1 << bit
+    return mascara
+
+
+def secciones_incluidas(mascara):
+    """Devuelve los flags incluir_* correspondientes a una máscara."""
+    return {
+        f'incluir_{seccion}': bool(mascara & (1 << bit))
+        for bit, seccion in enumerate(SECCIONES_PDF)
+    }
+
+
+def clave_pdf(user_id, version, mascara):
+    # La fecha entra en la clave (como en el ETag) porque el PDF muestra la
+    # edad; los PDFs de días anteriores salen solos por LRU
+    return clave_cache('cv_pdf', user_id, FORMATO_PDF, mascara, date.today().isoformat(), version=version)
+
+
+# ==========================================
+# CACHÉ LRU EN DISCO PARA PDFs GENERADOS
+# ==========================================
+# Al podar se baja hasta esta fracción de max_bytes: las escrituras siguientes
+# solo suman a un total en memoria en lugar de recorrer el directorio
+NIVEL_PODA = 0.9
+# Otros workers escriben en el mismo directorio: el total propio se corrige
+# con un recorrido real cada tanto
+SEGUNDOS_RECUENTO = 60
+
+
+class CachePDF:
+    """
+    Guarda los bytes de cada PDF en un archivo cuyo nombre es el SHA-256 de
+    su clave. La fecha de modificación se usa como marca LRU: cada acierto la
+    renueva y, al superar max_bytes, se eliminan primero los menos usados.
+    """
+
+    def __init__(self, directorio, max_bytes):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None
+        self._recuento = 0.0
+
+    def _ruta(self, clave):
+        nombre = hashlib.sha256(clave.encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, nombre[:2], f'{nombre}.pdf')
+
+    def obtener(self, clave):
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'rb') as archivo:
+                contenido = archivo.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+        return contenido
+
+    def guardar(self, clave, contenido):
+        if len(contenido) > self.max_bytes:
+            return
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        # Escritura atómica: otros workers nunca ven un PDF a medias
+        fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as archivo:
+                archivo.write(contenido)
+            try:
+                anterior = os.path.getsize(ruta)
+            except OSError:
+                anterior = 0
+            os.replace(temporal, ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        self._sumar(len(contenido) - anterior)
+
+    def _sumar(self, delta):
+        with self._lock:
+            vencido = time.monotonic() - self._recuento > SEGUNDOS_RECUENTO
+            if self._total is not None and not vencido:
+                self._total += delta
+                if self._total <= self.max_bytes:
+                    return
+            self._podar()
+
+    def _archivos(self):
+        for subdir in os.scandir(self.directorio):
+            if not subdir.is_dir():
+                continue
+            for entrada in os.scandir(subdir.path):
+                if entrada.name.endswith('.pdf'):
+                    stat = entrada.stat()
+                    yield stat.st_mtime, stat.st_size, entrada.path
+
+    def _podar(self):
+        """Con el lock tomado: recuenta y, si pasa del límite, elimina los menos usados hasta NIVEL_PODA."""
+        archivos = sorted(self._archivos())
+        total = sum(tamano for _, tamano, _ in archivos)
+        if total > self.max_bytes:
+            objetivo = self.max_bytes * NIVEL_PODA
+            for _, tamano, ruta in archivos:
+                if total <= objetivo:
+                    break
+                try:
+                    os.remove(ruta)
+                except FileNotFoundError:
+                    pass
+                total -= tamano
+        self._total = total
+        self._recuento = time.monotonic()
+
+
+_cache = None
+
+
+def cache_pdf():
+    global _cache
+    if _cache is None:
+        _cache = CachePDF(settings.CV_PDF_CACHE_DIR, settings.CV_PDF_CACHE_MAX_BYTES)
+    return _cache
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from .cache_pdf import cache_pdf, clave_pdf
+from .models import TrabajoPDF
+from .pdf import generar_pdf
+from .versiones import obtener_version
+
+
+# ==========================================
+# COLA DE PDFs (la base de datos hace de broker)
+# ==========================================
+# Un trabajo con error se vuelve a intentar si se pide después de esto
+REINTENTO_ERROR = timedelta(minutes=5)
+OBSOLETO = 'El CV cambió mientras el trabajo esperaba; vuelve a pedir el PDF.'
+
+
+def encolar_trabajo(usuario, mascara):
+    """
+    Un solo trabajo por (usuario, versión, secciones), garantizado por la
+    base: pedirlo otra vez devuelve el mismo, así la URL pública no permite
+    llenar la tabla. Uno que terminó en error vuelve a pendiente pasado
+    REINTENTO_ERROR.
+    """
+    version = obtener_version(usuario.pk)
+    trabajo, creado = TrabajoPDF.objects.get_or_create(user=usuario, version=version, mascara=mascara)
+    if not creado and trabajo.estado == 'error' and trabajo.fecha_actualizacion < timezone.now() - REINTENTO_ERROR:
+        if TrabajoPDF.objects.filter(pk=trabajo.pk, estado='error').update(
+            estado='pendiente', error='', fecha_actualizacion=timezone.now()
+        ):
+            trabajo.estado, trabajo.error = 'pendiente', ''
+    return trabajo
+
+
+def reclamar_trabajo(pk):
+    """Pasa un trabajo de pendiente a procesando; False si otro worker lo tomó antes."""
+    return TrabajoPDF.objects.filter(pk=pk, estado='pendiente').update(
+        estado='procesando',
+        fecha_actualizacion=timezone.now()
+    ) == 1
+
+
+def renderizar_trabajo(pk):
+    """Genera el PDF de un trabajo ya reclamado. Se ejecuta dentro del pool de procesos."""
+    trabajo = TrabajoPDF.objects.select_related('user__datos_personales').get(pk=pk)
+    try:
+        usuario = trabajo.user
+        # Solo se puede generar la versión actual: un trabajo de una anterior
+        # guardaría bajo su versión un contenido que no le corresponde
+        if obtener_version(usuario.pk) != trabajo.version:
+            trabajo.estado, trabajo.error = 'error', OBSOLETO
+            trabajo.save()
+            return trabajo.estado
+        clave = clave_pdf(usuario.pk, trabajo.version, trabajo.mascara)
+        contenido = cache_pdf().obtener(clave)
+        if contenido is None:
+            contenido = generar_pdf(usuario, trabajo.mascara)
+            cache_pdf().guardar(clave, contenido)
+        trabajo.archivo.save(f'CV_{usuario.username}_{trabajo.mascara}.pdf', ContentFile(contenido), save=False)
+        trabajo.estado = 'listo'
+        trabajo.error = ''
+    except Exception as e:
+        trabajo.estado = 'error'
+        trabajo.error = str(e)
+    trabajo.save()
+    return trabajo.estado
+
+
+def marcar_fallidos(pks, error):
+    """Trabajos reclamados que no llegaron a terminar (p. ej. murió su proceso)."""
+    return TrabajoPDF.objects.filter(pk__in=pks, estado='procesando').update(
+        estado='error', error=error, fecha_actualizacion=timezone.now()
+    )
+
+
+def reencolar_atascados(minutos):
+    """Devuelve a pendiente los trabajos de un worker que murió a mitad de proceso."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return TrabajoPDF.objects.filter(estado='procesando', fecha_actualizacion__lt=limite).update(
+        estado='pendiente',
+        fecha_actualizacion=timezone.now()
+    )
+
+
+def purgar_trabajos(dias):
+    """Elimina trabajos terminados (y sus archivos) más antiguos que el límite."""
+    limite = timezone.now() - timedelta(days=dias)
+    eliminados = 0
+    for trabajo in TrabajoPDF.objects.filter(estado__in=['listo', 'error'], fecha_actualizacion__lt=limite):
+        if trabajo.archivo:
+            trabajo.archivo.delete(save=False)
+        trabajo.delete()
+        eliminados += 1
+    return eliminados
@@ -0,0 +1,120 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from .models import (
+    ContadoresPerfil, ExperienciaLaboral, Reconocimiento, CursoRealizado,
+    ProductoAcademico, ProductoLaboral, VentaGarage, Habilidad
+)
+from .versiones import actualizar_y_versionar
+
+# Campo del contador -> (tabla, filtros de lo que cuenta)
+CONTADORES = {
+    'total_experiencias': (ExperienciaLaboral, {}),
+    'total_cursos': (CursoRealizado, {}),
+    'total_habilidades': (Habilidad, {}),
+    'total_reconocimientos': (Reconocimiento, {}),
+    'total_productos_academicos': (ProductoAcademico, {}),
+    'total_productos_laborales': (ProductoLaboral, {}),
+    'total_ventas': (VentaGarage, {'vendido': False}),
+}
+
+CAMPO_POR_MODELO = {modelo: campo for campo, (modelo, filtros) in CONTADORES.items()}
+
+
+# ==========================================
+# MANTENIMIENTO INCREMENTAL
+# ==========================================
+def ajustar_contador(user_id, campo, delta):
+    """Suma delta al contador sin bajar de cero."""
+    if not delta:
+        return
+    filas = ContadoresPerfil.objects.filter(user_id=user_id)
+    suma = {campo: Greatest(F(campo) + delta, Value(0))}
+    if filas.update(**suma) or delta < 0:
+        # En bajas no se crea nada: puede ser el borrado en cascada del usuario
+        return
+    # Primera vez: la fila arranca con los totales reales sin este cambio (ya
+    # contado en ellos) y luego se suma como siempre. Si otra transacción la
+    # crea a la vez, el INSERT se ignora en lugar de abortar con un
+    # IntegrityError el save() que nos llamó.
+    inicial = conteos_reales([user_id]).first()
+    if inicial is None:
+        return
+    del inicial['pk']
+    inicial[campo] = max(0, inicial[campo] - delta)
+    ContadoresPerfil.objects.bulk_create([ContadoresPerfil(user_id=user_id, **inicial)], ignore_conflicts=True)
+    filas.update(**suma)
+
+
+def marcar_como_vendidos(queryset):
+    """Marca productos como vendidos descontando los que estaban a la venta."""
+    with transaction.atomic():
+        a_la_venta = list(
+            queryset.filter(vendido=False).order_by().values('user_id').annotate(total=Count('pk'))
+        )
+        actualizados = actualizar_y_versionar(queryset, vendido=True)
+        for fila in a_la_venta:
+            ajustar_contador(fila['user_id'], 'total_ventas', -fila['total'])
+    return actualizados
+
+
+# ==========================================
+# RECÁLCULO COMPLETO
+# ==========================================
+def _conteo(modelo, filtros):
+    subconsulta = (
+        modelo.objects.filter(user=OuterRef('pk'), **filtros)
+        .order_by()
+        .values('user')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(subconsulta, output_field=IntegerField()), 0)
+
+
+def conteos_reales(user_ids=None):
+    """Totales calculados desde las tablas, en una sola consulta agregada."""
+    usuarios = User.objects.all()
+    if user_ids is not None:
+        usuarios = usuarios.filter(pk__in=user_ids)
+    return usuarios.annotate(**{
+        campo: _conteo(modelo, filtros) for campo, (modelo, filtros) in CONTADORES.items()
+    }).values('pk', *CONTADORES)
+
+
+def reconciliar(user_ids=None, corregir=True):
+    """
+    Compara los contadores guardados con los reales.
+    Devuelve {user_id: {campo: (guardado, real)}} con las diferencias encontradas.
+    """
+    desvios = {}
+    nuevos = []
+    with transaction.atomic():
+        reales = list(conteos_reales(user_ids))
+        guardados = {
+            fila['user_id']: fila
+            for fila in ContadoresPerfil.objects.filter(
+                user_id__in=[fila['pk'] for fila in reales]
+            ).values('user_id', *CONTADORES)
+        }
+        for fila in reales:
+            user_id = fila['pk']
+            actual = guardados.get(user_id, {})
+            diferencias = {
+                campo: (actual.get(campo), fila[campo])
+                for campo in CONTADORES if actual.get(campo) != fila[campo]
+            }
+            if not diferencias:
+                continue
+            desvios[user_id] = diferencias
+            if corregir and user_id in guardados:
+                ContadoresPerfil.objects.filter(user_id=user_id).update(
+                    **{campo: fila[campo] for campo in CONTADORES}
+                )
+            elif corregir:
+                nuevos.append(ContadoresPerfil(user_id=user_id, **{campo: fila[campo] for campo in CONTADORES}))
+        # Usuarios sin fila (p. ej. importados con bulk_create): un solo INSERT.
+        # Si otra transacción ya creó alguna, la suya se respeta.
+        ContadoresPerfil.objects.bulk_create(nuevos, ignore_conflicts=True)
+    return desvios
@@ -0,0 +1,99 @@
+import gzip
+import os
+import shutil
+import tempfile
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import MissingFileError
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli está en requirements.txt
+    brotli = None
+
+
+# ==========================================
+# EXPORTACIÓN ESTÁTICA DEL CV PÚBLICO
+# ==========================================
+# Estructura: <CV_EXPORT_DIR>/<user_id>/v<version>-e<edad>.html (+ .gz y .br)
+# El nombre lleva la versión del perfil y la edad que muestra: si existe el
+# archivo, está al día. Tras un cumpleaños se renderiza en vivo hasta la
+# próxima exportación.
+
+def directorio_usuario(user_id):
+    return os.path.join(settings.CV_EXPORT_DIR, str(user_id))
+
+
+def ruta_exportacion(user_id, version, fecha_nacimiento):
+    edad = relativedelta(date.today(), fecha_nacimiento).years if fecha_nacimiento else '-'
+    return os.path.join(directorio_usuario(user_id), f'v{version}-e{edad}.html')
+
+
+def _escribir_atomico(ruta, contenido):
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def escribir_exportacion(user_id, version, fecha_nacimiento, html):
+    """Guarda el HTML con sus variantes gzip y brotli y borra las versiones anteriores."""
+    directorio = directorio_usuario(user_id)
+    os.makedirs(directorio, exist_ok=True)
+    ruta = ruta_exportacion(user_id, version, fecha_nacimiento)
+    contenido = html.encode('utf-8')
+
+    # Las variantes comprimidas se escriben antes que el .html: cuando el
+    # .html aparece, WhiteNoise ya encuentra sus alternativas
+    _escribir_atomico(ruta + '.gz', gzip.compress(contenido, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _escribir_atomico(ruta + '.br', brotli.compress(contenido))
+    _escribir_atomico(ruta, contenido)
+
+    vigentes = {os.path.basename(ruta) + sufijo for sufijo in ('', '.gz', '.br')}
+    for entrada in os.scandir(directorio):
+        if entrada.name not in vigentes and not entrada.name.endswith('.tmp'):
+            os.remove(entrada.path)
+    return len(contenido)
+
+
+def eliminar_exportacion(user_id):
+    shutil.rmtree(directorio_usuario(user_id), ignore_errors=True)
+
+
+def usuarios_exportados():
+    """IDs de usuario que tienen un directorio de exportación."""
+    if not os.path.isdir(settings.CV_EXPORT_DIR):
+        return set()
+    return {int(entrada.name) for entrada in os.scandir(settings.CV_EXPORT_DIR)
+            if entrada.is_dir() and entrada.name.isdigit()}
+
+
+# Solo se usa su lógica de archivos (variantes comprimidas, rangos, cabeceras)
+_whitenoise = WhiteNoise(None, max_age=None, allow_all_origins=False)
+
+
+def servir_exportacion(request, user_id, version, fecha_nacimiento):
+    """
+    Respuesta de WhiteNoise con la copia estática si existe para esta
+    versión exacta del perfil y la edad de hoy; None si hay que renderizar.
+    """
+    ruta = ruta_exportacion(user_id, version, fecha_nacimiento)
+    try:
+        static_file = _whitenoise.get_static_file(ruta, request.path_info)
+        response = WhiteNoiseMiddleware.serve(static_file, request)
+    except (MissingFileError, FileNotFoundError):
+        # No exportado todavía, reemplazado por una versión más nueva o de antes de un cumpleaños
+        return None
+    # ETag y Last-Modified los pone @condition, iguales a los del render dinámico
+    del response['ETag']
+    del response['Last-Modified']
+    return response
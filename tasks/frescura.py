@@ -0,0 +1,100 @@
+import hashlib
+from datetime import datetime, time
+from django.contrib.auth.models import User
+from django.db.models import F, Max, OuterRef, Subquery
+from django.utils import timezone
+from .cache_pdf import FORMATO_PDF, mascara_secciones
+from .models import VersionPerfil
+from .signals import MODELOS_CV
+
+
+# ==========================================
+# FRESCURA DEL CV (ETag / Last-Modified)
+# ==========================================
+def _max_actualizacion(modelo):
+    return Subquery(
+        modelo.objects.filter(user=OuterRef('pk'))
+        .order_by()
+        .values('user')
+        .annotate(ultima=Max('fecha_actualizacion'))
+        .values('ultima')
+    )
+
+
+def _consulta_frescura(username):
+    version = VersionPerfil.objects.filter(user=OuterRef('pk'))
+    return User.objects.filter(username=username).annotate(
+        version_cv=Subquery(version.values('version')[:1]),
+        ts_version=Subquery(version.values('fecha_actualizacion')[:1]),
+        # Para la copia exportada, que depende de la edad (tasks/exportacion.py)
+        nacimiento=F('datos_personales__fecha_nacimiento'),
+        **{f'ts_{modelo._meta.model_name}': _max_actualizacion(modelo) for modelo in MODELOS_CV}
+    ).values()
+
+
+def _frescura_desde_fila(fila):
+    if fila is None:
+        return None
+    # La fila de versión cubre también borrados y updates masivos,
+    # que no dejan rastro en fecha_actualizacion de ninguna tabla
+    marcas = [valor for campo, valor in fila.items() if campo.startswith('ts_') and valor]
+    return {
+        'user_id': fila['id'],
+        'version': fila['version_cv'] or 0,
+        'fecha_nacimiento': fila['nacimiento'],
+        'ultima_modificacion': max(marcas) if marcas else fila['date_joined'],
+    }
+
+
+def frescura_perfil(request, username):
+    """
+    user_id, versión y última modificación del CV en una sola consulta.
+    Se guarda en el request para que ETag, Last-Modified y la vista la compartan.
+    """
+    memo = request.__dict__.setdefault('_frescura_cv', {})
+    if username not in memo:
+        memo[username] = _frescura_desde_fila(_consulta_frescura(username).first())
+    return memo[username]
+
+
+async def afrescura_perfil(request, username):
+    """Versión async de frescura_perfil (mismo memo en el request)."""
+    memo = request.__dict__.setdefault('_frescura_cv', {})
+    if username not in memo:
+        memo[username] = _frescura_desde_fila(await _consulta_frescura(username).afirst())
+    return memo[username]
+
+
+def _hoy():
+    return timezone.localdate()
+
+
+def _etag(*partes):
+    # La fecha de hoy entra en la huella porque el CV muestra la edad
+    huella = ':'.join(str(parte) for parte in (*partes, _hoy().isoformat()))
+    return hashlib.sha256(huella.encode('utf-8')).hexdigest()[:32]
+
+
+def ultima_modificacion_cv(request, username):
+    frescura = frescura_perfil(request, username)
+    if frescura is None:
+        return None
+    # Igual que en el ETag: la edad cambia al cambiar el día, así que un
+    # If-Modified-Since de ayer no puede responder 304
+    inicio_del_dia = timezone.make_aware(datetime.combine(_hoy(), time.min))
+    return max(frescura['ultima_modificacion'], inicio_del_dia)
+
+
+def etag_cv_publico(request, username):
+    frescura = frescura_perfil(request, username)
+    if frescura is None:
+        return None
+    # La barra de navegación cambia según quién mira la página
+    return _etag('cv_publico', frescura['user_id'], frescura['version'], request.user.pk or 0)
+
+
+def etag_pdf(request, username):
+    frescura = frescura_perfil(request, username)
+    if frescura is None:
+        return None
+    return _etag('cv_pdf', frescura['user_id'], frescura['version'], FORMATO_PDF, mascara_secciones(request.GET))
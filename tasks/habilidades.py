@@ -0,0 +1,209 @@
+import asyncio
+import heapq
+import re
+import threading
+import unicodedata
+from datetime import timedelta
+from django.db.models import Count
+from .asincrono import en_pool
+from .models import DatosPersonales, Habilidad, TerminoHabilidad
+
+# ==========================================
+# VOCABULARIO NORMALIZADO E ÍNDICE INVERTIDO DE HABILIDADES
+# ==========================================
+# Término -> lista de posteo (user_id, nivel) = filas visibles de Habilidad con
+# ese término, leídas en orden de user_id desde el índice hab_termino_idx.
+
+# Orden de los niveles para consultas "nivel >= avanzado"
+NIVELES = [valor for valor, etiqueta in Habilidad.NIVEL_CHOICES]
+ESPACIOS = re.compile(r'\s+')
+LARGO_CLAVE = TerminoHabilidad._meta.get_field('clave').max_length
+
+
+def normalizar_habilidad(texto):
+    """'  Pýthon  3 ' -> 'python 3' (sin tildes, minúsculas, espacios simples)."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    # NFKD y casefold pueden alargar el texto ('ß' -> 'ss', 'ﬁ' -> 'fi'): se corta al largo de la columna
+    return ESPACIOS.sub(' ', sin_tildes.casefold()).strip()[:LARGO_CLAVE].rstrip()
+
+
+def niveles_desde(nivel_minimo):
+    if not nivel_minimo:
+        return NIVELES
+    return NIVELES[NIVELES.index(nivel_minimo):]
+
+
+def obtener_termino(nombre):
+    clave = normalizar_habilidad(nombre)
+    if not clave:
+        return None
+    termino, _ = TerminoHabilidad.objects.get_or_create(clave=clave, defaults={'nombre': nombre.strip()})
+    return termino
+
+
+def recontar_terminos(termino_ids):
+    """Actualiza total_usuarios (usuarios distintos con la habilidad visible)."""
+    termino_ids = {pk for pk in termino_ids if pk}
+    if not termino_ids:
+        return
+    totales = dict(
+        Habilidad.objects.filter(termino_id__in=termino_ids, activar_para_que_se_vea_en_front=True)
+        .order_by().values('termino_id').annotate(total=Count('user_id', distinct=True))
+        .values_list('termino_id', 'total')
+    )
+    for termino in TerminoHabilidad.objects.filter(pk__in=termino_ids):
+        # save() refresca fecha_actualizacion: así el trie de otros procesos ve el cambio
+        termino.total_usuarios = totales.get(termino.pk, 0)
+        termino.save(update_fields=['total_usuarios', 'fecha_actualizacion'])
+
+
+# ==========================================
+# CONSULTA: intersección de listas de posteo
+# ==========================================
+def lista_de_posteo(termino_id, nivel_minimo=None):
+    """user_ids ordenados que tienen el término visible con nivel >= nivel_minimo."""
+    filas = Habilidad.objects.filter(termino_id=termino_id, activar_para_que_se_vea_en_front=True)
+    if nivel_minimo:
+        filas = filas.filter(nivel__in=niveles_desde(nivel_minimo))
+    return list(filas.order_by('user_id').values_list('user_id', flat=True).distinct())
+
+
+def intersectar(listas):
+    """Intersección de listas ordenadas, de la más corta a la más larga (avance en paralelo)."""
+    if not listas:
+        return []
+    listas = sorted(listas, key=len)
+    resultado = listas[0]
+    for lista in listas[1:]:
+        if not resultado:
+            break
+        comunes = []
+        i = j = 0
+        while i < len(resultado) and j < len(lista):
+            if resultado[i] == lista[j]:
+                comunes.append(resultado[i])
+                i += 1
+                j += 1
+            elif resultado[i] < lista[j]:
+                i += 1
+            else:
+                j += 1
+        resultado = comunes
+    return resultado
+
+
+def usuarios_con_habilidades(criterios):
+    """
+    criterios: [(nombre, nivel_minimo o None), ...]
+    Devuelve los user_ids con perfil activo que cumplen todos los criterios.
+    """
+    claves = {normalizar_habilidad(nombre): nivel for nombre, nivel in criterios}
+    terminos = dict(TerminoHabilidad.objects.filter(clave__in=claves).values_list('clave', 'pk'))
+    if not claves or len(terminos) < len(claves):
+        # Una habilidad que nadie tiene: la intersección es vacía
+        return []
+    # Una lista vacía basta para descartar el resto de consultas
+    listas = []
+    for clave, nivel in claves.items():
+        lista = lista_de_posteo(terminos[clave], nivel)
+        if not lista:
+            return []
+        listas.append(lista)
+    user_ids = intersectar(listas)
+    activos = set(DatosPersonales.objects.filter(
+        user_id__in=user_ids, perfil_activo=True
+    ).values_list('user_id', flat=True))
+    return [user_id for user_id in user_ids if user_id in activos]
+
+
+async def ausuarios_con_habilidades(criterios):
+    """Como usuarios_con_habilidades, pero con las listas de posteo leídas a la vez."""
+    claves = {normalizar_habilidad(nombre): nivel for nombre, nivel in criterios}
+    terminos = {
+        clave: pk async for clave, pk in TerminoHabilidad.objects.filter(clave__in=claves).values_list('clave', 'pk')
+    }
+    if not claves or len(terminos) < len(claves):
+        return []
+    listas = await asyncio.gather(*[
+        alista_de_posteo(terminos[clave], nivel) for clave, nivel in claves.items()
+    ])
+    if not all(listas):
+        return []
+    user_ids = intersectar(listas)
+    activos = {
+        user_id async for user_id in DatosPersonales.objects.filter(
+            user_id__in=user_ids, perfil_activo=True
+        ).values_list('user_id', flat=True)
+    }
+    return [user_id for user_id in user_ids if user_id in activos]
+
+
+alista_de_posteo = en_pool(lista_de_posteo)
+
+
+# ==========================================
+# AUTOCOMPLETADO: trie en memoria (uno por proceso)
+# ==========================================
+class NodoTrie:
+    __slots__ = ('hijos', 'termino')
+
+    def __init__(self):
+        self.hijos = {}
+        self.termino = None  # (nombre, total_usuarios) si aquí termina una clave
+
+
+# fecha_actualizacion se fija al guardar, no al confirmar: una transacción
+# que confirma después de la última sincronización puede traer una fecha
+# anterior a la marca. Se relee este margen hacia atrás (aplicar un término
+# dos veces no cambia nada).
+MARGEN_SINCRONIZACION = timedelta(minutes=5)
+
+
+class TrieHabilidades:
+    """
+    Prefijos del vocabulario. Se carga una vez y luego solo aplica los términos
+    modificados desde la última sincronización (fecha_actualizacion), menos
+    MARGEN_SINCRONIZACION.
+    """
+
+    def __init__(self):
+        self.raiz = NodoTrie()
+        self.marca = None
+        self._lock = threading.Lock()
+
+    def _poner(self, clave, nombre, total):
+        nodo = self.raiz
+        for letra in clave:
+            nodo = nodo.hijos.setdefault(letra, NodoTrie())
+        nodo.termino = (nombre, total) if total else None
+
+    def sincronizar(self):
+        cambios = TerminoHabilidad.objects.order_by('fecha_actualizacion')
+        if self.marca is not None:
+            cambios = cambios.filter(fecha_actualizacion__gte=self.marca - MARGEN_SINCRONIZACION)
+        with self._lock:
+            for clave, nombre, total, fecha in cambios.values_list(
+                    'clave', 'nombre', 'total_usuarios', 'fecha_actualizacion').iterator():
+                self._poner(clave, nombre, total)
+                self.marca = max(fecha, self.marca or fecha)
+
+    def sugerir(self, prefijo, limite=10):
+        """Los términos más usados que empiezan con el prefijo (normalizado)."""
+        self.sincronizar()
+        nodo = self.raiz
+        for letra in normalizar_habilidad(prefijo):
+            nodo = nodo.hijos.get(letra)
+            if nodo is None:
+                return []
+        encontrados = []
+        pendientes = [nodo]
+        while pendientes:
+            actual = pendientes.pop()
+            if actual.termino:
+                encontrados.append(actual.termino)
+            pendientes.extend(actual.hijos.values())
+        return heapq.nsmallest(limite, encontrados, key=lambda termino: (-termino[1], termino[0]))
+
+
+trie_habilidades = TrieHabilidades()
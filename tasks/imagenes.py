@@ -0,0 +1,122 @@
+import os
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from .metricas import medir
+
+# ==========================================
+# DERIVADOS DE IMÁGENES SUBIDAS
+# ==========================================
+# Cada foto se publica en varios anchos, en WebP y en JPEG, sin metadatos EXIF.
+# Estructura: <carpeta>/derivados/<nombre>_<ancho>.<formato>
+# Los anchos generados se guardan en el modelo: el template arma el srcset
+# sin tocar el almacenamiento. Los derivados usan el storage por defecto:
+# su nombre debe poder calcularse a partir del de la foto.
+
+# Anchos (px) pensados para 1x y 2x del tamaño en pantalla
+ANCHOS_PERFIL = (250, 500)
+ANCHOS_GARAGE = (320, 640, 960)
+
+# extensión -> (formato de Pillow, opciones de guardado)
+FORMATOS = {
+    # method=4 (el de Pillow): 6 comprime apenas más y tarda varias veces lo mismo
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def ruta_derivado(nombre, ancho, extension):
+    carpeta, archivo = os.path.split(nombre)
+    base = os.path.splitext(archivo)[0]
+    return os.path.join(carpeta, 'derivados', f'{base}_{ancho}.{extension}').replace(os.sep, '/')
+
+
+def rutas_derivados(nombre, anchos):
+    return [ruta_derivado(nombre, ancho, extension) for ancho in anchos for extension in FORMATOS]
+
+
+def _abrir_normalizada(archivo, ancho_maximo):
+    with archivo.storage.open(archivo.name, 'rb') as contenido:
+        imagen = Image.open(contenido)
+        # En JPEG el decodificador puede escalar 1/2, 1/4 u 1/8 al leer: mucho más rápido
+        imagen.draft('RGB', (ancho_maximo, ancho_maximo))
+        imagen.load()
+    # Aplica la rotación de la cámara antes de perder el EXIF
+    imagen = ImageOps.exif_transpose(imagen)
+    if imagen.mode in ('RGBA', 'LA') or 'transparency' in imagen.info:
+        # JPEG no admite transparencia: fondo blanco
+        con_alfa = imagen.convert('RGBA')
+        fondo = Image.new('RGB', con_alfa.size, (255, 255, 255))
+        fondo.paste(con_alfa, mask=con_alfa.getchannel('A'))
+        imagen = fondo
+    elif imagen.mode != 'RGB':
+        imagen = imagen.convert('RGB')
+    # Sin EXIF, ICC ni comentarios en los derivados
+    imagen.info = {}
+    return imagen
+
+
+def generar_derivados(archivo, anchos):
+    """
+    Genera los derivados de un ImageField ya guardado.
+    Nunca amplía: si la foto es más angosta, se usa su ancho original.
+    Devuelve la lista ordenada de anchos generados.
+    """
+    imagen = _abrir_normalizada(archivo, max(anchos))
+    storage = default_storage
+    generados = sorted({min(ancho, imagen.width) for ancho in anchos})
+    for ancho in generados:
+        if ancho == imagen.width:
+            redimensionada = imagen
+        else:
+            alto = max(1, round(imagen.height * ancho / imagen.width))
+            redimensionada = imagen.resize((ancho, alto), Image.Resampling.LANCZOS)
+        for extension, (formato, opciones) in FORMATOS.items():
+            buffer = BytesIO()
+            redimensionada.save(buffer, formato, **opciones)
+            ruta = ruta_derivado(archivo.name, ancho, extension)
+            # Mismo nombre siempre: el storage no debe agregarle sufijos
+            if storage.exists(ruta):
+                storage.delete(ruta)
+            storage.save(ruta, ContentFile(buffer.getvalue()))
+    return generados
+
+
+def eliminar_derivados(archivo, anchos):
+    for ruta in rutas_derivados(archivo.name, anchos):
+        if default_storage.exists(ruta):
+            default_storage.delete(ruta)
+
+
+class Derivados:
+    """Acceso a los derivados de una foto desde los templates (src, srcset)."""
+
+    def __init__(self, archivo, anchos):
+        self.archivo = archivo
+        self.anchos = sorted(anchos or []) if archivo else []
+
+    def __bool__(self):
+        return bool(self.archivo)
+
+    def url(self, ancho, extension='jpg'):
+        with medir('media'):
+            return default_storage.url(ruta_derivado(self.archivo.name, ancho, extension))
+
+    def srcset(self, extension):
+        return ', '.join(f'{self.url(ancho, extension)} {ancho}w' for ancho in self.anchos)
+
+    @property
+    def srcset_webp(self):
+        return self.srcset('webp')
+
+    @property
+    def srcset_jpg(self):
+        return self.srcset('jpg')
+
+    @property
+    def src(self):
+        """JPEG más chico como respaldo; el original si aún no hay derivados."""
+        if self.anchos:
+            return self.url(self.anchos[0])
+        return self.archivo.url
@@ -0,0 +1,262 @@
+import csv
+import json
+import time
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+from .busqueda import actualizar_documentos
+from .contadores import reconciliar
+from .habilidades import normalizar_habilidad, obtener_termino, recontar_terminos
+from .models import DatosPersonales, Habilidad, VersionPerfil
+from .versiones import SECCION_POR_MODELO
+
+# ==========================================
+# IMPORTACIÓN MASIVA DE CVs (JSON Lines o CSV)
+# ==========================================
+# Un registro = un usuario:
+#   {"username": "ana", "email": "...", "password": "...",
+#    "datos_personales": {"nombres": "Ana", "numero_cedula": "...", ...},
+#    "experiencias": [{...}], "cursos": [{...}], "habilidades": [{...}], ...}
+# En CSV los campos de datos personales van como columnas y cada sección
+# como una columna con la lista en JSON. Los archivos (fotos, certificados)
+# no se importan.
+
+CAMPOS_USUARIO = ('username', 'email', 'first_name', 'last_name')
+
+# Sección del registro -> tabla (mismos nombres que el contexto del CV)
+MODELO_POR_SECCION = {
+    seccion: modelo for modelo, seccion in SECCION_POR_MODELO.items() if modelo is not DatosPersonales
+}
+
+
+def campos_importables(modelo):
+    """Campos que puede traer el archivo: editables, sin la FK al usuario ni archivos."""
+    return {
+        campo.name for campo in modelo._meta.concrete_fields
+        if campo.editable and not campo.primary_key and campo.name != 'user'
+        and not isinstance(campo, models.FileField)
+    }
+
+
+CAMPOS_POR_MODELO = {
+    modelo: campos_importables(modelo) for modelo in (DatosPersonales, *MODELO_POR_SECCION.values())
+}
+# Lo que clean_fields() no debe validar (se asigna al insertar)
+EXCLUIR_POR_MODELO = {
+    modelo: [campo.name for campo in modelo._meta.fields if campo.name not in campos]
+    for modelo, campos in CAMPOS_POR_MODELO.items()
+}
+
+
+# ==========================================
+# LECTURA EN STREAMING: (línea, registro o None, error o None)
+# ==========================================
+def leer_jsonl(archivo):
+    for numero, linea in enumerate(archivo, 1):
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except ValueError as error:
+            yield numero, None, f'JSON inválido: {error}'
+            continue
+        if not isinstance(registro, dict):
+            yield numero, None, 'Cada línea debe ser un objeto JSON'
+            continue
+        yield numero, registro, None
+
+
+def leer_csv(archivo):
+    lector = csv.DictReader(archivo)
+    for fila in lector:
+        registro = {'datos_personales': {}}
+        try:
+            for columna, valor in fila.items():
+                if columna is None or valor in (None, ''):
+                    continue
+                if columna in MODELO_POR_SECCION:
+                    registro[columna] = json.loads(valor)
+                elif columna in CAMPOS_USUARIO or columna == 'password':
+                    registro[columna] = valor
+                else:
+                    registro['datos_personales'][columna] = valor
+        except ValueError as error:
+            yield lector.line_num, None, f'Columna {columna}: JSON inválido ({error})'
+            continue
+        yield lector.line_num, registro, None
+
+
+LECTORES = {'jsonl': leer_jsonl, 'csv': leer_csv}
+
+
+# ==========================================
+# VALIDACIÓN POR LOTES
+# ==========================================
+class RegistroCV:
+    """Instancias sin guardar de un registro ya validado."""
+
+    def __init__(self, linea, usuario, datos, secciones):
+        self.linea = linea
+        self.usuario = usuario
+        self.datos = datos
+        self.secciones = secciones  # {modelo: [instancias]}
+
+
+def _construir(modelo, valores, prefijo, errores):
+    if not isinstance(valores, dict):
+        errores[prefijo] = ['Se esperaba un objeto']
+        return None
+    desconocidos = set(valores) - CAMPOS_POR_MODELO[modelo]
+    if desconocidos:
+        errores[prefijo] = [f'Campos desconocidos: {", ".join(sorted(desconocidos))}']
+        return None
+    instancia = modelo(**valores)
+    try:
+        instancia.clean_fields(exclude=EXCLUIR_POR_MODELO[modelo])
+        # clean() compara fechas y números: solo con los valores ya convertidos
+        instancia.clean()
+    except ValidationError as error:
+        for campo, mensajes in error.message_dict.items():
+            errores[f'{prefijo}.{campo}'] = mensajes
+    return instancia
+
+
+def validar_registro(linea, registro):
+    """Devuelve (RegistroCV o None, {campo: [mensajes]}) con todos los errores del registro."""
+    errores = {}
+    desconocidas = set(registro) - {*CAMPOS_USUARIO, 'password', 'datos_personales', *MODELO_POR_SECCION}
+    if desconocidas:
+        errores['registro'] = [f'Claves desconocidas: {", ".join(sorted(desconocidas))}']
+
+    usuario = User(**{campo: registro.get(campo) or '' for campo in CAMPOS_USUARIO})
+    try:
+        usuario.clean_fields(exclude=['password', 'last_login', 'date_joined'])
+    except ValidationError as error:
+        errores.update(error.message_dict)
+
+    datos = _construir(DatosPersonales, registro.get('datos_personales') or {}, 'datos_personales', errores)
+    secciones = {}
+    for seccion, modelo in MODELO_POR_SECCION.items():
+        filas = registro.get(seccion) or []
+        if not isinstance(filas, list):
+            errores[seccion] = ['Se esperaba una lista']
+            continue
+        secciones[modelo] = [
+            _construir(modelo, valores, f'{seccion}[{indice}]', errores) for indice, valores in enumerate(filas)
+        ]
+    if errores:
+        return None, errores
+    # Sin contraseña: cuenta sin acceso hasta que el usuario la restablezca
+    usuario.password = make_password(registro.get('password') or None)
+    return RegistroCV(linea, usuario, datos, secciones), {}
+
+
+class ImportadorCV:
+    """
+    Valida e inserta por lotes. Las reglas de unicidad (username, cédula) se
+    comprueban con una consulta por lote y contra lo ya leído del archivo.
+    """
+
+    def __init__(self, tamano_lote=500, dry_run=False):
+        self.tamano_lote = tamano_lote
+        self.dry_run = dry_run
+        self.usernames = set()
+        self.cedulas = set()
+        self.terminos = {}
+        self.usuarios_importados = 0
+        self.filas_insertadas = 0
+        self.errores = 0
+        self.inicio = time.monotonic()
+
+    @property
+    def filas_por_segundo(self):
+        return self.filas_insertadas / max(time.monotonic() - self.inicio, 1e-9)
+
+    def procesar_lote(self, lote):
+        """lote: [(línea, registro, error de lectura)]. Devuelve los errores [(línea, username, errores)]."""
+        errores = []
+        validos = []
+        for linea, registro, error in lote:
+            if error:
+                errores.append((linea, None, {'registro': [error]}))
+                continue
+            cv, errores_registro = validar_registro(linea, registro)
+            if cv is None:
+                errores.append((linea, registro.get('username'), errores_registro))
+            else:
+                validos.append(cv)
+
+        validos = self._filtrar_duplicados(validos, errores)
+        self.errores += len(errores)
+        if validos and not self.dry_run:
+            self._insertar(validos)
+        self.usuarios_importados += len(validos)
+        return errores
+
+    def _filtrar_duplicados(self, validos, errores):
+        usernames = [cv.usuario.username for cv in validos]
+        cedulas = [cv.datos.numero_cedula for cv in validos]
+        usernames_db = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        cedulas_db = set(DatosPersonales.objects.filter(
+            numero_cedula__in=cedulas).values_list('numero_cedula', flat=True))
+        unicos = []
+        for cv in validos:
+            duplicados = {}
+            if cv.usuario.username in usernames_db or cv.usuario.username in self.usernames:
+                duplicados['username'] = ['Ya existe un usuario con este nombre.']
+            if cv.datos.numero_cedula in cedulas_db or cv.datos.numero_cedula in self.cedulas:
+                duplicados['datos_personales.numero_cedula'] = ['Ya existe un perfil con esta cédula.']
+            if duplicados:
+                errores.append((cv.linea, cv.usuario.username, duplicados))
+                continue
+            self.usernames.add(cv.usuario.username)
+            self.cedulas.add(cv.datos.numero_cedula)
+            unicos.append(cv)
+        return unicos
+
+    def _termino(self, nombre):
+        clave = normalizar_habilidad(nombre)
+        if clave not in self.terminos:
+            self.terminos[clave] = obtener_termino(nombre)
+        return self.terminos[clave]
+
+    def _insertar(self, validos):
+        with transaction.atomic():
+            usuarios = User.objects.bulk_create([cv.usuario for cv in validos], batch_size=self.tamano_lote)
+            if any(usuario.pk is None for usuario in usuarios):
+                # Motores sin RETURNING en INSERT masivo
+                pks = dict(User.objects.filter(
+                    username__in=[usuario.username for usuario in usuarios]).values_list('username', 'pk'))
+                for usuario in usuarios:
+                    usuario.pk = pks[usuario.username]
+
+            filas = {DatosPersonales: []}
+            for cv in validos:
+                cv.datos.user_id = cv.usuario.pk
+                filas[DatosPersonales].append(cv.datos)
+                for modelo, instancias in cv.secciones.items():
+                    for instancia in instancias:
+                        instancia.user_id = cv.usuario.pk
+                        if modelo is Habilidad:
+                            instancia.termino = self._termino(instancia.nombre)
+                    filas.setdefault(modelo, []).extend(instancias)
+            for modelo, instancias in filas.items():
+                modelo.objects.bulk_create(instancias, batch_size=self.tamano_lote)
+
+            # bulk_create no dispara señales: lo que ellas mantienen se hace aquí, una vez por lote
+            user_ids = [usuario.pk for usuario in usuarios]
+            reconciliar(user_ids)
+            # Usuarios recién creados en esta transacción: no pueden tener versión previa
+            ahora = timezone.now()
+            VersionPerfil.objects.bulk_create(
+                [VersionPerfil(user_id=user_id, version=1, fecha_actualizacion=ahora) for user_id in user_ids],
+                batch_size=self.tamano_lote
+            )
+            recontar_terminos({
+                instancia.termino_id for instancia in filas.get(Habilidad, [])
+            })
+            actualizar_documentos(user_ids)
+
+        self.filas_insertadas += len(usuarios) + sum(len(instancias) for instancias in filas.values())
@@ -0,0 +1,84 @@
+import os
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from tasks.almacenamiento import almacenamiento_media, nombre_por_contenido, sha256_archivo
+from tasks.imagenes import rutas_derivados
+from tasks.models import BlobMedia
+from tasks.signals import FOTOS_POR_MODELO, MODELOS_CON_ARCHIVOS
+from tasks.versiones import actualizar_y_versionar
+
+
+class Command(BaseCommand):
+    help = 'Renombra los archivos subidos antes de la deduplicación a su SHA-256 y une los duplicados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo informar cuánto espacio se recuperaría')
+
+    def handle(self, *args, **options):
+        storage = almacenamiento_media()
+        migrados = duplicados = faltantes = liberados = 0
+        # En dry-run nada se mueve: hay que recordar qué hashes ya aparecieron
+        vistos = set()
+
+        for modelo, campos in MODELOS_CON_ARCHIVOS.items():
+            for campo in campos:
+                filas = modelo.objects.exclude(Q(**{f'{campo}__isnull': True}) | Q(**{campo: ''}))
+                # Los nombres ya registrados en el índice están deduplicados
+                filas = filas.exclude(**{f'{campo}__in': BlobMedia.objects.values('nombre')})
+                nombres = filas.order_by(campo).values_list(campo, flat=True).distinct()
+
+                for anterior in nombres.iterator(chunk_size=500):
+                    ruta = storage.path(anterior)
+                    if not os.path.isfile(ruta):
+                        faltantes += 1
+                        self.stdout.write(self.style.WARNING(f'{modelo.__name__}.{campo}: falta {anterior}'))
+                        continue
+                    tamano = os.path.getsize(ruta)
+                    sha256 = sha256_archivo(ruta)
+                    nuevo = nombre_por_contenido(anterior, sha256)
+                    # Ya con su hash pero sin fila en BlobMedia: solo falta registrarlo
+                    if nuevo != anterior and (nuevo in vistos or os.path.exists(storage.path(nuevo))):
+                        duplicados += 1
+                        liberados += tamano
+                    migrados += 1
+                    if options['dry_run']:
+                        vistos.add(nuevo)
+                        continue
+                    self._migrar(storage, modelo, campo, anterior, nuevo, ruta, sha256, tamano)
+
+        prefijo = 'Se liberarían' if options['dry_run'] else 'Liberados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{migrados} archivos renombrados por contenido, {duplicados} duplicados; '
+            f'{prefijo} {liberados / (1024 * 1024):.1f} MB. {faltantes} referencias a archivos inexistentes'
+        ))
+
+    def _migrar(self, storage, modelo, campo, anterior, nuevo, ruta, sha256, tamano):
+        filas = modelo.objects.filter(**{campo: anterior})
+        if anterior == nuevo:
+            # El archivo ya es el del hash: borrarlo o "renombrarlo" perdería la única copia
+            storage._registrar(nuevo, ruta, sha256, tamano, filas.count())
+            return
+        with transaction.atomic():
+            referencias = filas.count()
+            anchos = set()
+            if FOTOS_POR_MODELO.get(modelo, (None,))[0] == campo:
+                for lista in filas.values_list(f'{campo}_anchos', flat=True):
+                    anchos.update(lista or [])
+            # Sube la versión: las URLs cambian en los fragmentos en caché
+            actualizar_y_versionar(filas, **{campo: nuevo})
+            storage._registrar(nuevo, ruta, sha256, tamano, referencias)
+            if os.path.exists(ruta):
+                # El contenido ya estaba guardado con su hash: sobra la copia
+                os.remove(ruta)
+
+        # Los derivados se llaman como la foto: se renombran igual
+        for viejo, actual in zip(rutas_derivados(anterior, sorted(anchos)), rutas_derivados(nuevo, sorted(anchos))):
+            viejo, actual = storage.path(viejo), storage.path(actual)
+            if not os.path.exists(viejo):
+                continue
+            if os.path.exists(actual):
+                os.remove(viejo)
+            else:
+                os.replace(viejo, actual)
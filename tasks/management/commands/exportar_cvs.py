@@ -0,0 +1,62 @@
+import os
+import time
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand
+from django.db.models import F, OuterRef, Subquery
+from django.test import RequestFactory
+from django.urls import reverse
+from tasks.exportacion import (
+    escribir_exportacion, eliminar_exportacion, ruta_exportacion, usuarios_exportados
+)
+from tasks.models import VersionPerfil
+from tasks.views import renderizar_cv_publico
+
+
+class Command(BaseCommand):
+    help = 'Pre-renderiza el CV público de cada perfil activo (con variantes gzip y brotli)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Solo regenerar los perfiles cuya versión (o edad) cambió desde la última exportación')
+        parser.add_argument('--usuario', help='Exportar solo este username')
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        usuarios = User.objects.filter(datos_personales__perfil_activo=True).annotate(
+            version_cv=Subquery(VersionPerfil.objects.filter(user=OuterRef('pk')).values('version')[:1]),
+            nacimiento=F('datos_personales__fecha_nacimiento'),
+        ).only('pk', 'username')
+        if options['usuario']:
+            usuarios = usuarios.filter(username=options['usuario'])
+
+        factory = RequestFactory()
+        activos = set()
+        generados = omitidos = total_bytes = 0
+        for usuario in usuarios.iterator():
+            activos.add(usuario.pk)
+            version = usuario.version_cv or 0
+            if options['incremental'] and os.path.isfile(ruta_exportacion(usuario.pk, version, usuario.nacimiento)):
+                omitidos += 1
+                continue
+
+            # Se renderiza como lo vería un visitante anónimo
+            request = factory.get(reverse('cv_publico', args=[usuario.username]))
+            request.user = AnonymousUser()
+            response = renderizar_cv_publico(request, usuario.username, usuario.pk)
+            total_bytes += escribir_exportacion(
+                usuario.pk, version, usuario.nacimiento, response.content.decode('utf-8')
+            )
+            generados += 1
+
+        # Perfiles desactivados o eliminados desde la última exportación
+        eliminados = 0
+        if not options['usuario']:
+            for user_id in usuarios_exportados() - activos:
+                eliminar_exportacion(user_id)
+                eliminados += 1
+
+        duracion = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{generados} CVs exportados ({total_bytes / 1024:.0f} KB), '
+            f'{omitidos} al día, {eliminados} eliminados en {duracion:.1f}s'
+        ))
@@ -0,0 +1,60 @@
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tasks.importacion import ImportadorCV
+from tasks.models import DatosPersonales, VentaGarage
+from tasks.sinteticos import FotosSinteticas, GeneradorCV
+
+
+class Command(BaseCommand):
+    help = 'Genera N usuarios sintéticos con CV completo y fotos (inserciones masivas) para pruebas de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usuarios', type=int, help='Cantidad de usuarios a generar')
+        parser.add_argument('--prefijo', default='sintetico',
+                            help='Prefijo del username; la numeración sigue desde los ya existentes')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=500)
+        parser.add_argument('--password', default='benchmark',
+                            help='Clave común de los usuarios generados (la usa el comando benchmark)')
+        parser.add_argument('--fotos', type=int, default=12,
+                            help='Fotos distintas por tipo (perfil y garage); 0 para no generar fotos')
+
+    def handle(self, *args, **options):
+        if options['usuarios'] < 1 or options['lote'] < 1:
+            raise CommandError('usuarios y --lote deben ser mayores que cero')
+        prefijo = options['prefijo']
+        inicio = User.objects.filter(username__startswith=prefijo).count()
+        # La semilla se combina con el inicio: una segunda tanda no repite la primera
+        generador = GeneradorCV(semilla=options['semilla'] + inicio, prefijo=prefijo)
+        fotos = FotosSinteticas(generador.rng, options['fotos']) if options['fotos'] else None
+        importador = ImportadorCV(tamano_lote=options['lote'])
+        # PBKDF2 una sola vez: todos comparten el mismo hash
+        clave = make_password(options['password'])
+
+        con_foto = 0
+        for desde in range(inicio, inicio + options['usuarios'], options['lote']):
+            hasta = min(desde + options['lote'], inicio + options['usuarios'])
+            lote = [(indice, generador.registro(indice), None) for indice in range(desde, hasta)]
+            errores = importador.procesar_lote(lote)
+            for linea, username, detalle in errores:
+                self.stderr.write(f'{username}: {detalle}')
+
+            usernames = [registro['username'] for _, registro, _ in lote]
+            User.objects.filter(username__in=usernames).update(password=clave)
+            if fotos:
+                con_foto += fotos.asignar(DatosPersonales, DatosPersonales.objects.filter(
+                    user__username__in=usernames).values_list('pk', flat=True))
+                con_foto += fotos.asignar(VentaGarage, VentaGarage.objects.filter(
+                    user__username__in=usernames).values_list('pk', flat=True))
+            self.stdout.write(
+                f'  {importador.usuarios_importados} usuarios, {importador.filas_insertadas} filas '
+                f'({importador.filas_por_segundo:.0f} filas/s)'
+            )
+        if fotos:
+            fotos.liberar_sin_usar()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{importador.usuarios_importados} usuarios sintéticos ({prefijo}{inicio:06d} en adelante), '
+            f'{importador.filas_insertadas} filas y {con_foto} fotos asignadas; {importador.errores} rechazados'
+        ))
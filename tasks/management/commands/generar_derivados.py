@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from tasks.signals import FOTOS_POR_MODELO, regenerar_derivados
+
+
+class Command(BaseCommand):
+    help = 'Genera los derivados WebP/JPEG de las fotos ya subidas (media/perfiles/ y media/garage/)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forzar', action='store_true',
+                            help='Regenerar también las fotos que ya tienen derivados')
+        parser.add_argument('--usuario', help='Procesar solo las fotos de este username')
+
+    def handle(self, *args, **options):
+        total = sin_derivados = 0
+        for modelo, (campo, anchos) in FOTOS_POR_MODELO.items():
+            filas = modelo.objects.exclude(Q(**{f'{campo}__isnull': True}) | Q(**{campo: ''})).order_by('pk')
+            if not options['forzar']:
+                filas = filas.filter(**{f'{campo}_anchos': []})
+            if options['usuario']:
+                filas = filas.filter(user__username=options['usuario'])
+
+            for fila in filas.iterator(chunk_size=100):
+                if regenerar_derivados(fila):
+                    total += 1
+                else:
+                    sin_derivados += 1
+                    self.stdout.write(self.style.WARNING(
+                        f'{modelo.__name__} {fila.pk}: no se pudo procesar {getattr(fila, campo).name}'
+                    ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} fotos procesadas, {sin_derivados} con errores'
+        ))
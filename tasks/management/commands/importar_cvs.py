@@ -0,0 +1,66 @@
+import json
+import sys
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from tasks.importacion import LECTORES, ImportadorCV
+
+
+class Command(BaseCommand):
+    help = 'Importa CVs desde JSON Lines o CSV (un usuario por registro) con inserciones masivas por lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo, o - para leer de la entrada estándar')
+        parser.add_argument('--formato', choices=sorted(LECTORES),
+                            help='jsonl o csv (por defecto, según la extensión)')
+        parser.add_argument('--lote', type=int, default=500,
+                            help='Registros validados e insertados por transacción')
+        parser.add_argument('--errores',
+                            help='Escribir los registros rechazados en este archivo (JSON Lines)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo validar, sin insertar nada')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or ('csv' if options['archivo'].lower().endswith('.csv') else 'jsonl')
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+        try:
+            # utf-8-sig: los CSV exportados desde Excel traen BOM
+            archivo = sys.stdin if options['archivo'] == '-' else open(
+                options['archivo'], encoding='utf-8-sig', newline='')
+        except OSError as error:
+            raise CommandError(f'No se pudo abrir el archivo: {error}')
+
+        self.verbosity = options['verbosity']
+        importador = ImportadorCV(tamano_lote=options['lote'], dry_run=options['dry_run'])
+        salida_errores = open(options['errores'], 'w', encoding='utf-8') if options['errores'] else None
+        try:
+            registros = LECTORES[formato](archivo)
+            while True:
+                lote = list(islice(registros, options['lote']))
+                if not lote:
+                    break
+                for linea, username, errores in importador.procesar_lote(lote):
+                    self._reportar_error(linea, username, errores, salida_errores)
+                self.stdout.write(
+                    f'  {importador.usuarios_importados} usuarios, {importador.errores} rechazados, '
+                    f'{importador.filas_por_segundo:.0f} filas/s'
+                )
+        finally:
+            if archivo is not sys.stdin:
+                archivo.close()
+            if salida_errores:
+                salida_errores.close()
+
+        accion = 'validados (dry-run)' if options['dry_run'] else 'importados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{importador.usuarios_importados} usuarios {accion}, {importador.filas_insertadas} filas insertadas '
+            f'({importador.filas_por_segundo:.0f} filas/s); {importador.errores} registros rechazados'
+        ))
+
+    def _reportar_error(self, linea, username, errores, salida):
+        if salida:
+            salida.write(json.dumps({'linea': linea, 'username': username, 'errores': errores},
+                                    ensure_ascii=False) + '\n')
+        if self.verbosity >= 2 or not salida:
+            detalle = '; '.join(f'{campo}: {" ".join(mensajes)}' for campo, mensajes in errores.items())
+            self.stderr.write(f'Línea {linea} ({username or "?"}): {detalle}')
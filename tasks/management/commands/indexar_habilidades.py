@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from tasks.habilidades import obtener_termino, recontar_terminos
+from tasks.models import Habilidad, TerminoHabilidad
+
+
+class Command(BaseCommand):
+    help = 'Asigna el término normalizado a las habilidades y recalcula el índice invertido'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forzar', action='store_true',
+                            help='Renormalizar también las habilidades que ya tienen término')
+
+    def handle(self, *args, **options):
+        filas = Habilidad.objects.all()
+        if not options['forzar']:
+            filas = filas.filter(termino__isnull=True)
+
+        asignadas = 0
+        # Un get_or_create por nombre distinto, no por fila; update() no dispara señales
+        for nombre in filas.order_by('nombre').values_list('nombre', flat=True).distinct().iterator():
+            termino = obtener_termino(nombre)
+            asignadas += filas.filter(nombre=nombre).update(termino=termino)
+
+        # Términos que ya nadie usa
+        TerminoHabilidad.objects.filter(habilidades__isnull=True).delete()
+        recontar_terminos(TerminoHabilidad.objects.values_list('pk', flat=True))
+        self.stdout.write(self.style.SUCCESS(
+            f'{asignadas} habilidades indexadas; {TerminoHabilidad.objects.count()} términos en el vocabulario'
+        ))
@@ -0,0 +1,174 @@
+import hashlib
+import os
+import shutil
+import time
+from array import array
+from bisect import bisect_left
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from tasks.almacenamiento import almacenamiento_media
+from tasks.imagenes import rutas_derivados
+from tasks.models import BlobMedia
+from tasks.signals import FOTOS_POR_MODELO, MODELOS_CON_ARCHIVOS
+
+# Huellas por bloque ordenado: limita el pico de memoria al ordenar
+TAMANO_BLOQUE = 1 << 17
+
+
+def _huella(nombre):
+    return int.from_bytes(hashlib.blake2b(nombre.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class RutasVivas:
+    """
+    Conjunto de rutas en uso guardado como huellas de 64 bits (8 bytes por ruta,
+    en bloques ordenados con búsqueda binaria). Una colisión solo puede hacer
+    que se conserve un archivo de más, nunca que se borre uno en uso.
+    """
+
+    def __init__(self):
+        self._bloques = []
+        self._pendientes = []
+        self.total = 0
+
+    def agregar(self, nombre):
+        self._pendientes.append(_huella(nombre))
+        self.total += 1
+        if len(self._pendientes) >= TAMANO_BLOQUE:
+            self._cerrar_bloque()
+
+    def _cerrar_bloque(self):
+        if self._pendientes:
+            self._bloques.append(array('Q', sorted(self._pendientes)))
+            self._pendientes = []
+
+    def __contains__(self, nombre):
+        self._cerrar_bloque()
+        huella = _huella(nombre)
+        for bloque in self._bloques:
+            posicion = bisect_left(bloque, huella)
+            if posicion < len(bloque) and bloque[posicion] == huella:
+                return True
+        return False
+
+
+def _recorrer(directorio):
+    """Archivos bajo directorio con os.scandir, sin cargar listados completos en memoria."""
+    pendientes = [directorio]
+    while pendientes:
+        try:
+            entradas = os.scandir(pendientes.pop())
+        except FileNotFoundError:
+            continue
+        with entradas:
+            for entrada in entradas:
+                if entrada.is_dir(follow_symlinks=False):
+                    pendientes.append(entrada.path)
+                elif entrada.is_file(follow_symlinks=False) and not entrada.name.startswith('.'):
+                    yield entrada
+
+
+class Command(BaseCommand):
+    help = 'Elimina (o pone en cuarentena) los archivos media que ninguna fila referencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo informar qué se eliminaría')
+        parser.add_argument('--gracia-horas', type=float, default=24,
+                            help='No tocar archivos modificados hace menos de estas horas')
+        parser.add_argument('--cuarentena',
+                            help='Mover los huérfanos a este directorio en lugar de borrarlos')
+        parser.add_argument('--lote', type=int, default=500,
+                            help='Huérfanos que se revalidan contra la base de datos por consulta')
+
+    def handle(self, *args, **options):
+        self.storage = almacenamiento_media()
+        self.opciones = options
+        inicio = time.monotonic()
+
+        vivas = self._rutas_vivas()
+        self.stdout.write(f'{vivas.total} rutas en uso')
+
+        limite = time.time() - options['gracia_horas'] * 3600
+        self.revisados = self.huerfanos = self.bytes_recuperados = 0
+        candidatos = []
+        for carpeta in self._carpetas():
+            for entrada in _recorrer(self.storage.path(carpeta)):
+                self.revisados += 1
+                nombre = os.path.relpath(entrada.path, self.storage.location).replace(os.sep, '/')
+                if nombre in vivas:
+                    continue
+                estado = entrada.stat(follow_symlinks=False)
+                if estado.st_mtime > limite:
+                    # Subida reciente: su fila puede no estar confirmada todavía
+                    continue
+                candidatos.append((nombre, entrada.path, estado.st_size))
+                if len(candidatos) >= options['lote']:
+                    self._procesar(candidatos)
+                    candidatos = []
+        self._procesar(candidatos)
+
+        accion = 'se liberarían' if options['dry_run'] else 'liberados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{self.revisados} archivos revisados, {self.huerfanos} huérfanos, '
+            f'{self.bytes_recuperados / (1024 * 1024):.1f} MB {accion} en {time.monotonic() - inicio:.1f}s'
+        ))
+
+    def _carpetas(self):
+        """Directorios de upload_to de todos los campos de archivo (con sus derivados)."""
+        carpetas = set()
+        for modelo, campos in MODELOS_CON_ARCHIVOS.items():
+            for campo in campos:
+                carpetas.add(modelo._meta.get_field(campo).upload_to.rstrip('/'))
+        return sorted(carpetas)
+
+    def _rutas_vivas(self):
+        vivas = RutasVivas()
+        for modelo, campos in MODELOS_CON_ARCHIVOS.items():
+            for campo in campos:
+                filas = modelo.objects.exclude(Q(**{f'{campo}__isnull': True}) | Q(**{campo: ''})).order_by()
+                if FOTOS_POR_MODELO.get(modelo, (None,))[0] == campo:
+                    for nombre, anchos in filas.values_list(campo, f'{campo}_anchos').iterator(chunk_size=2000):
+                        vivas.agregar(nombre)
+                        for derivado in rutas_derivados(nombre, anchos or []):
+                            vivas.agregar(derivado)
+                else:
+                    for nombre in filas.values_list(campo, flat=True).iterator(chunk_size=2000):
+                        vivas.agregar(nombre)
+        return vivas
+
+    def _referenciados(self, nombres):
+        """Revalida el lote: una fila pudo empezar a usar el archivo después del recorrido."""
+        en_uso = set()
+        for modelo, campos in MODELOS_CON_ARCHIVOS.items():
+            for campo in campos:
+                en_uso.update(modelo.objects.filter(**{f'{campo}__in': nombres}).values_list(campo, flat=True))
+        return en_uso
+
+    def _procesar(self, candidatos):
+        if not candidatos:
+            return
+        en_uso = self._referenciados([nombre for nombre, ruta, tamano in candidatos])
+        eliminados = []
+        for nombre, ruta, tamano in candidatos:
+            if nombre in en_uso:
+                continue
+            self.huerfanos += 1
+            self.bytes_recuperados += tamano
+            if self.opciones['verbosity'] >= 2:
+                self.stdout.write(f'  {nombre} ({tamano} bytes)')
+            if self.opciones['dry_run']:
+                continue
+            try:
+                if self.opciones['cuarentena']:
+                    destino = os.path.join(self.opciones['cuarentena'], nombre)
+                    os.makedirs(os.path.dirname(destino), exist_ok=True)
+                    shutil.move(ruta, destino)
+                else:
+                    os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            eliminados.append(nombre)
+        if eliminados:
+            # Blobs que el índice creía en uso: la fila que los referenciaba ya no existe
+            BlobMedia.objects.filter(nombre__in=eliminados).delete()
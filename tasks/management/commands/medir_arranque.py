@@ -0,0 +1,113 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Se ejecuta en un intérprete limpio: lo que mide es lo que paga cada worker al arrancar
+SONDA = r'''
+import json, os, sys, time
+
+def rss_kb():
+    try:
+        with open('/proc/self/status') as status:
+            for linea in status:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1])
+    except OSError:
+        pass
+    import resource
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo // 1024 if sys.platform == 'darwin' else maximo
+
+etapas = [('interprete', 0.0, rss_kb(), len(sys.modules))]
+
+def medir(nombre, funcion):
+    inicio = time.perf_counter()
+    funcion()
+    etapas.append((nombre, time.perf_counter() - inicio, rss_kb(), len(sys.modules)))
+
+medir('djangocrud.wsgi', lambda: __import__('djangocrud.wsgi'))
+
+def cargar_urls():
+    # Lo que Django difiere hasta la primera petición: urls.py, vistas, formularios
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+
+medir('urlconf', cargar_urls)
+if CON_PDF:
+    medir('motor_pdf', lambda: __import__('tasks.pdf', fromlist=['cargar_motor_pdf']).cargar_motor_pdf())
+
+print(json.dumps({
+    'etapas': etapas,
+    'pesados': sorted(m for m in PESADOS if m in sys.modules),
+}))
+'''
+
+# Módulos que no deberían estar cargados en un worker web recién arrancado
+PESADOS = ('xhtml2pdf', 'reportlab', 'html5lib', 'pypdf', 'pyhanko', 'arabic_reshaper', 'svglib')
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de importación y la memoria (RSS) de arrancar djangocrud.wsgi'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5,
+                            help='Intérpretes a lanzar; se informa la mediana')
+        parser.add_argument('--con-pdf', action='store_true',
+                            help='Medir también la carga del motor de PDFs (xhtml2pdf)')
+        parser.add_argument('--json', action='store_true', help='Salida en JSON')
+
+    def _ejecutar_sonda(self, con_pdf):
+        codigo = f'CON_PDF = {con_pdf!r}\nPESADOS = {PESADOS!r}\n' + SONDA
+        entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'djangocrud.settings')}
+        resultado = subprocess.run(
+            [sys.executable, '-c', codigo], cwd=settings.BASE_DIR, env=entorno,
+            capture_output=True, text=True
+        )
+        if resultado.returncode:
+            raise CommandError(f'La sonda falló:\n{resultado.stderr}')
+        return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        corridas = [self._ejecutar_sonda(options['con_pdf']) for _ in range(max(1, options['repeticiones']))]
+
+        resumen = []
+        for indice, (nombre, *_resto) in enumerate(corridas[0]['etapas']):
+            etapas = [corrida['etapas'][indice] for corrida in corridas]
+            resumen.append({
+                'etapa': nombre,
+                'segundos': round(statistics.median(etapa[1] for etapa in etapas), 4),
+                'rss_kb': int(statistics.median(etapa[2] for etapa in etapas)),
+                'modulos': etapas[0][3],
+            })
+        reporte = {
+            'repeticiones': len(corridas),
+            'etapas': resumen,
+            'total_segundos': round(sum(etapa['segundos'] for etapa in resumen), 4),
+            'rss_final_kb': resumen[-1]['rss_kb'],
+            'modulos_pesados_cargados': corridas[0]['pesados'],
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(reporte, indent=2))
+            return
+
+        self.stdout.write(f'{"Etapa":<18}{"Tiempo (ms)":>12}{"RSS (MB)":>10}{"Módulos":>9}')
+        for etapa in resumen:
+            self.stdout.write(
+                f'{etapa["etapa"]:<18}{etapa["segundos"] * 1000:>12.1f}'
+                f'{etapa["rss_kb"] / 1024:>10.1f}{etapa["modulos"]:>9}'
+            )
+        self.stdout.write(f'Mediana de {len(corridas)} arranques; total {reporte["total_segundos"] * 1000:.1f} ms')
+        if options['con_pdf']:
+            self.stdout.write('Motor de PDFs cargado a propósito (--con-pdf)')
+        elif reporte['modulos_pesados_cargados']:
+            self.stdout.write(self.style.WARNING(
+                'Módulos pesados cargados: ' + ', '.join(reporte['modulos_pesados_cargados'])
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('El motor de PDFs no se cargó al arrancar'))
@@ -0,0 +1,96 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from django.core.management.base import BaseCommand
+from tasks.cola_pdf import marcar_fallidos, reclamar_trabajo, renderizar_trabajo, reencolar_atascados, purgar_trabajos
+from tasks.models import TrabajoPDF
+from tasks.pool_pdf import contexto_procesos, inicializar_con_django
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de PDFs pendientes usando un pool de procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                            help='Número de procesos de renderizado')
+        parser.add_argument('--intervalo', type=float, default=2.0,
+                            help='Segundos de espera cuando la cola está vacía')
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Vaciar la cola y terminar en lugar de quedarse escuchando')
+        parser.add_argument('--atascados-minutos', type=int, default=10,
+                            help='Reencolar trabajos en "procesando" más antiguos que esto')
+        parser.add_argument('--purgar-dias', type=int, default=1,
+                            help='Eliminar trabajos terminados más antiguos que esto')
+        parser.add_argument('--mantenimiento-segundos', type=float, default=60,
+                            help='Cada cuánto reencolar atascados y purgar mientras corre')
+
+    def handle(self, *args, **options):
+        procesos = max(1, options['procesos'])
+        self.stdout.write(self.style.SUCCESS(f'Procesando PDFs con {procesos} procesos'))
+
+        en_curso = {}  # futuro -> pk del trabajo
+        pool = self._nuevo_pool(procesos)
+        proximo_mantenimiento = 0
+        try:
+            while True:
+                if time.monotonic() >= proximo_mantenimiento:
+                    self._mantenimiento(options)
+                    proximo_mantenimiento = time.monotonic() + options['mantenimiento_segundos']
+
+                libres = procesos - len(en_curso)
+                if libres > 0:
+                    pendientes = TrabajoPDF.objects.filter(estado='pendiente').values_list('pk', flat=True)[:libres]
+                    for pk in list(pendientes):
+                        if reclamar_trabajo(pk):
+                            en_curso[pool.submit(renderizar_trabajo, pk)] = pk
+
+                if not en_curso:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                terminados, _ = wait(en_curso, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+                rotos = []
+                for futuro in terminados:
+                    pk = en_curso.pop(futuro)
+                    try:
+                        estado = futuro.result()
+                    except BrokenProcessPool:
+                        rotos.append(pk)
+                    except Exception as e:
+                        # Queda en "procesando": el mantenimiento lo reencola
+                        self.stderr.write(self.style.ERROR(f'Fallo en el proceso de renderizado: {e}'))
+                    else:
+                        self.stdout.write(f'Trabajo terminado: {estado}')
+                if rotos:
+                    pool = self._reemplazar_pool(pool, rotos, en_curso, procesos)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _nuevo_pool(self, procesos):
+        # forkserver/spawn: un fork heredaría el socket de la conexión a la base del padre
+        return ProcessPoolExecutor(max_workers=procesos, mp_context=contexto_procesos(),
+                                   initializer=inicializar_con_django)
+
+    def _reemplazar_pool(self, pool, rotos, en_curso, procesos):
+        """
+        Un hijo murió (p. ej. sin memoria): todos los trabajos de ese pool
+        fallaron con él. Sin saber cuál lo causó, pasan a error (encolar_pdf
+        los reintenta más tarde) en lugar de volver a tumbar el pool nuevo.
+        """
+        pks = [*rotos, *en_curso.values()]
+        en_curso.clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+        fallidos = marcar_fallidos(pks, 'El proceso de renderizado terminó abruptamente')
+        self.stderr.write(self.style.ERROR(f'Pool de procesos roto: {fallidos} trabajos marcados con error'))
+        return self._nuevo_pool(procesos)
+
+    def _mantenimiento(self, options):
+        reencolados = reencolar_atascados(options['atascados_minutos'])
+        if reencolados:
+            self.stdout.write(self.style.WARNING(f'{reencolados} trabajos atascados reencolados'))
+        purgados = purgar_trabajos(options['purgar_dias'])
+        if purgados:
+            self.stdout.write(f'{purgados} trabajos antiguos eliminados')
@@ -0,0 +1,115 @@
+import json
+import os
+import platform
+import subprocess
+from contextlib import nullcontext
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from tasks.benchmark import ESCENARIOS, ServidorGunicorn, correr_escenario, rss_pico_kb
+from tasks.models import DatosPersonales
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Prueba de carga con clientes concurrentes contra gunicorn local: latencia p50/p95/p99, '
+            'peticiones por segundo y RSS pico, guardado en JSON para comparar entre commits')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escenarios', nargs='+', choices=sorted(ESCENARIOS), default=list(ESCENARIOS))
+        parser.add_argument('--clientes', type=int, default=8, help='Clientes concurrentes por escenario')
+        parser.add_argument('--duracion', type=float, default=20, help='Segundos por escenario')
+        parser.add_argument('--workers', type=int, default=2, help='Workers de gunicorn')
+        parser.add_argument('--hilos', type=int, default=1, help='Hilos por worker de gunicorn')
+        parser.add_argument('--asgi', action='store_true',
+                            help='Servir djangocrud.asgi con workers de uvicorn (vistas async)')
+        parser.add_argument('--url', help='Usar un servidor ya levantado en lugar de arrancar gunicorn')
+        parser.add_argument('--pid', type=int, help='Con --url: proceso principal del servidor, para medir su RSS')
+        parser.add_argument('--prefijo', default='sintetico', help='Usuarios de generar_datos_sinteticos')
+        parser.add_argument('--password', default='benchmark')
+        parser.add_argument('--usuarios', type=int, default=200, help='Usuarios distintos a visitar')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--salida', default='prueba_carga.json')
+        parser.add_argument('--comparar', help='JSON de una corrida anterior para mostrar las diferencias')
+
+    def handle(self, *args, **options):
+        usernames = list(
+            DatosPersonales.objects.filter(user__username__startswith=options['prefijo'], perfil_activo=True)
+            .order_by('user_id').values_list('user__username', flat=True)[:options['usuarios']]
+        )
+        if not usernames:
+            raise CommandError(
+                f'No hay usuarios "{options["prefijo"]}*": ejecuta antes generar_datos_sinteticos')
+        anterior = self._leer(options['comparar']) if options['comparar'] else None
+
+        servidor = nullcontext() if options['url'] else ServidorGunicorn(options['workers'], options['hilos'], options['asgi'])
+        try:
+            with servidor:
+                base = options['url'] or servidor.url
+                pid = options['pid'] if options['url'] else servidor.proceso.pid
+                escenarios = {}
+                for numero, nombre in enumerate(options['escenarios']):
+                    self.stdout.write(f'{nombre}: {options["clientes"]} clientes, {options["duracion"]:.0f}s...')
+                    escenarios[nombre] = correr_escenario(
+                        base, nombre, usernames, options['password'], options['clientes'],
+                        options['duracion'], semilla=options['semilla'] + numero
+                    )
+                    self._mostrar(nombre, escenarios[nombre], anterior)
+                # VmHWM: pico de cada proceso durante toda la corrida
+                picos = rss_pico_kb(pid) if pid else {}
+        except RuntimeError as error:
+            raise CommandError(str(error))
+
+        resultado = {
+            'commit': _commit(),
+            'fecha': timezone.now().isoformat(),
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'base_de_datos': connection.vendor,
+                'cpus': os.cpu_count(),
+            },
+            'configuracion': {
+                campo: options[campo] for campo in ('clientes', 'duracion', 'workers', 'hilos', 'usuarios', 'semilla')
+            } | {'servidor': options['url'] or ('gunicorn+uvicorn' if options['asgi'] else 'gunicorn')},
+            'escenarios': escenarios,
+            'rss_pico_mb': {
+                'total': round(sum(picos.values()) / 1024, 1),
+                'maximo_por_proceso': round(max(picos.values()) / 1024, 1),
+                'procesos': len(picos),
+            } if picos else None,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as salida:
+            json.dump(resultado, salida, indent=2, ensure_ascii=False)
+        if picos:
+            self.stdout.write(f'RSS pico: {resultado["rss_pico_mb"]["total"]} MB en {len(picos)} procesos')
+        self.stdout.write(self.style.SUCCESS(f'Resultados en {options["salida"]}'))
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'No se pudo leer {ruta}: {error}')
+
+    def _mostrar(self, nombre, medido, anterior):
+        linea = (f'  {medido["peticiones"]} peticiones, {medido["rps"]} req/s, '
+                 f'p50 {medido["p50_ms"]} ms, p95 {medido["p95_ms"]} ms, p99 {medido["p99_ms"]} ms, '
+                 f'{medido["errores"]} errores')
+        previo = (anterior or {}).get('escenarios', {}).get(nombre)
+        if previo and previo.get('rps') and previo.get('p95_ms') and medido['p95_ms']:
+            linea += (f' | vs {anterior.get("commit") or "anterior"}: '
+                      f'req/s {(medido["rps"] / previo["rps"] - 1) * 100:+.0f}%, '
+                      f'p95 {(medido["p95_ms"] / previo["p95_ms"] - 1) * 100:+.0f}%')
+        self.stdout.write(linea)
+        for ejemplo in medido['ejemplos_error']:
+            self.stderr.write(f'    {ejemplo}')
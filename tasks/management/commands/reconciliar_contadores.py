@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from tasks.contadores import reconciliar
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores del dashboard y corrige los desvíos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', help='Reconciliar solo este username')
+        parser.add_argument('--solo-reportar', action='store_true',
+                            help='Mostrar los desvíos sin corregirlos')
+        parser.add_argument('--lote', type=int, default=500,
+                            help='Usuarios por consulta')
+
+    def handle(self, *args, **options):
+        usuarios = User.objects.order_by('pk')
+        if options['usuario']:
+            usuarios = usuarios.filter(username=options['usuario'])
+        ids = list(usuarios.values_list('pk', flat=True))
+
+        corregir = not options['solo_reportar']
+        total_desvios = 0
+        for inicio in range(0, len(ids), options['lote']):
+            desvios = reconciliar(ids[inicio:inicio + options['lote']], corregir=corregir)
+            for user_id, campos in desvios.items():
+                detalle = ', '.join(f'{campo}: {guardado} -> {real}' for campo, (guardado, real) in campos.items())
+                self.stdout.write(self.style.WARNING(f'Usuario {user_id}: {detalle}'))
+            total_desvios += len(desvios)
+
+        accion = 'corregidos' if corregir else 'encontrados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(ids)} usuarios revisados, {total_desvios} con desvíos {accion}'
+        ))
@@ -0,0 +1,25 @@
+from itertools import islice
+from django.core.management.base import BaseCommand
+from tasks.busqueda import actualizar_documentos
+from tasks.models import DatosPersonales, DocumentoBusqueda
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los documentos de búsqueda de texto completo de todos los perfiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', help='Reindexar solo este username')
+
+    def handle(self, *args, **options):
+        perfiles = DatosPersonales.objects.order_by('user_id')
+        if options['usuario']:
+            perfiles = perfiles.filter(user__username=options['usuario'])
+        else:
+            # Documentos de perfiles que ya no existen
+            DocumentoBusqueda.objects.exclude(user__datos_personales__perfil_activo=True).delete()
+
+        indexados = 0
+        user_ids = perfiles.values_list('user_id', flat=True).iterator(chunk_size=500)
+        while lote := list(islice(user_ids, 500)):
+            indexados += len(actualizar_documentos(lote))
+        self.stdout.write(self.style.SUCCESS(f'{indexados} perfiles públicos indexados'))
@@ -0,0 +1,50 @@
+import gzip
+import sys
+import time
+from django.core.management.base import BaseCommand
+from tasks.volcado import FORMATOS, registros_cv, usuarios_a_volcar
+
+
+class Command(BaseCommand):
+    help = 'Vuelca todos los CVs (un documento por usuario con sus nueve tablas) en NDJSON o CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=sorted(FORMATOS), default='ndjson')
+        parser.add_argument('--salida', default='-',
+                            help='Archivo de destino (- = salida estándar; .gz = comprimido)')
+        parser.add_argument('--lote', type=int, default=500,
+                            help='Usuarios leídos y precargados por consulta')
+        parser.add_argument('--solo-activos', action='store_true',
+                            help='Solo perfiles públicos')
+        parser.add_argument('--metadatos', action='store_true',
+                            help='Agrega ids, fechas, estado de la cuenta y archivos (ya no se puede importar)')
+
+    def handle(self, *args, **options):
+        generar = FORMATOS[options['formato']][0]
+        salida = options['salida']
+        if salida == '-':
+            destino = sys.stdout
+        elif salida.endswith('.gz'):
+            destino = gzip.open(salida, 'wt', encoding='utf-8', newline='')
+        else:
+            destino = open(salida, 'w', encoding='utf-8', newline='')
+
+        inicio = time.monotonic()
+        usuarios = 0
+        try:
+            metadatos = options['metadatos']
+            registros = registros_cv(usuarios_a_volcar(options['solo_activos']), options['lote'], metadatos)
+            for linea in generar(registros, metadatos):
+                destino.write(linea)
+                usuarios += 1
+        finally:
+            if destino is not sys.stdout:
+                destino.close()
+
+        if options['formato'] == 'csv':
+            usuarios -= 1  # encabezado
+        transcurrido = max(time.monotonic() - inicio, 1e-9)
+        # Resumen por stderr: stdout puede ser el volcado
+        self.stderr.write(self.style.SUCCESS(
+            f'{usuarios} usuarios volcados en {transcurrido:.1f}s ({usuarios / transcurrido:.0f} usuarios/s)'
+        ))
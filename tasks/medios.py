@@ -0,0 +1,137 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+# ==========================================
+# SERVICIO DE ARCHIVOS MEDIA
+# ==========================================
+# Con MEDIA_ACCEL configurado el worker solo valida la ruta y el proxy
+# (nginx / Apache / lighttpd) envía el archivo. Sin proxy se transmite en
+# bloques con soporte de Range, ETag y Cache-Control.
+
+TAMANO_BLOQUE = 64 * 1024
+RANGO_BYTES = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _etag(estado):
+    # Cambia si el archivo se reescribe (tamaño o fecha), como en nginx
+    return f'"{estado.st_mtime_ns:x}-{estado.st_size:x}"'
+
+
+def _rango_solicitado(request, etag, ultima_modificacion, tamano):
+    """(inicio, fin) inclusivo del Range pedido; None si hay que enviar todo; False si es inválido."""
+    cabecera = request.META.get('HTTP_RANGE', '')
+    coincidencia = RANGO_BYTES.match(cabecera.strip())
+    if not coincidencia:
+        # Sin Range, o varios rangos: se responde el archivo completo (permitido por la RFC 9110)
+        return None
+
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != ultima_modificacion:
+        # El cliente tiene otra versión: que descargue todo de nuevo
+        return None
+
+    desde, hasta = coincidencia.groups()
+    if not desde and not hasta or not tamano:
+        # Un archivo vacío no tiene ningún byte que pedir: todo rango es 416
+        return False
+    if not desde:
+        # bytes=-N: los últimos N bytes
+        largo = int(hasta)
+        if not largo:
+            return False
+        return max(0, tamano - largo), tamano - 1
+    inicio = int(desde)
+    fin = min(int(hasta), tamano - 1) if hasta else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        return False
+    return inicio, fin
+
+
+def _leer_rango(ruta, inicio, largo):
+    with open(ruta, 'rb') as archivo:
+        archivo.seek(inicio)
+        while largo > 0:
+            bloque = archivo.read(min(TAMANO_BLOQUE, largo))
+            if not bloque:
+                break
+            largo -= len(bloque)
+            yield bloque
+
+
+def _respuesta_acelerada(ruta_relativa, ruta_absoluta):
+    response = HttpResponse()
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        # nginx: location interna que apunta a MEDIA_ROOT
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(ruta_relativa)
+    else:
+        # Apache mod_xsendfile / lighttpd
+        response['X-Sendfile'] = ruta_absoluta
+    # El proxy completa Content-Type, Content-Length, ETag y Range
+    del response['Content-Type']
+    return response
+
+
+@require_safe
+def servir_media(request, ruta):
+    # safe_join rechaza rutas fuera de MEDIA_ROOT (../) con un 400
+    ruta_absoluta = safe_join(settings.MEDIA_ROOT, ruta)
+    try:
+        estado = os.stat(ruta_absoluta)
+    except OSError:
+        raise Http404('Archivo no encontrado')
+    if not os.path.isfile(ruta_absoluta):
+        raise Http404('Archivo no encontrado')
+
+    if settings.MEDIA_ACCEL:
+        response = _respuesta_acelerada(ruta.replace(os.sep, '/'), ruta_absoluta)
+    else:
+        response = _respuesta_directa(request, ruta_absoluta, estado)
+    if response.status_code in (200, 206, 304):
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
+
+
+def _respuesta_directa(request, ruta_absoluta, estado):
+    etag = _etag(estado)
+    ultima_modificacion = int(estado.st_mtime)
+
+    # If-None-Match / If-Modified-Since -> 304 sin tocar el archivo
+    no_modificado = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+    if no_modificado is not None:
+        return no_modificado
+
+    tipo, codificacion = mimetypes.guess_type(ruta_absoluta)
+    tipo = tipo or 'application/octet-stream'
+    if codificacion:
+        # Un .gz subido se entrega tal cual, no como contenido comprimido de otro tipo
+        tipo = 'application/octet-stream'
+
+    rango = _rango_solicitado(request, etag, ultima_modificacion, estado.st_size)
+    if rango is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{estado.st_size}'
+    elif rango is None:
+        # FileResponse usa wsgi.file_wrapper (sendfile en gunicorn) si está disponible
+        response = FileResponse(open(ruta_absoluta, 'rb'), content_type=tipo)
+        response['Content-Length'] = estado.st_size
+    else:
+        inicio, fin = rango
+        largo = fin - inicio + 1
+        response = StreamingHttpResponse(
+            _leer_rango(ruta_absoluta, inicio, largo), status=206, content_type=tipo
+        )
+        response['Content-Range'] = f'bytes {inicio}-{fin}/{estado.st_size}'
+        response['Content-Length'] = largo
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(ultima_modificacion)
+    return response
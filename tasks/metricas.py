@@ -0,0 +1,241 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# ==========================================
+# FASES DE UNA PETICIÓN (Server-Timing)
+# ==========================================
+# TiemposPeticionMiddleware abre un FasesPeticion por petición; el código que
+# quiere reportar una fase usa medir('pdf') o anotar('pdf_bytes', n) sin
+# recibir la petición. Fuera de una petición (comandos, tests) no hace nada.
+# Las fases se solapan: el tiempo de una plantilla incluye las consultas que
+# evalúa.
+
+_fases_actuales = ContextVar('fases_peticion', default=None)
+
+
+class FasesPeticion:
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.duraciones = {}  # (métrica, etiqueta) -> segundos acumulados
+        self.datos = {}       # consultas, pdf_bytes, ...
+        self.total = None
+
+    def sumar(self, metrica, etiqueta, segundos):
+        clave = (metrica, etiqueta)
+        self.duraciones[clave] = self.duraciones.get(clave, 0.0) + segundos
+
+    def cerrar(self):
+        self.total = time.perf_counter() - self.inicio
+
+    @property
+    def total_ms(self):
+        return self.total * 1000
+
+    def _descripcion(self, metrica, etiqueta):
+        if metrica == 'db':
+            return f'{self.datos.get("consultas", 0)} consultas'
+        if metrica == 'pdf' and 'pdf_bytes' in self.datos:
+            return f'{self.datos["pdf_bytes"]} bytes'
+        return etiqueta
+
+    def server_timing(self):
+        """Valor del encabezado: db;dur=3.1;desc="5 consultas", plantilla;dur=...;desc="home.html", ..."""
+        partes = []
+        for (metrica, etiqueta), segundos in self.duraciones.items():
+            parte = f'{metrica};dur={segundos * 1000:.1f}'
+            descripcion = self._descripcion(metrica, etiqueta).replace('"', "'")
+            if descripcion:
+                parte += f';desc="{descripcion}"'
+            partes.append(parte)
+        partes.append(f'total;dur={self.total_ms:.1f}')
+        return ', '.join(partes)
+
+    def como_dict(self):
+        """Campos de la línea de log estructurada."""
+        resumen = {'total_ms': round(self.total_ms, 1), **self.datos}
+        for (metrica, etiqueta), segundos in self.duraciones.items():
+            if etiqueta and metrica == 'plantilla':
+                resumen.setdefault('plantillas_ms', {})[etiqueta] = round(segundos * 1000, 1)
+            else:
+                resumen[f'{metrica}_ms'] = round(segundos * 1000, 1)
+        return resumen
+
+
+@contextmanager
+def fases_peticion():
+    fases = FasesPeticion()
+    token = _fases_actuales.set(fases)
+    try:
+        yield fases
+    finally:
+        fases.cerrar()
+        _fases_actuales.reset(token)
+
+
+@contextmanager
+def medir(metrica, etiqueta=''):
+    """Suma la duración del bloque a la fase de la petición en curso (si la hay)."""
+    fases = _fases_actuales.get()
+    if fases is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        fases.sumar(metrica, etiqueta, time.perf_counter() - inicio)
+
+
+def anotar(dato, valor):
+    fases = _fases_actuales.get()
+    if fases is not None:
+        fases.datos[dato] = fases.datos.get(dato, 0) + valor
+
+
+# ==========================================
+# MEDICIÓN DE SQL (en cualquier hilo de la petición)
+# ==========================================
+# Cada conexión lleva una envoltura fija (se instala en connection_created)
+# que suma a los medidores activos del contexto. Los hilos de sync_to_async
+# heredan el contexto: también cuentan las consultas de las vistas async,
+# aunque corran en otro hilo y con otra conexión que el middleware.
+
+_medidores_sql = ContextVar('medidores_sql', default=())
+
+
+class MedidorSQL:
+    """Acumula cantidad, tiempo y SQL repetido (puede sumar desde varios hilos)."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        self.sentencias = Counter()
+        self._lock = threading.Lock()
+
+    def sumar(self, sql, segundos):
+        with self._lock:
+            self.consultas += 1
+            self.segundos += segundos
+            self.sentencias[sql] += 1
+
+
+def envoltura_sql(execute, sql, params, many, context):
+    medidores = _medidores_sql.get()
+    if not medidores:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracion = time.perf_counter() - inicio
+        for medidor in medidores:
+            medidor.sumar(sql, duracion)
+
+
+def instalar_envoltura_sql(connection, **kwargs):
+    """Receptor de connection_created (y para las conexiones ya abiertas al arrancar)."""
+    if envoltura_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, envoltura_sql)
+
+
+@contextmanager
+def medir_sql():
+    medidor = MedidorSQL()
+    token = _medidores_sql.set((*_medidores_sql.get(), medidor))
+    try:
+        yield medidor
+    finally:
+        _medidores_sql.reset(token)
+
+
+# ==========================================
+# HISTOGRAMAS DE LATENCIA POR URL (ventana deslizante)
+# ==========================================
+# Uno por nombre de URL de tasks/urls.py, en memoria de cada proceso: con
+# varios workers, cada uno publica los suyos y el recolector los suma.
+
+LIMITES_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class HistogramaDeslizante:
+    """Latencias de las últimas `ventanas` ventanas de `segundos_ventana` segundos."""
+
+    def __init__(self, ventanas=5, segundos_ventana=60):
+        self.segundos_ventana = segundos_ventana
+        self.ventanas = deque(maxlen=ventanas)  # [id de ventana, cubetas, suma en ms]
+
+    def _id_ventana(self, ahora):
+        return int(ahora // self.segundos_ventana)
+
+    def observar(self, milisegundos, ahora=None):
+        id_ventana = self._id_ventana(time.time() if ahora is None else ahora)
+        if not self.ventanas or self.ventanas[-1][0] != id_ventana:
+            self.ventanas.append([id_ventana, [0] * (len(LIMITES_MS) + 1), 0.0])
+        ventana = self.ventanas[-1]
+        ventana[1][bisect_left(LIMITES_MS, milisegundos)] += 1
+        ventana[2] += milisegundos
+
+    def resumen(self, ahora=None):
+        """(cubetas no acumuladas, suma en ms, cantidad) de las ventanas vigentes."""
+        primera = self._id_ventana(time.time() if ahora is None else ahora) - self.ventanas.maxlen + 1
+        cubetas = [0] * (len(LIMITES_MS) + 1)
+        suma = 0.0
+        for id_ventana, conteos, suma_ventana in self.ventanas:
+            if id_ventana < primera:
+                continue
+            cubetas = [a + b for a, b in zip(cubetas, conteos)]
+            suma += suma_ventana
+        return cubetas, suma, sum(cubetas)
+
+
+class RegistroLatencias:
+
+    def __init__(self, ventanas=5, segundos_ventana=60):
+        self.ventanas = ventanas
+        self.segundos_ventana = segundos_ventana
+        self.histogramas = {}
+        self._lock = threading.Lock()
+
+    def observar(self, vista, milisegundos):
+        with self._lock:
+            histograma = self.histogramas.get(vista)
+            if histograma is None:
+                histograma = self.histogramas[vista] = HistogramaDeslizante(self.ventanas, self.segundos_ventana)
+            histograma.observar(milisegundos)
+
+    def texto(self):
+        """Formato de texto de Prometheus (cubetas acumuladas, en ms)."""
+        lineas = [
+            f'# HELP cv_latencia_ms Latencia por URL, últimos {self.ventanas * self.segundos_ventana}s',
+            '# TYPE cv_latencia_ms histogram',
+        ]
+        with self._lock:
+            resumenes = {vista: histograma.resumen() for vista, histograma in sorted(self.histogramas.items())}
+        for vista, (cubetas, suma, cantidad) in resumenes.items():
+            acumulado = 0
+            for limite, conteo in zip((*LIMITES_MS, '+Inf'), cubetas):
+                acumulado += conteo
+                lineas.append(f'cv_latencia_ms_bucket{{vista="{vista}",le="{limite}"}} {acumulado}')
+            lineas.append(f'cv_latencia_ms_sum{{vista="{vista}"}} {suma:.1f}')
+            lineas.append(f'cv_latencia_ms_count{{vista="{vista}"}} {cantidad}')
+        return '\n'.join(lineas) + '\n'
+
+
+registro_latencias = RegistroLatencias()
+
+_nombres_urls = None
+
+
+def nombre_metrica(request):
+    """Nombre de la URL de tasks/urls.py que atendió la petición, u 'otras'."""
+    global _nombres_urls
+    if _nombres_urls is None:
+        from .urls import urlpatterns
+        _nombres_urls = {patron.name for patron in urlpatterns}
+    vista = getattr(request.resolver_match, 'view_name', None)
+    return vista if vista in _nombres_urls else 'otras'
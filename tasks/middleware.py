@@ -0,0 +1,134 @@
+import json
+import logging
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .metricas import anotar, fases_peticion, medir_sql, nombre_metrica, registro_latencias
+
+logger = logging.getLogger(__name__)
+logger_metricas = logging.getLogger('tasks.metricas')
+
+
+class MiddlewareSyncAsync:
+    """
+    Base para los middlewares que envuelven la petición completa: bajo ASGI
+    quedan en modo async y Django no tiene que pasar la vista a un hilo.
+    Las subclases implementan medir() (context manager) y despues().
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self._llamar_async(request)
+        with self.medir() as medicion:
+            response = self.get_response(request)
+        return self.despues(request, response, medicion)
+
+    async def _llamar_async(self, request):
+        with self.medir() as medicion:
+            response = await self.get_response(request)
+        return self.despues(request, response, medicion)
+
+
+# ==========================================
+# PRESUPUESTO DE SQL POR PETICIÓN (desarrollo)
+# ==========================================
+# Cuenta las consultas y el tiempo de SQL de cada petición, en cualquier hilo
+# (ver medir_sql en tasks/metricas.py; no depende de DEBUG ni de
+# connection.queries), y avisa cuando una vista supera su presupuesto: así un
+# N+1 introducido en un template aparece al navegar en local, antes del review.
+
+
+class PresupuestoSQLExcedido(Exception):
+    pass
+
+
+class PresupuestoSQLMiddleware(MiddlewareSyncAsync):
+    """
+    Configuración en settings.SQL_PRESUPUESTO:
+      CONSULTAS / TIEMPO_MS: límites por defecto
+      POR_VISTA: {nombre de la URL: consultas} para las rutas calientes
+      MODO: 'log' (warning) o 'error' (lanza PresupuestoSQLExcedido)
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        config = getattr(settings, 'SQL_PRESUPUESTO', {})
+        self.consultas = config.get('CONSULTAS', 50)
+        self.tiempo_ms = config.get('TIEMPO_MS', 250)
+        self.por_vista = config.get('POR_VISTA', {})
+        self.modo = config.get('MODO', 'log')
+
+    def medir(self):
+        return medir_sql()
+
+    def despues(self, request, response, medidor):
+        # Las respuestas en streaming consultan después: quedan fuera de la medición
+        self._revisar(request, medidor)
+        return response
+
+    def _revisar(self, request, medidor):
+        vista = getattr(request.resolver_match, 'view_name', None)
+        limite = self.por_vista.get(vista, self.consultas)
+        milisegundos = medidor.segundos * 1000
+        if medidor.consultas <= limite and milisegundos <= self.tiempo_ms:
+            return
+
+        mensaje = (
+            f'{request.method} {request.path} ({vista or "sin vista"}): '
+            f'{medidor.consultas} consultas (presupuesto {limite}), '
+            f'{milisegundos:.0f} ms de SQL (presupuesto {self.tiempo_ms} ms)'
+        )
+        sql, veces = medidor.sentencias.most_common(1)[0]
+        if veces > 1:
+            # La sentencia más repetida suele ser el N+1
+            mensaje += f'. Repetida {veces} veces: {sql[:300]}'
+        if self.modo == 'error':
+            raise PresupuestoSQLExcedido(mensaje)
+        logger.warning(mensaje)
+
+
+# ==========================================
+# TIEMPOS POR FASE (Server-Timing + log + histogramas)
+# ==========================================
+@contextmanager
+def _medir_peticion():
+    with fases_peticion() as fases, medir_sql() as medidor:
+        try:
+            yield fases
+        finally:
+            fases.sumar('db', '', medidor.segundos)
+            anotar('consultas', medidor.consultas)
+
+
+class TiemposPeticionMiddleware(MiddlewareSyncAsync):
+    """
+    Mide cada petición por fases (SQL, plantillas, URLs de media, PDF), deja
+    una línea JSON en el logger tasks.metricas, suma la latencia al histograma
+    de su URL y, con SERVER_TIMING, envía el encabezado Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.server_timing = getattr(settings, 'SERVER_TIMING', False)
+
+    def medir(self):
+        return _medir_peticion()
+
+    def despues(self, request, response, fases):
+        vista = nombre_metrica(request)
+        registro_latencias.observar(vista, fases.total_ms)
+        logger_metricas.info(json.dumps({
+            'vista': vista, 'metodo': request.method, 'ruta': request.path,
+            'estado': response.status_code, **fases.como_dict(),
+        }, ensure_ascii=False))
+        if self.server_timing:
+            response['Server-Timing'] = fases.server_timing()
+        return response
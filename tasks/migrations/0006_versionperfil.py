@@ -0,0 +1,30 @@
+# Generated by Django 5.0 on 2026-10-18 20:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_delete_educacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionPerfil',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='version_perfil', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Versión del Perfil',
+                'verbose_name_plural': 'Versiones de Perfil',
+            },
+        ),
+    ]
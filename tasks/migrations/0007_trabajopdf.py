@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-18 20:39
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_versionperfil'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoPDF',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('mascara', models.PositiveSmallIntegerField(default=0, help_text='Secciones incluidas (bits)')),
+                ('version', models.PositiveBigIntegerField(default=0, help_text='Versión del perfil al encolar')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('listo', 'Listo'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('archivo', models.FileField(blank=True, null=True, upload_to='cv_pdf/')),
+                ('error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_pdf', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trabajo PDF',
+                'verbose_name_plural': 'Trabajos PDF',
+                'ordering': ['fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='tasks_traba_estado_b1c547_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 20:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_fecha_actualizacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionSeccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seccion', models.CharField(max_length=30)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='versiones_seccion', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Versión de Sección',
+                'verbose_name_plural': 'Versiones de Sección',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='versionseccion',
+            constraint=models.UniqueConstraint(fields=('user', 'seccion'), name='version_seccion_unica'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-18 20:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_versionseccion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadoresPerfil',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_experiencias', models.PositiveIntegerField(default=0)),
+                ('total_cursos', models.PositiveIntegerField(default=0)),
+                ('total_habilidades', models.PositiveIntegerField(default=0)),
+                ('total_reconocimientos', models.PositiveIntegerField(default=0)),
+                ('total_productos_academicos', models.PositiveIntegerField(default=0)),
+                ('total_productos_laborales', models.PositiveIntegerField(default=0)),
+                ('total_ventas', models.PositiveIntegerField(default=0, help_text='Productos de garage sin vender')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='contadores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Contadores del Perfil',
+                'verbose_name_plural': 'Contadores de Perfiles',
+            },
+        ),
+    ]
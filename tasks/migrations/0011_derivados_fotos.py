@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 20:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_contadoresperfil'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datospersonales',
+            name='foto_perfil_anchos',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ventagarage',
+            name='foto_producto_anchos',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0 on 2026-10-18 20:53
+
+import tasks.almacenamiento
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_derivados_fotos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('tamano', models.PositiveBigIntegerField(help_text='Bytes')),
+                ('referencias', models.PositiveIntegerField(default=1)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo Media',
+                'verbose_name_plural': 'Archivos Media',
+            },
+        ),
+        migrations.AlterField(
+            model_name='cursorealizado',
+            name='ruta_certificado',
+            field=models.FileField(blank=True, null=True, storage=tasks.almacenamiento.almacenamiento_media, upload_to='certificados/cursos/'),
+        ),
+        migrations.AlterField(
+            model_name='datospersonales',
+            name='foto_perfil',
+            field=models.ImageField(blank=True, null=True, storage=tasks.almacenamiento.almacenamiento_media, upload_to='perfiles/'),
+        ),
+        migrations.AlterField(
+            model_name='experiencialaboral',
+            name='ruta_certificado',
+            field=models.FileField(blank=True, null=True, storage=tasks.almacenamiento.almacenamiento_media, upload_to='certificados/laborales/', verbose_name='Certificado Laboral'),
+        ),
+        migrations.AlterField(
+            model_name='reconocimiento',
+            name='ruta_certificado',
+            field=models.FileField(blank=True, null=True, storage=tasks.almacenamiento.almacenamiento_media, upload_to='certificados/reconocimientos/'),
+        ),
+        migrations.AlterField(
+            model_name='trabajopdf',
+            name='archivo',
+            field=models.FileField(blank=True, null=True, storage=tasks.almacenamiento.almacenamiento_media, upload_to='cv_pdf/'),
+        ),
+        migrations.AlterField(
+            model_name='ventagarage',
+            name='foto_producto',
+            field=models.ImageField(blank=True, null=True, storage=tasks.almacenamiento.almacenamiento_media, upload_to='garage/'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-18 20:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_almacenamiento_deduplicado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cursorealizado',
+            index=models.Index(condition=models.Q(('activar_para_que_se_vea_en_front', True)), fields=['user', 'fecha_inicio'], name='curso_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experiencialaboral',
+            index=models.Index(condition=models.Q(('activar_para_que_se_vea_en_front', True)), fields=['user', 'fecha_inicio_gestion'], name='exp_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habilidad',
+            index=models.Index(condition=models.Q(('activar_para_que_se_vea_en_front', True)), fields=['user'], name='hab_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoacademico',
+            index=models.Index(condition=models.Q(('activar_para_que_se_vea_en_front', True)), fields=['user', '-fecha_publicacion'], name='pacad_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productolaboral',
+            index=models.Index(condition=models.Q(('activar_para_que_se_vea_en_front', True)), fields=['user', '-fecha_producto'], name='plab_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reconocimiento',
+            index=models.Index(condition=models.Q(('activar_para_que_se_vea_en_front', True)), fields=['user', 'fecha_reconocimiento'], name='rec_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ventagarage',
+            index=models.Index(condition=models.Q(('activar_para_que_se_vea_en_front', True), ('vendido', False)), fields=['user', '-fecha_creacion'], name='garage_visible_idx'),
+        ),
+    ]
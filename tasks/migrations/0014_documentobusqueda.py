@@ -0,0 +1,94 @@
+# Generated by Django 5.0 on 2026-10-18 20:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Postgres: índice GIN sobre la misma expresión que arma tasks/busqueda.py
+# SQLite: tabla FTS5 de contenido externo, sincronizada por triggers
+CONFIG = 'spanish'
+FTS5_CREAR = [
+    """CREATE VIRTUAL TABLE tasks_documentobusqueda_fts USING fts5(
+        titulo, perfil, detalle,
+        content='tasks_documentobusqueda', content_rowid='user_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER tasks_documentobusqueda_ai AFTER INSERT ON tasks_documentobusqueda BEGIN
+        INSERT INTO tasks_documentobusqueda_fts(rowid, titulo, perfil, detalle)
+        VALUES (new.user_id, new.titulo, new.perfil, new.detalle);
+    END""",
+    """CREATE TRIGGER tasks_documentobusqueda_ad AFTER DELETE ON tasks_documentobusqueda BEGIN
+        INSERT INTO tasks_documentobusqueda_fts(tasks_documentobusqueda_fts, rowid, titulo, perfil, detalle)
+        VALUES ('delete', old.user_id, old.titulo, old.perfil, old.detalle);
+    END""",
+    """CREATE TRIGGER tasks_documentobusqueda_au AFTER UPDATE ON tasks_documentobusqueda BEGIN
+        INSERT INTO tasks_documentobusqueda_fts(tasks_documentobusqueda_fts, rowid, titulo, perfil, detalle)
+        VALUES ('delete', old.user_id, old.titulo, old.perfil, old.detalle);
+        INSERT INTO tasks_documentobusqueda_fts(rowid, titulo, perfil, detalle)
+        VALUES (new.user_id, new.titulo, new.perfil, new.detalle);
+    END""",
+]
+FTS5_ELIMINAR = [
+    'DROP TRIGGER IF EXISTS tasks_documentobusqueda_ai',
+    'DROP TRIGGER IF EXISTS tasks_documentobusqueda_ad',
+    'DROP TRIGGER IF EXISTS tasks_documentobusqueda_au',
+    'DROP TABLE IF EXISTS tasks_documentobusqueda_fts',
+]
+
+
+def _indice_gin():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    return GinIndex(
+        SearchVector('titulo', weight='A', config=CONFIG)
+        + SearchVector('perfil', weight='B', config=CONFIG)
+        + SearchVector('detalle', weight='C', config=CONFIG),
+        name='documento_busqueda_gin',
+    )
+
+
+def crear_indice_texto(apps, schema_editor):
+    DocumentoBusqueda = apps.get_model('tasks', 'DocumentoBusqueda')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.add_index(DocumentoBusqueda, _indice_gin())
+    elif vendor == 'sqlite':
+        for sql in FTS5_CREAR:
+            schema_editor.execute(sql)
+
+
+def eliminar_indice_texto(apps, schema_editor):
+    DocumentoBusqueda = apps.get_model('tasks', 'DocumentoBusqueda')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.remove_index(DocumentoBusqueda, _indice_gin())
+    elif vendor == 'sqlite':
+        for sql in FTS5_ELIMINAR:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tasks', '0013_indices_lectura_publica'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusqueda',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='documento_busqueda', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('titulo', models.TextField(blank=True, help_text='Nombre y título profesional (peso A)')),
+                ('perfil', models.TextField(blank=True, help_text='Descripción, cargos y habilidades (peso B)')),
+                ('detalle', models.TextField(blank=True, help_text='Funciones y cursos (peso C)')),
+                ('resumen', models.CharField(blank=True, max_length=300)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Documento de Búsqueda',
+                'verbose_name_plural': 'Documentos de Búsqueda',
+            },
+        ),
+        migrations.RunPython(crear_indice_texto, eliminar_indice_texto),
+    ]
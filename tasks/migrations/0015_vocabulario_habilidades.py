@@ -0,0 +1,39 @@
+# Generated by Django 5.0 on 2026-10-18 20:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0014_documentobusqueda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoHabilidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=100, unique=True)),
+                ('nombre', models.CharField(help_text='Forma en que se muestra', max_length=100)),
+                ('total_usuarios', models.PositiveIntegerField(default=0, help_text='Usuarios con la habilidad visible')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Término de Habilidad',
+                'verbose_name_plural': 'Vocabulario de Habilidades',
+            },
+        ),
+        migrations.AddField(
+            model_name='habilidad',
+            name='termino',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='habilidades', to='tasks.terminohabilidad'),
+        ),
+        migrations.AddIndex(
+            model_name='habilidad',
+            index=models.Index(condition=models.Q(('activar_para_que_se_vea_en_front', True)), fields=['termino', 'user', 'nivel'], name='hab_termino_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-18 21:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0015_vocabulario_habilidades'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cursorealizado',
+            index=models.Index(fields=['user', 'fecha_inicio', 'id'], name='curso_lista_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experiencialaboral',
+            index=models.Index(fields=['user', 'fecha_inicio_gestion', 'id'], name='exp_lista_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habilidad',
+            index=models.Index(fields=['user', 'id'], name='hab_lista_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoacademico',
+            index=models.Index(fields=['user', 'fecha_publicacion', 'id'], name='pacad_lista_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productolaboral',
+            index=models.Index(fields=['user', 'fecha_producto', 'id'], name='plab_lista_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reconocimiento',
+            index=models.Index(fields=['user', 'fecha_reconocimiento', 'id'], name='rec_lista_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ventagarage',
+            index=models.Index(fields=['user', 'fecha_creacion', 'id'], name='garage_lista_idx'),
+        ),
+    ]
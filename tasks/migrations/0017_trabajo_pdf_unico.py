@@ -0,0 +1,45 @@
+# Generated by Django 5.0 on 2026-10-18 21:41
+
+from collections import Counter
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def quitar_duplicados(apps, schema_editor):
+    # Antes no había restricción: de cada (usuario, versión, secciones) queda
+    # el trabajo listo más reciente, o el más reciente. Los archivos de los
+    # que se borran liberan su referencia en BlobMedia; los que quedan sin
+    # ninguna los recoge limpiar_media.
+    TrabajoPDF = apps.get_model('tasks', 'TrabajoPDF')
+    BlobMedia = apps.get_model('tasks', 'BlobMedia')
+    vistos = set()
+    sobrantes = []
+    trabajos = TrabajoPDF.objects.order_by('-fecha_actualizacion').values_list('pk', 'user_id', 'version', 'mascara', 'estado')
+    for pk, user_id, version, mascara, estado in sorted(trabajos, key=lambda fila: fila[4] != 'listo'):
+        clave = (user_id, version, mascara)
+        if clave in vistos:
+            sobrantes.append(pk)
+        vistos.add(clave)
+    filas = TrabajoPDF.objects.filter(pk__in=sobrantes)
+    archivos = Counter(filas.exclude(archivo__isnull=True).exclude(archivo='').values_list('archivo', flat=True))
+    filas.delete()
+    for nombre, cantidad in archivos.items():
+        BlobMedia.objects.filter(nombre=nombre, referencias__lte=cantidad).delete()
+        BlobMedia.objects.filter(nombre=nombre).update(referencias=F('referencias') - cantidad)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0016_indices_listas_keyset'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(quitar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='trabajopdf',
+            constraint=models.UniqueConstraint(fields=('user', 'version', 'mascara'), name='trabajo_pdf_unico'),
+        ),
+    ]
@@ -1,9 +1,30 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator, MinValueValidator
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+import re
+import uuid
 from datetime import date
 from dateutil.relativedelta import relativedelta
+from .almacenamiento import almacenamiento_media
+from .imagenes import Derivados
+
+# Compilado una vez por proceso (clean() se llama por cada fila en importaciones masivas)
+TELEFONO_PATTERN = re.compile(r'^[\d\s\-\+\(\)]+$')
+
+class GuardadoAtomico:
+    """
+    save() en una transacción: las señales de post_save (contador del
+    dashboard, versión de la sección) se confirman o se deshacen junto con la
+    fila. delete() ya es atómico en Django, señales incluidas.
+    """
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 # ==========================================
 # TABLA 1: DATOS PERSONALES (Maestra)
@@ -129,7 +150,9 @@ class DatosPersonales(models.Model):
     
     # Campos adicionales (mejoras)
     email_personal = models.EmailField(blank=True)
-    foto_perfil = models.ImageField(upload_to='perfiles/', blank=True, null=True)
+    foto_perfil = models.ImageField(upload_to='perfiles/', storage=almacenamiento_media, blank=True, null=True)
+    # Anchos de los derivados ya generados (ver tasks/imagenes.py)
+    foto_perfil_anchos = models.JSONField(default=list, blank=True, editable=False)
     
     # Metadata
     fecha_creacion = models.DateTimeField(auto_now_add=True)
@@ -153,69 +176,48 @@ class DatosPersonales(models.Model):
             return relativedelta(date.today(), self.fecha_nacimiento).years
         return None
     
+    @property
+    def foto_perfil_derivados(self):
+        """Derivados WebP/JPEG de la foto para src y srcset"""
+        return Derivados(self.foto_perfil, self.foto_perfil_anchos)
+    
     def clean(self):
-        """Validaciones personalizadas"""
+        """Validaciones personalizadas (reporta todos los errores, no solo el primero)"""
         super().clean()
+        errores = {}
         
         # Validar que la fecha de nacimiento no sea futura
         if self.fecha_nacimiento and self.fecha_nacimiento > date.today():
-            raise ValidationError({
-                'fecha_nacimiento': 'La fecha de nacimiento no puede ser futura.'
-            })
+            errores['fecha_nacimiento'] = 'La fecha de nacimiento no puede ser futura.'
         
         # Validar edad mínima (18 años) y máxima (70 años)
-        if self.fecha_nacimiento:
+        elif self.fecha_nacimiento:
             edad = relativedelta(date.today(), self.fecha_nacimiento).years
             if edad < 18:
-                raise ValidationError({
-                    'fecha_nacimiento': f'Debe ser mayor de edad (18 años). Edad actual: {edad} años.'
-                })
-            if edad > 70:
-                raise ValidationError({
-                    'fecha_nacimiento': f'La edad máxima permitida es 70 años. Edad actual: {edad} años.'
-                })
+                errores['fecha_nacimiento'] = f'Debe ser mayor de edad (18 años). Edad actual: {edad} años.'
+            elif edad > 70:
+                errores['fecha_nacimiento'] = f'La edad máxima permitida es 70 años. Edad actual: {edad} años.'
         
         # Validar que la cédula tenga exactamente 10 dígitos numéricos
         if self.numero_cedula and not self.numero_cedula.isdigit():
-            raise ValidationError({
-                'numero_cedula': 'La cédula debe contener solo números.'
-            })
-        
-        # Validar que apellidos y nombres no sean vacíos
-        if self.apellidos and not self.apellidos.strip():
-            raise ValidationError({
-                'apellidos': 'Los apellidos no pueden estar vacíos.'
-            })
+            errores['numero_cedula'] = 'La cédula debe contener solo números.'
         
-        if self.nombres and not self.nombres.strip():
-            raise ValidationError({
-                'nombres': 'Los nombres no pueden estar vacíos.'
-            })
-        
-        # Validar que apellidos y nombres no contengan números
-        if self.apellidos and any(char.isdigit() for char in self.apellidos):
-            raise ValidationError({
-                'apellidos': 'Los apellidos no deben contener números.'
-            })
-        
-        if self.nombres and any(char.isdigit() for char in self.nombres):
-            raise ValidationError({
-                'nombres': 'Los nombres no deben contener números.'
-            })
+        # Validar que apellidos y nombres no sean vacíos ni contengan números
+        for campo, etiqueta in (('apellidos', 'Los apellidos'), ('nombres', 'Los nombres')):
+            valor = getattr(self, campo)
+            if valor and not valor.strip():
+                errores[campo] = f'{etiqueta} no pueden estar vacíos.'
+            elif valor and any(char.isdigit() for char in valor):
+                errores[campo] = f'{etiqueta} no deben contener números.'
         
         # Validar formato de teléfonos
-        import re
-        telefono_pattern = re.compile(r'^[\d\s\-\+\(\)]+$')
-        
-        if self.telefono_convencional and not telefono_pattern.match(self.telefono_convencional):
-            raise ValidationError({
-                'telefono_convencional': 'El teléfono debe contener solo números y caracteres válidos (-, +, paréntesis).'
-            })
+        for campo in ('telefono_convencional', 'telefono_fijo'):
+            valor = getattr(self, campo)
+            if valor and not TELEFONO_PATTERN.match(valor):
+                errores[campo] = 'El teléfono debe contener solo números y caracteres válidos (-, +, paréntesis).'
         
-        if self.telefono_fijo and not telefono_pattern.match(self.telefono_fijo):
-            raise ValidationError({
-                'telefono_fijo': 'El teléfono debe contener solo números y caracteres válidos (-, +, paréntesis).'
-            })
+        if errores:
+            raise ValidationError(errores)
 
 
 # ==========================================
@@ -243,6 +245,7 @@ class Direccion(models.Model):
     
     # Metadata
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Dirección"
@@ -267,7 +270,7 @@ class Direccion(models.Model):
 # ==========================================
 # TABLA 2: EXPERIENCIA LABORAL (Transaccional)
 # ==========================================
-class ExperienciaLaboral(models.Model):
+class ExperienciaLaboral(GuardadoAtomico, models.Model):
     """
     Historial laboral del usuario
     Equivalente a: EXPERIENCIALABORAL
@@ -297,7 +300,7 @@ class ExperienciaLaboral(models.Model):
     activar_para_que_se_vea_en_front = models.BooleanField(default=True, verbose_name="Mostrar en CV Público")
     
     # Certificado
-    ruta_certificado = models.FileField(upload_to='certificados/laborales/', blank=True, null=True, verbose_name="Certificado Laboral")
+    ruta_certificado = models.FileField(upload_to='certificados/laborales/', storage=almacenamiento_media, blank=True, null=True, verbose_name="Certificado Laboral")
     
     # Ordenamiento
     orden = models.IntegerField(default=0)
@@ -310,6 +313,12 @@ class ExperienciaLaboral(models.Model):
         ordering = ['-fecha_inicio_gestion']
         verbose_name = "Experiencia Laboral"
         verbose_name_plural = "Experiencias Laborales"
+        indexes = [
+            # Lectura pública: visibles de un usuario en orden cronológico
+            models.Index(fields=['user', 'fecha_inicio_gestion'], condition=Q(activar_para_que_se_vea_en_front=True), name='exp_visible_idx'),
+            # Lista del dueño (paginación por cursor): filtro por usuario, orden por fecha y pk
+            models.Index(fields=['user', 'fecha_inicio_gestion', 'id'], name='exp_lista_idx'),
+        ]
     
     def __str__(self):
         return f"{self.cargo_desempenado} en {self.nombre_empresa}"
@@ -364,7 +373,7 @@ class ExperienciaLaboral(models.Model):
 # ==========================================
 # TABLA 3: RECONOCIMIENTOS (Maestra)
 # ==========================================
-class Reconocimiento(models.Model):
+class Reconocimiento(GuardadoAtomico, models.Model):
     """Reconocimientos académicos, públicos o privados"""
     TIPO_CHOICES = [
         ('Académico', 'Académico'),
@@ -380,13 +389,18 @@ class Reconocimiento(models.Model):
     nombre_contacto_auspicia = models.CharField(max_length=100, blank=True)
     telefono_contacto_auspicia = models.CharField(max_length=60, blank=True)
     activar_para_que_se_vea_en_front = models.BooleanField(default=True)
-    ruta_certificado = models.FileField(upload_to='certificados/reconocimientos/', blank=True, null=True)
+    ruta_certificado = models.FileField(upload_to='certificados/reconocimientos/', storage=almacenamiento_media, blank=True, null=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-fecha_reconocimiento']
         verbose_name = "Reconocimiento"
         verbose_name_plural = "Reconocimientos"
+        indexes = [
+            models.Index(fields=['user', 'fecha_reconocimiento'], condition=Q(activar_para_que_se_vea_en_front=True), name='rec_visible_idx'),
+            models.Index(fields=['user', 'fecha_reconocimiento', 'id'], name='rec_lista_idx'),
+        ]
     
     def __str__(self):
         return f"{self.tipo_reconocimiento} - {self.descripcion_reconocimiento[:50]}"
@@ -399,7 +413,7 @@ class Reconocimiento(models.Model):
 # ==========================================
 # TABLA 4: CURSOS REALIZADOS (Transaccional)
 # ==========================================
-class CursoRealizado(models.Model):
+class CursoRealizado(GuardadoAtomico, models.Model):
     """Cursos, talleres y capacitaciones"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cursos_realizados')
     nombre_curso = models.CharField(max_length=100)
@@ -412,13 +426,18 @@ class CursoRealizado(models.Model):
     telefono_contacto_auspicia = models.CharField(max_length=60, blank=True)
     email_empresa_patrocinadora = models.EmailField(max_length=60, blank=True)
     activar_para_que_se_vea_en_front = models.BooleanField(default=True)
-    ruta_certificado = models.FileField(upload_to='certificados/cursos/', blank=True, null=True)
+    ruta_certificado = models.FileField(upload_to='certificados/cursos/', storage=almacenamiento_media, blank=True, null=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-fecha_inicio']
         verbose_name = "Curso Realizado"
         verbose_name_plural = "Cursos Realizados"
+        indexes = [
+            models.Index(fields=['user', 'fecha_inicio'], condition=Q(activar_para_que_se_vea_en_front=True), name='curso_visible_idx'),
+            models.Index(fields=['user', 'fecha_inicio', 'id'], name='curso_lista_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre_curso} ({self.total_horas}h)"
@@ -449,7 +468,7 @@ class CursoRealizado(models.Model):
 # ==========================================
 # TABLA 5: PRODUCTOS ACADÉMICOS
 # ==========================================
-class ProductoAcademico(models.Model):
+class ProductoAcademico(GuardadoAtomico, models.Model):
     """Publicaciones, investigaciones, papers"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='productos_academicos')
     nombre_recurso = models.CharField(max_length=100)
@@ -459,11 +478,16 @@ class ProductoAcademico(models.Model):
     url_publicacion = models.URLField(blank=True)
     activar_para_que_se_vea_en_front = models.BooleanField(default=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-fecha_publicacion']
         verbose_name = "Producto Académico"
         verbose_name_plural = "Productos Académicos"
+        indexes = [
+            models.Index(fields=['user', '-fecha_publicacion'], condition=Q(activar_para_que_se_vea_en_front=True), name='pacad_visible_idx'),
+            models.Index(fields=['user', 'fecha_publicacion', 'id'], name='pacad_lista_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre_recurso} ({self.clasificador})"
@@ -472,7 +496,7 @@ class ProductoAcademico(models.Model):
 # ==========================================
 # TABLA 6: PRODUCTOS LABORALES
 # ==========================================
-class ProductoLaboral(models.Model):
+class ProductoLaboral(GuardadoAtomico, models.Model):
     """Productos desarrollados en el ámbito laboral"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='productos_laborales')
     nombre_producto = models.CharField(max_length=100)
@@ -482,11 +506,16 @@ class ProductoLaboral(models.Model):
     url_producto = models.URLField(blank=True)
     activar_para_que_se_vea_en_front = models.BooleanField(default=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-fecha_producto']
         verbose_name = "Producto Laboral"
         verbose_name_plural = "Productos Laborales"
+        indexes = [
+            models.Index(fields=['user', '-fecha_producto'], condition=Q(activar_para_que_se_vea_en_front=True), name='plab_visible_idx'),
+            models.Index(fields=['user', 'fecha_producto', 'id'], name='plab_lista_idx'),
+        ]
     
     def __str__(self):
         return self.nombre_producto
@@ -495,7 +524,7 @@ class ProductoLaboral(models.Model):
 # ==========================================
 # TABLA 7: VENTA GARAGE
 # ==========================================
-class VentaGarage(models.Model):
+class VentaGarage(GuardadoAtomico, models.Model):
     """Productos personales en venta"""
     ESTADO_CHOICES = [
         ('Bueno', 'Bueno'),
@@ -507,7 +536,8 @@ class VentaGarage(models.Model):
     estado_producto = models.CharField(max_length=40, choices=ESTADO_CHOICES)
     descripcion = models.TextField()
     valor_del_bien = models.DecimalField(max_digits=7, decimal_places=2, validators=[MinValueValidator(0.01)])
-    foto_producto = models.ImageField(upload_to='garage/', blank=True, null=True)
+    foto_producto = models.ImageField(upload_to='garage/', storage=almacenamiento_media, blank=True, null=True)
+    foto_producto_anchos = models.JSONField(default=list, blank=True, editable=False)
     activar_para_que_se_vea_en_front = models.BooleanField(default=True)
     vendido = models.BooleanField(default=False)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
@@ -517,10 +547,23 @@ class VentaGarage(models.Model):
         ordering = ['-fecha_creacion']
         verbose_name = "Venta Garage"
         verbose_name_plural = "Ventas Garage"
+        indexes = [
+            models.Index(
+                fields=['user', '-fecha_creacion'],
+                condition=Q(activar_para_que_se_vea_en_front=True, vendido=False),
+                name='garage_visible_idx'
+            ),
+            models.Index(fields=['user', 'fecha_creacion', 'id'], name='garage_lista_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre_producto} - ${self.valor_del_bien}"
     
+    @property
+    def foto_producto_derivados(self):
+        """Derivados WebP/JPEG de la foto para src y srcset"""
+        return Derivados(self.foto_producto, self.foto_producto_anchos)
+    
     def clean(self):
         if self.valor_del_bien and self.valor_del_bien > 999999.99:
             raise ValidationError({'valor_del_bien': f'El valor parece excesivo (${self.valor_del_bien}).'})
@@ -529,7 +572,7 @@ class VentaGarage(models.Model):
 # ==========================================
 # TABLA 8: HABILIDADES
 # ==========================================
-class Habilidad(models.Model):
+class Habilidad(GuardadoAtomico, models.Model):
     """Habilidades técnicas y blandas"""
     NIVEL_CHOICES = [
         ('basico', 'Básico'),
@@ -543,10 +586,217 @@ class Habilidad(models.Model):
     nivel = models.CharField(max_length=20, choices=NIVEL_CHOICES)
     categoria = models.CharField(max_length=100, blank=True)
     activar_para_que_se_vea_en_front = models.BooleanField(default=True)
+    # Entrada del vocabulario normalizado (la asigna una señal al guardar)
+    termino = models.ForeignKey(
+        'TerminoHabilidad', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='habilidades'
+    )
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Habilidad"
         verbose_name_plural = "Habilidades"
+        indexes = [
+            models.Index(fields=['user'], condition=Q(activar_para_que_se_vea_en_front=True), name='hab_visible_idx'),
+            models.Index(fields=['user', 'id'], name='hab_lista_idx'),
+            # Lista de posteo del índice invertido: término -> usuarios ordenados (con su nivel)
+            models.Index(
+                fields=['termino', 'user', 'nivel'],
+                condition=Q(activar_para_que_se_vea_en_front=True),
+                name='hab_termino_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.nombre} ({self.nivel})"
+
+
+# ==========================================
+# TABLA 9: VERSIÓN DEL PERFIL (Control de caché)
+# ==========================================
+class VersionPerfil(models.Model):
+    """
+    Contador que se incrementa cada vez que cambia cualquier dato del CV
+    del usuario. Las cachés (PDF, páginas) lo usan como parte de su clave.
+    """
+    # Sin restricción FK: al borrar un usuario, los post_delete en cascada
+    # de sus tablas hijas todavía pueden incrementar la versión.
+    user = models.OneToOneField(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='version_perfil'
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    fecha_actualizacion = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = "Versión del Perfil"
+        verbose_name_plural = "Versiones de Perfil"
+    
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
+
+
+class VersionSeccion(models.Model):
+    """
+    Contador por usuario y sección del CV (experiencias, cursos, ...).
+    Permite cachear cada sección por separado: editar un curso solo
+    invalida la sección de cursos.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='versiones_seccion'
+    )
+    seccion = models.CharField(max_length=30)
+    version = models.PositiveBigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Versión de Sección"
+        verbose_name_plural = "Versiones de Sección"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'seccion'], name='version_seccion_unica'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} {self.seccion} v{self.version}"
+
+
+# ==========================================
+# TABLA 10: TRABAJOS DE PDF (Cola en base de datos)
+# ==========================================
+class TrabajoPDF(models.Model):
+    """
+    Solicitud de generación de PDF en segundo plano.
+    La base de datos actúa como cola: el comando procesar_pdfs la vacía.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('listo', 'Listo'),
+        ('error', 'Error'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='trabajos_pdf')
+    mascara = models.PositiveSmallIntegerField(default=0, help_text="Secciones incluidas (bits)")
+    version = models.PositiveBigIntegerField(default=0, help_text="Versión del perfil al encolar")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    archivo = models.FileField(upload_to='cv_pdf/', storage=almacenamiento_media, blank=True, null=True)
+    error = models.TextField(blank=True)
+    
+    # Metadata
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['fecha_creacion']
+        verbose_name = "Trabajo PDF"
+        verbose_name_plural = "Trabajos PDF"
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'version', 'mascara'], name='trabajo_pdf_unico'),
+        ]
+    
+    def __str__(self):
+        return f"PDF {self.user_id} [{self.mascara}] - {self.estado}"
+
+
+# ==========================================
+# TABLA 11: CONTADORES DEL PERFIL (Dashboard)
+# ==========================================
+class ContadoresPerfil(models.Model):
+    """
+    Totales desnormalizados que muestra el dashboard.
+    Se mantienen con señales en cada alta, baja y cambio de 'vendido';
+    el comando reconciliar_contadores corrige cualquier desvío.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='contadores')
+    total_experiencias = models.PositiveIntegerField(default=0)
+    total_cursos = models.PositiveIntegerField(default=0)
+    total_habilidades = models.PositiveIntegerField(default=0)
+    total_reconocimientos = models.PositiveIntegerField(default=0)
+    total_productos_academicos = models.PositiveIntegerField(default=0)
+    total_productos_laborales = models.PositiveIntegerField(default=0)
+    total_ventas = models.PositiveIntegerField(default=0, help_text="Productos de garage sin vender")
+    
+    class Meta:
+        verbose_name = "Contadores del Perfil"
+        verbose_name_plural = "Contadores de Perfiles"
+    
+    def __str__(self):
+        return f"Contadores de {self.user_id}"
+
+
+# ==========================================
+# TABLA 12: ÍNDICE DE ARCHIVOS DEDUPLICADOS
+# ==========================================
+class BlobMedia(models.Model):
+    """
+    Archivo subido guardado una sola vez por contenido (nombre = SHA-256).
+    'referencias' cuenta las filas que lo usan; lo mantiene AlmacenamientoDeduplicado.
+    """
+    nombre = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    tamano = models.PositiveBigIntegerField(help_text="Bytes")
+    referencias = models.PositiveIntegerField(default=1)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Archivo Media"
+        verbose_name_plural = "Archivos Media"
+    
+    def __str__(self):
+        return f"{self.nombre} ({self.referencias} ref.)"
+
+
+# ==========================================
+# TABLA 13: DOCUMENTO DE BÚSQUEDA (uno por perfil público)
+# ==========================================
+class DocumentoBusqueda(models.Model):
+    """
+    Texto público de cada perfil, desnormalizado para la búsqueda de texto completo.
+    Lo mantienen las señales; el índice lo crea la migración según el motor:
+    GIN sobre tsvector en Postgres, tabla virtual FTS5 en SQLite.
+    
+    ⚠️ En SQLite, una migración que reconstruya esta tabla borra los triggers
+    que alimentan la FTS5: hay que volver a crearlos (ver 0014_documentobusqueda).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='documento_busqueda')
+    titulo = models.TextField(blank=True, help_text="Nombre y título profesional (peso A)")
+    perfil = models.TextField(blank=True, help_text="Descripción, cargos y habilidades (peso B)")
+    detalle = models.TextField(blank=True, help_text="Funciones y cursos (peso C)")
+    resumen = models.CharField(max_length=300, blank=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Documento de Búsqueda"
+        verbose_name_plural = "Documentos de Búsqueda"
+    
+    def __str__(self):
+        return f"Búsqueda de {self.user_id}"
+
+
+# ==========================================
+# TABLA 14: VOCABULARIO DE HABILIDADES
+# ==========================================
+class TerminoHabilidad(models.Model):
+    """
+    Habilidad normalizada (sin mayúsculas ni tildes): "Python", "python " y
+    "PYTHON" son el mismo término. Habilidad.termino forma el índice invertido.
+    """
+    clave = models.CharField(max_length=100, unique=True)
+    nombre = models.CharField(max_length=100, help_text="Forma en que se muestra")
+    total_usuarios = models.PositiveIntegerField(default=0, help_text="Usuarios con la habilidad visible")
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True)
+    
+    class Meta:
+        verbose_name = "Término de Habilidad"
+        verbose_name_plural = "Vocabulario de Habilidades"
     
     def __str__(self):
-        return f"{self.nombre} ({self.nivel})"
\ No newline at end of file
+        return f"{self.nombre} ({self.total_usuarios})"
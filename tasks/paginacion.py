@@ -0,0 +1,137 @@
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# ==========================================
+# PAGINACIÓN POR CURSOR (KEYSET)
+# ==========================================
+# La página siguiente se pide "después de (valor, pk) del último elemento",
+# no con OFFSET: cada página es un recorrido por rango del índice
+# (user, campo, id), igual de rápido en la primera página que en la última,
+# y estable aunque se agreguen o borren filas entre una página y otra.
+#
+# Los NULL van siempre al final (en Postgres y SQLite ordenan distinto):
+# se leen como un segundo tramo con "campo IS NULL" ordenado solo por pk.
+
+POR_PAGINA = 25
+
+
+class PaginaKeyset:
+    def __init__(self, objetos, siguiente, anterior):
+        self.object_list = objetos
+        self.cursor_siguiente = siguiente
+        self.cursor_anterior = anterior
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def _codificar(direccion, valor, pk):
+    datos = json.dumps([direccion, valor, pk], separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def _decodificar(cursor, campo):
+    """(dirección, valor, pk) o None si el cursor no es válido (se muestra la primera página)."""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        direccion, valor, pk = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if direccion not in ('sig', 'ant'):
+            return None
+        return direccion, (None if valor is None else campo.to_python(valor)), int(pk)
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+class Keyset:
+    """Orden de una lista: una columna (ascendente o descendente con '-') más el pk."""
+
+    def __init__(self, queryset, orden):
+        self.descendente = orden.startswith('-')
+        nombre = orden.lstrip('-')
+        self.campo = queryset.model._meta.pk if nombre == 'pk' else queryset.model._meta.get_field(nombre)
+        self.solo_pk = self.campo.primary_key
+        signo = '-' if self.descendente else ''
+        if self.solo_pk:
+            self.tramos = [queryset.order_by(f'{signo}pk')]
+        else:
+            self.tramos = [queryset.filter(**{f'{nombre}__isnull': False}).order_by(f'{signo}{nombre}', f'{signo}pk')]
+            if self.campo.null:
+                self.tramos.append(queryset.filter(**{f'{nombre}__isnull': True}).order_by(f'{signo}pk'))
+
+    def _valor(self, objeto):
+        return objeto.pk if self.solo_pk else getattr(objeto, self.campo.attname)
+
+    def _despues(self, tramo, valor, pk, hacia_adelante):
+        """Filas del tramo posteriores (o anteriores) a (valor, pk) en el orden de la lista."""
+        mayor = hacia_adelante != self.descendente
+        pk_lookup = 'pk__gt' if mayor else 'pk__lt'
+        if self.solo_pk or valor is None:
+            return tramo.filter(**{pk_lookup: pk})
+        nombre = self.campo.name
+        # campo >= v AND (campo > v OR pk > p): el primer término acota el rango del índice
+        return tramo.filter(
+            Q(**{f'{nombre}__{"gte" if mayor else "lte"}': valor}),
+            Q(**{f'{nombre}__{"gt" if mayor else "lt"}': valor}) | Q(**{pk_lookup: pk}),
+        )
+
+    def _leer(self, indice, cursor, hacia_adelante, cantidad):
+        """Hasta `cantidad` filas desde el tramo `indice`, pasando a los tramos contiguos si hace falta."""
+        filas = []
+        paso = 1 if hacia_adelante else -1
+        while 0 <= indice < len(self.tramos) and len(filas) < cantidad:
+            tramo = self.tramos[indice]
+            if not hacia_adelante:
+                tramo = tramo.reverse()
+            if cursor is not None:
+                tramo = self._despues(tramo, *cursor, hacia_adelante)
+                cursor = None
+            filas.extend(tramo[:cantidad - len(filas)])
+            indice += paso
+        return filas
+
+    def pagina(self, cursor=None, por_pagina=POR_PAGINA):
+        posicion = _decodificar(cursor, self.campo) if cursor else None
+        if posicion is not None:
+            direccion, valor, pk = posicion
+            indice = 1 if valor is None and len(self.tramos) > 1 else 0
+            if direccion == 'sig':
+                filas = self._leer(indice, (valor, pk), True, por_pagina + 1)
+                objetos, hay_siguiente, hay_anterior = filas[:por_pagina], len(filas) > por_pagina, True
+            else:
+                filas = self._leer(indice, (valor, pk), False, por_pagina + 1)
+                objetos, hay_siguiente, hay_anterior = filas[:por_pagina][::-1], True, len(filas) > por_pagina
+            if objetos:
+                return self._armar(objetos, hay_siguiente, hay_anterior)
+            # Se borraron las filas alrededor del cursor: volver al inicio
+
+        filas = self._leer(0, None, True, por_pagina + 1)
+        return self._armar(filas[:por_pagina], len(filas) > por_pagina, False)
+
+    def _armar(self, objetos, hay_siguiente, hay_anterior):
+        if not objetos:
+            return PaginaKeyset([], None, None)
+        ultimo, primero = objetos[-1], objetos[0]
+        return PaginaKeyset(
+            objetos,
+            _codificar('sig', self._valor(ultimo), ultimo.pk) if hay_siguiente else None,
+            _codificar('ant', self._valor(primero), primero.pk) if hay_anterior else None,
+        )
+
+
+def paginar_keyset(request, queryset, orden, por_pagina=POR_PAGINA):
+    """Página de la lista según ?cursor=...; orden: 'campo', '-campo' o 'pk'."""
+    return Keyset(queryset, orden).pagina(request.GET.get('cursor'), por_pagina)
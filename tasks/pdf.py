@@ -0,0 +1,52 @@
+from io import BytesIO
+from asgiref.sync import sync_to_async
+from django.template.loader import render_to_string
+from .cache_pdf import SECCIONES_PDF, secciones_incluidas
+from .metricas import anotar, medir
+from .perfil import PerfilCV, obtener_usuario
+from .pool_pdf import pool_pdf
+
+
+# ==========================================
+# RENDERIZADO DEL CV EN PDF
+# ==========================================
+# xhtml2pdf arrastra reportlab, html5lib y compañía: se importa recién en el
+# primer PDF para que los workers web no lo carguen al arrancar.
+
+def cargar_motor_pdf():
+    """Importa xhtml2pdf (una sola vez por proceso) y devuelve pisa."""
+    from xhtml2pdf import pisa
+    return pisa
+
+
+def html_del_pdf(usuario, mascara):
+    """HTML de cv_pdf.html con las secciones de la máscara."""
+    flags = secciones_incluidas(mascara)
+
+    # Solo cargar las secciones incluidas (una consulta por sección)
+    secciones = [seccion for seccion in SECCIONES_PDF if flags[f'incluir_{seccion}']]
+    perfil = PerfilCV(usuario, secciones)
+    context = {**perfil.contexto(), **flags}
+    return render_to_string('cv_pdf.html', context)
+
+
+def generar_pdf(usuario, mascara):
+    """Renderiza cv_pdf.html con xhtml2pdf y devuelve los bytes del PDF."""
+    html_string = html_del_pdf(usuario, mascara)
+    buffer = BytesIO()
+    with medir('pdf'):
+        cargar_motor_pdf().CreatePDF(html_string, dest=buffer)
+    anotar('pdf_bytes', buffer.tell())
+    return buffer.getvalue()
+
+
+async def agenerar_pdf(username, mascara):
+    """
+    Versión para vistas async: consultas y template en el hilo de la petición,
+    xhtml2pdf en el pool de procesos. Lanza PoolPDFSaturado si no hay lugar.
+    """
+    html_string = await sync_to_async(lambda: html_del_pdf(obtener_usuario(username), mascara))()
+    with medir('pdf'):
+        contenido = await pool_pdf().renderizar(html_string)
+    anotar('pdf_bytes', len(contenido))
+    return contenido
@@ -0,0 +1,195 @@
+import asyncio
+from collections.abc import Mapping
+from django.contrib.auth.models import User
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Prefetch, prefetch_related_objects
+from django.shortcuts import get_object_or_404
+from .asincrono import leer_lista
+from .cache_pdf import SECCIONES_PDF
+from .contadores import CONTADORES, reconciliar
+from .models import (
+    ContadoresPerfil, ExperienciaLaboral, Reconocimiento, CursoRealizado,
+    ProductoAcademico, ProductoLaboral, VentaGarage, Habilidad
+)
+from .versiones import aobtener_versiones_secciones
+
+# Secciones que muestra el CV público (y su orden de carga)
+SECCIONES_PUBLICAS = (
+    'experiencias',
+    'reconocimientos',
+    'cursos',
+    'productos_academicos',
+    'productos_laborales',
+    'habilidades',
+    'productos_garage',
+)
+
+
+def _consultas_visibles():
+    """Sección -> (relación inversa en User, queryset visible y ordenado)."""
+    # 🔄 Orden cronológico ASCENDENTE (más antiguo primero) salvo productos
+    return {
+        'experiencias': ('experiencias_laborales', ExperienciaLaboral.objects.filter(
+            activar_para_que_se_vea_en_front=True).order_by('fecha_inicio_gestion')),
+        'reconocimientos': ('reconocimientos', Reconocimiento.objects.filter(
+            activar_para_que_se_vea_en_front=True).order_by('fecha_reconocimiento')),
+        'cursos': ('cursos_realizados', CursoRealizado.objects.filter(
+            activar_para_que_se_vea_en_front=True).order_by('fecha_inicio')),
+        'productos_academicos': ('productos_academicos', ProductoAcademico.objects.filter(
+            activar_para_que_se_vea_en_front=True).order_by('-fecha_publicacion')),
+        'productos_laborales': ('productos_laborales', ProductoLaboral.objects.filter(
+            activar_para_que_se_vea_en_front=True).order_by('-fecha_producto')),
+        'habilidades': ('habilidades', Habilidad.objects.filter(
+            activar_para_que_se_vea_en_front=True)),
+        'productos_garage': ('ventas_garage', VentaGarage.objects.filter(
+            activar_para_que_se_vea_en_front=True, vendido=False).order_by('-fecha_creacion')),
+    }
+
+
+# ==========================================
+# AGREGADO DEL PERFIL (CV público y PDF)
+# ==========================================
+class TotalesSecciones(Mapping):
+    """Total de filas por sección; solo evalúa la sección que se consulta."""
+
+    def __init__(self, listas):
+        self._listas = listas
+
+    def __getitem__(self, seccion):
+        return len(self._listas[seccion])
+
+    def __iter__(self):
+        return iter(self._listas)
+
+    def __len__(self):
+        return len(self._listas)
+
+
+class PerfilCV:
+    """
+    Usuario + datos personales + secciones visibles, ya materializadas en
+    listas con sus totales. Cada sección cuesta exactamente una consulta,
+    sin importar cuántas filas tenga ni cuántas veces la use el template.
+    
+    Con diferido=True las secciones quedan como querysets sin evaluar, para
+    que las que el template sirve desde la caché de fragmentos no consulten nada.
+    """
+
+    def __init__(self, usuario, secciones=SECCIONES_PUBLICAS, diferido=False):
+        consultas = _consultas_visibles()
+        if diferido:
+            # El queryset guarda su resultado: {% if %}, {% for %} y el total comparten una consulta
+            self.listas = {
+                seccion: consultas[seccion][1].filter(user=usuario)
+                for seccion in secciones
+            }
+        else:
+            prefetch_related_objects([usuario], *[
+                Prefetch(consultas[seccion][0], queryset=consultas[seccion][1], to_attr=f'cv_{seccion}')
+                for seccion in secciones
+            ])
+            self.listas = {seccion: getattr(usuario, f'cv_{seccion}') for seccion in secciones}
+        self.usuario = usuario
+        self.secciones = tuple(secciones)
+        self.totales = TotalesSecciones(self.listas)
+
+        try:
+            datos = usuario.datos_personales
+        except ObjectDoesNotExist:
+            datos = None
+        # Protegido contra Error 500: un perfil desactivado se trata como inexistente
+        self.datos_personales = datos if datos and datos.perfil_activo else None
+
+    def contexto(self):
+        return {
+            'datos_personales': self.datos_personales,
+            'totales': self.totales,
+            'perfil_id': self.usuario.pk,
+            'username': self.usuario.username,
+            **self.listas,
+        }
+
+
+def obtener_usuario(username):
+    """Usuario con sus datos personales en una sola consulta (404 si no existe)."""
+    return get_object_or_404(User.objects.select_related('datos_personales'), username=username)
+
+
+def cargar_perfil(username, secciones=SECCIONES_PUBLICAS, diferido=False):
+    return PerfilCV(obtener_usuario(username), secciones, diferido)
+
+
+# ==========================================
+# CARGA ASYNC DEL CV PÚBLICO (ASGI)
+# ==========================================
+# Solo se leen las secciones cuyo fragmento no está en la caché (mismas claves
+# que los {% cache %} de cv_publico.html), todas a la vez en el pool de hilos.
+# Las demás quedan como querysets diferidos: si un fragmento vence entre la
+# comprobación y el render, el template lo consulta como en la vista síncrona.
+
+# Sección -> otras versiones que forman parte de la clave de su fragmento
+VARIA_CON = {'productos_garage': ('datos_personales',)}
+
+
+def cache_fragmentos():
+    # Misma elección que la etiqueta {% cache %}
+    try:
+        return caches['template_fragments']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def claves_fragmentos(seccion, user_id, versiones):
+    extra = [versiones[otra] for otra in VARIA_CON.get(seccion, ())]
+    claves = [make_template_fragment_key(f'cv_{seccion}', [user_id, versiones[seccion], *extra])]
+    if seccion in SECCIONES_PDF:
+        # El modal del PDF muestra la casilla solo si la sección tiene filas
+        claves.append(make_template_fragment_key(f'cv_pdf_{seccion}', [user_id, versiones[seccion]]))
+    return claves
+
+
+async def asecciones_sin_fragmento(user_id, versiones):
+    claves = {seccion: claves_fragmentos(seccion, user_id, versiones) for seccion in SECCIONES_PUBLICAS}
+    en_cache = await cache_fragmentos().aget_many([clave for lista in claves.values() for clave in lista])
+    return [seccion for seccion, lista in claves.items() if not all(clave in en_cache for clave in lista)]
+
+
+async def acargar_perfil_publico(user_id):
+    """(PerfilCV, versiones por sección), o None si el usuario ya no existe."""
+    # Las versiones se leen ANTES que los datos (ver descargar_pdf)
+    versiones = await aobtener_versiones_secciones(user_id)
+    faltan = await asecciones_sin_fragmento(user_id, versiones)
+    consultas = _consultas_visibles()
+    usuario, *listas = await asyncio.gather(
+        User.objects.select_related('datos_personales').filter(pk=user_id).afirst(),
+        *[leer_lista(consultas[seccion][1].filter(user_id=user_id)) for seccion in faltan],
+    )
+    if usuario is None:
+        return None
+    perfil = PerfilCV(usuario, diferido=True)
+    perfil.listas.update(zip(faltan, listas))
+    return perfil, versiones
+
+
+# ==========================================
+# RESUMEN DEL DASHBOARD
+# ==========================================
+def cargar_resumen(user_id):
+    """Datos personales y totales del dashboard (contadores desnormalizados) en una consulta."""
+    usuario = User.objects.select_related('datos_personales', 'contadores').get(pk=user_id)
+    try:
+        datos = usuario.datos_personales
+    except ObjectDoesNotExist:
+        datos = None
+    try:
+        contadores = usuario.contadores
+    except ObjectDoesNotExist:
+        # Usuario anterior a los contadores: se calculan una única vez
+        reconciliar([user_id])
+        contadores = ContadoresPerfil.objects.get(user_id=user_id)
+    return {
+        'datos_personales': datos,
+        **{campo: getattr(contadores, campo) for campo in CONTADORES},
+    }
@@ -0,0 +1,29 @@
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from .metricas import medir
+
+# ==========================================
+# BACKEND DE PLANTILLAS CON MEDICIÓN
+# ==========================================
+# El mismo backend de Django, pero cada render()/render_to_string() suma su
+# tiempo a la fase "plantilla" con el nombre del template. Los {% include %}
+# quedan dentro del template que los incluye.
+
+
+class TemplateMedido(Template):
+
+    def render(self, context=None, request=None):
+        with medir('plantilla', self.template.origin.template_name or '<cadena>'):
+            return super().render(context, request)
+
+
+class PlantillasMedidas(DjangoTemplates):
+
+    def from_string(self, template_code):
+        return TemplateMedido(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TemplateMedido(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
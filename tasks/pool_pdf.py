@@ -0,0 +1,146 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+# ==========================================
+# POOL DE PROCESOS PARA RENDERIZAR PDFs (vistas async)
+# ==========================================
+# pisa.CreatePDF es Python puro y usa la CPU de principio a fin: en el event
+# loop lo bloquearía y en hilos se serializa por el GIL. La vista async arma
+# el HTML (consultas y template) y solo la conversión a PDF viaja al pool.
+#
+# Este módulo no importa Django: los procesos se crean con forkserver/spawn
+# (un fork del worker heredaría los sockets de sus conexiones a la base y los
+# hilos del servidor) y solo cargan xhtml2pdf.
+
+
+class PoolPDFSaturado(Exception):
+    """Todos los procesos ocupados y la cola de espera llena."""
+
+
+def procesos_disponibles():
+    """Núcleos que este proceso puede usar (respeta taskset/cgroups en Linux)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def contexto_procesos():
+    """forkserver donde exista (Linux), si no spawn: nunca un fork del proceso actual."""
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(metodo)
+
+
+def _cargar_motor():
+    from xhtml2pdf import pisa
+    return pisa
+
+
+def inicializar_con_django():
+    """
+    Initializer de los pools que usan el ORM (procesar_pdfs). Tiene que vivir
+    aquí: el hijo importa el módulo del initializer antes de ejecutarlo, y
+    uno que importe modelos fallaría sin django.setup().
+    """
+    import django
+    django.setup()
+    # Estos procesos solo generan PDFs: el motor se carga al arrancar, no en el primer trabajo
+    _cargar_motor()
+
+
+def html_a_pdf(html):
+    """
+    Corre en el proceso hijo. getvalue() copia una vez el buffer (un
+    memoryview no se puede enviar por el pipe); del lado del worker, los
+    bytes recibidos van sin más copias a la caché y a la respuesta.
+    """
+    buffer = BytesIO()
+    _cargar_motor().CreatePDF(html, dest=buffer)
+    return buffer.getvalue()
+
+
+class PoolPDF:
+    """
+    ProcessPoolExecutor perezoso con tope de trabajos: hasta `procesos`
+    renderizando y `cola` esperando. Más allá, renderizar() lanza
+    PoolPDFSaturado en lugar de encolar sin límite.
+    """
+
+    def __init__(self, procesos=0, cola=0):
+        self.procesos = procesos or procesos_disponibles()
+        self.limite = self.procesos + cola
+        self.en_curso = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.procesos, mp_context=contexto_procesos(), initializer=_cargar_motor,
+            )
+        return self._executor
+
+    def _descartar(self, executor):
+        """Con el lock tomado: cierra el pool roto, solo si sigue siendo el actual."""
+        if self._executor is executor:
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _liberar(self, futuro):
+        with self._lock:
+            self.en_curso -= 1
+
+    async def renderizar(self, html):
+        with self._lock:
+            if self.en_curso >= self.limite:
+                raise PoolPDFSaturado(f'{self.en_curso} PDFs en curso (límite {self.limite})')
+            self.en_curso += 1
+            try:
+                executor = self._pool()
+                try:
+                    futuro = executor.submit(html_a_pdf, html)
+                except BrokenProcessPool:
+                    # Se rompió sin que ninguna petición en curso lo notara
+                    self._descartar(executor)
+                    executor = self._pool()
+                    futuro = executor.submit(html_a_pdf, html)
+            except BaseException:
+                self.en_curso -= 1
+                raise
+        # Se libera al terminar el proceso, no la petición: si el cliente se
+        # va, el render sigue ocupando su lugar hasta acabar
+        futuro.add_done_callback(self._liberar)
+        try:
+            return await asyncio.wrap_future(futuro)
+        except BrokenProcessPool:
+            # Un hijo murió (p. ej. sin memoria): el próximo PDF arranca un pool
+            # nuevo. Si otra petición ya lo reemplazó, el nuevo no se toca.
+            with self._lock:
+                self._descartar(executor)
+            raise
+
+    def cerrar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_pool_pdf = None
+_lock_pool = threading.Lock()
+
+
+def pool_pdf():
+    """Pool del proceso, dimensionado por settings.CV_PDF_PROCESOS y CV_PDF_COLA."""
+    global _pool_pdf
+    if _pool_pdf is None:
+        from django.conf import settings
+        with _lock_pool:
+            if _pool_pdf is None:
+                _pool_pdf = PoolPDF(settings.CV_PDF_PROCESOS, settings.CV_PDF_COLA)
+    return _pool_pdf
@@ -0,0 +1,241 @@
+import logging
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from PIL import Image
+from .models import (
+    DatosPersonales, Direccion, ExperienciaLaboral,
+    Reconocimiento, CursoRealizado, ProductoAcademico,
+    ProductoLaboral, VentaGarage, Habilidad, TrabajoPDF
+)
+from .almacenamiento import campos_archivo
+from .busqueda import MODELOS_BUSQUEDA, actualizar_documento
+from .contadores import CAMPO_POR_MODELO, ajustar_contador
+from .habilidades import normalizar_habilidad, obtener_termino, recontar_terminos
+from .imagenes import ANCHOS_GARAGE, ANCHOS_PERFIL, generar_derivados
+from .versiones import SECCION_POR_MODELO, actualizar_y_versionar, incrementar_version
+
+logger = logging.getLogger(__name__)
+
+# Las nueve tablas que forman el CV de un usuario
+MODELOS_CV = (
+    DatosPersonales, Direccion, ExperienciaLaboral,
+    Reconocimiento, CursoRealizado, ProductoAcademico,
+    ProductoLaboral, VentaGarage, Habilidad,
+)
+
+
+# ==========================================
+# INVALIDACIÓN: cualquier cambio sube la versión del perfil
+# ==========================================
+def cv_modificado(sender, instance, **kwargs):
+    if instance.user_id:
+        incrementar_version(instance.user_id, SECCION_POR_MODELO[sender])
+
+
+for modelo in MODELOS_CV:
+    post_save.connect(cv_modificado, sender=modelo, dispatch_uid=f'version_{modelo.__name__}_save')
+    post_delete.connect(cv_modificado, sender=modelo, dispatch_uid=f'version_{modelo.__name__}_delete')
+
+
+def usuario_modificado(sender, instance, created, update_fields=None, **kwargs):
+    # El username aparece en el CV; el login solo toca last_login y no cuenta
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    incrementar_version(instance.pk)
+
+
+post_save.connect(usuario_modificado, sender=User, dispatch_uid='version_User_save')
+
+
+# ==========================================
+# CONTADORES DEL DASHBOARD
+# ==========================================
+def _cuenta_en_contador(instance):
+    # Un producto de garage vendido deja de contar como "a la venta"
+    return not getattr(instance, 'vendido', False)
+
+
+def recordar_estado_inicial(sender, instance, **kwargs):
+    if 'vendido' not in instance.get_deferred_fields():
+        instance._vendido_inicial = instance.vendido
+
+
+def fila_guardada(sender, instance, created, raw=False, **kwargs):
+    if raw or not instance.user_id:
+        return
+    campo = CAMPO_POR_MODELO[sender]
+    if created:
+        if _cuenta_en_contador(instance):
+            ajustar_contador(instance.user_id, campo, 1)
+    elif sender is VentaGarage and hasattr(instance, '_vendido_inicial'):
+        if instance._vendido_inicial != instance.vendido:
+            ajustar_contador(instance.user_id, campo, -1 if instance.vendido else 1)
+    if sender is VentaGarage:
+        instance._vendido_inicial = instance.vendido
+
+
+def fila_eliminada(sender, instance, **kwargs):
+    if instance.user_id and _cuenta_en_contador(instance):
+        ajustar_contador(instance.user_id, CAMPO_POR_MODELO[sender], -1)
+
+
+post_init.connect(recordar_estado_inicial, sender=VentaGarage, dispatch_uid='contador_VentaGarage_init')
+for modelo in CAMPO_POR_MODELO:
+    post_save.connect(fila_guardada, sender=modelo, dispatch_uid=f'contador_{modelo.__name__}_save')
+    post_delete.connect(fila_eliminada, sender=modelo, dispatch_uid=f'contador_{modelo.__name__}_delete')
+
+
+# ==========================================
+# DERIVADOS DE FOTOS (WebP/JPEG redimensionados)
+# ==========================================
+# Tabla -> (campo de la foto, anchos a generar)
+FOTOS_POR_MODELO = {
+    DatosPersonales: ('foto_perfil', ANCHOS_PERFIL),
+    VentaGarage: ('foto_producto', ANCHOS_GARAGE),
+}
+
+
+def regenerar_derivados(instance):
+    """Genera los derivados de la foto actual y guarda sus anchos sin disparar señales."""
+    campo, anchos = FOTOS_POR_MODELO[type(instance)]
+    archivo = getattr(instance, campo)
+    generados = []
+    if archivo:
+        try:
+            generados = generar_derivados(archivo, anchos)
+        except (OSError, Image.DecompressionBombError):
+            # El template sigue mostrando el original
+            logger.exception('No se pudieron generar los derivados de %s', archivo.name)
+    setattr(instance, f'{campo}_anchos', generados)
+    # Sube la versión: los fragmentos en caché deben incluir el nuevo srcset
+    actualizar_y_versionar(type(instance).objects.filter(pk=instance.pk), **{f'{campo}_anchos': generados})
+    return generados
+
+
+def _derivados_al_confirmar(instance, campo):
+    """
+    Redimensionar y codificar tarda: se hace después del commit, sin tener
+    abierta la transacción del save() ni los bloqueos de sus filas.
+    """
+    nombre = getattr(instance, campo).name
+    if not nombre:
+        # Sin foto no hay nada que codificar: solo se vacían los anchos
+        regenerar_derivados(instance)
+        return
+
+    def generar():
+        # Otro save pudo cambiar la foto (y programar sus derivados) o borrar la fila
+        if type(instance).objects.filter(pk=instance.pk, **{campo: nombre}).exists():
+            regenerar_derivados(instance)
+
+    transaction.on_commit(generar)
+
+
+# ==========================================
+# ARCHIVOS SUBIDOS: derivados y referencias del almacenamiento deduplicado
+# ==========================================
+MODELOS_CON_ARCHIVOS = {
+    modelo: campos_archivo(modelo)
+    for modelo in (DatosPersonales, ExperienciaLaboral, Reconocimiento, CursoRealizado, VentaGarage, TrabajoPDF)
+}
+
+
+def _liberar(archivo, nombre):
+    # Solo si la transacción se confirma: un rollback no debe dejar filas sin archivo
+    storage = archivo.storage
+    transaction.on_commit(lambda: storage.delete(nombre))
+
+
+def recordar_archivos_iniciales(sender, instance, **kwargs):
+    diferidos = instance.get_deferred_fields()
+    instance._archivos_iniciales = {
+        campo: getattr(instance, campo).name or ''
+        for campo in MODELOS_CON_ARCHIVOS[sender] if campo not in diferidos
+    }
+
+
+def marcar_archivos_subidos(sender, instance, raw=False, **kwargs):
+    # Archivo asignado pero aún no guardado: este save() suma una referencia
+    instance._archivos_subidos = {
+        campo for campo in MODELOS_CON_ARCHIVOS[sender]
+        if campo not in instance.get_deferred_fields()
+        and getattr(instance, campo) and not getattr(instance, campo)._committed
+    }
+
+
+def archivos_guardados(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    iniciales = getattr(instance, '_archivos_iniciales', {})
+    subidos = getattr(instance, '_archivos_subidos', set())
+    for campo, anterior in iniciales.items():
+        archivo = getattr(instance, campo)
+        nombre = archivo.name or ''
+        # Re-subir el mismo contenido da el mismo nombre, pero igual suma una referencia
+        if anterior and (nombre != anterior or campo in subidos):
+            _liberar(archivo, anterior)
+        if nombre != anterior and FOTOS_POR_MODELO.get(sender, (None,))[0] == campo:
+            _derivados_al_confirmar(instance, campo)
+        iniciales[campo] = nombre
+    instance._archivos_subidos = set()
+
+
+def archivos_eliminados(sender, instance, **kwargs):
+    diferidos = instance.get_deferred_fields()
+    for campo in MODELOS_CON_ARCHIVOS[sender]:
+        if campo not in diferidos and getattr(instance, campo):
+            _liberar(getattr(instance, campo), getattr(instance, campo).name)
+
+
+for modelo in MODELOS_CON_ARCHIVOS:
+    post_init.connect(recordar_archivos_iniciales, sender=modelo, dispatch_uid=f'archivos_{modelo.__name__}_init')
+    pre_save.connect(marcar_archivos_subidos, sender=modelo, dispatch_uid=f'archivos_{modelo.__name__}_pre_save')
+    post_save.connect(archivos_guardados, sender=modelo, dispatch_uid=f'archivos_{modelo.__name__}_save')
+    post_delete.connect(archivos_eliminados, sender=modelo, dispatch_uid=f'archivos_{modelo.__name__}_delete')
+
+
+# ==========================================
+# DOCUMENTO DE BÚSQUEDA
+# ==========================================
+def documento_modificado(sender, instance, raw=False, **kwargs):
+    if raw or not instance.user_id:
+        return
+    user_id = instance.user_id
+    # Tras el commit: en el borrado en cascada del usuario ya no queda nada que indexar
+    transaction.on_commit(lambda: actualizar_documento(user_id))
+
+
+for modelo in MODELOS_BUSQUEDA:
+    post_save.connect(documento_modificado, sender=modelo, dispatch_uid=f'busqueda_{modelo.__name__}_save')
+    post_delete.connect(documento_modificado, sender=modelo, dispatch_uid=f'busqueda_{modelo.__name__}_delete')
+
+
+# ==========================================
+# ÍNDICE INVERTIDO DE HABILIDADES
+# ==========================================
+def recordar_termino_inicial(sender, instance, **kwargs):
+    if 'termino' not in instance.get_deferred_fields():
+        instance._termino_inicial = instance.termino_id
+
+
+def asignar_termino(sender, instance, raw=False, **kwargs):
+    if raw or 'nombre' in instance.get_deferred_fields():
+        return
+    # Solo se consulta el vocabulario si el nombre normalizado cambió
+    if instance.termino_id is None or normalizar_habilidad(instance.nombre) != instance.termino.clave:
+        instance.termino = obtener_termino(instance.nombre)
+
+
+def habilidad_modificada(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    afectados = {getattr(instance, '_termino_inicial', None), instance.termino_id}
+    instance._termino_inicial = instance.termino_id
+    transaction.on_commit(lambda: recontar_terminos(afectados))
+
+
+post_init.connect(recordar_termino_inicial, sender=Habilidad, dispatch_uid='termino_Habilidad_init')
+pre_save.connect(asignar_termino, sender=Habilidad, dispatch_uid='termino_Habilidad_pre_save')
+post_save.connect(habilidad_modificada, sender=Habilidad, dispatch_uid='termino_Habilidad_save')
+post_delete.connect(habilidad_modificada, sender=Habilidad, dispatch_uid='termino_Habilidad_delete')
@@ -0,0 +1,268 @@
+import random
+from datetime import date, timedelta
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.db.models import F
+from django.db.models.fields.files import FieldFile
+from PIL import Image, ImageDraw
+from .almacenamiento import almacenamiento_media
+from .imagenes import ANCHOS_GARAGE, ANCHOS_PERFIL, eliminar_derivados, generar_derivados
+from .models import BlobMedia, DatosPersonales, VentaGarage
+
+# ==========================================
+# DATOS SINTÉTICOS PARA PRUEBAS DE CARGA
+# ==========================================
+# Registros con el formato de importar_cvs (se insertan con ImportadorCV, que
+# ya hace bulk_create y pone al día contadores, versiones y búsqueda). Las
+# cantidades por sección siguen distribuciones sesgadas como las reales:
+# la mayoría tiene pocas filas y unos pocos tienen muchas. Con la misma
+# semilla se generan los mismos datos.
+
+NOMBRES_POR_SEXO = {
+    'M': ('Ana', 'María', 'Carmen', 'Lucía', 'Sofía', 'Valeria', 'Daniela', 'Gabriela', 'Paula'),
+    'H': ('Luis', 'José', 'Jorge', 'Diego', 'Andrés', 'Carlos', 'Miguel', 'Pedro', 'Fernando'),
+}
+APELLIDOS = ('Pérez', 'García', 'Rodríguez', 'Zambrano', 'Mendoza', 'Vera', 'Cedeño', 'Torres',
+             'Molina', 'Chávez', 'Andrade', 'Ortiz', 'Salazar', 'Guerrero', 'Loor', 'Intriago')
+CIUDADES = ('Quito', 'Guayaquil', 'Cuenca', 'Manta', 'Portoviejo', 'Loja', 'Ambato', 'Machala')
+CARGOS = ('Desarrollador', 'Analista de Sistemas', 'Contador', 'Docente', 'Asistente Administrativo',
+          'Ingeniero de Datos', 'Diseñador Gráfico', 'Vendedor', 'Soporte Técnico', 'Jefe de Proyecto')
+EMPRESAS = ('Corporación Andina', 'Banco del Litoral', 'Tecnova', 'Agroexport', 'Universidad Técnica',
+            'Municipio', 'Clínica Central', 'Datasoft', 'Importadora Pacífico', 'Cooperativa Unión')
+CURSOS = ('Django avanzado', 'Excel para negocios', 'Gestión de proyectos', 'Inglés B2', 'Python',
+          'Primeros auxilios', 'Scrum', 'Marketing digital', 'Redes Cisco', 'Contabilidad NIIF')
+ENTIDADES = ('SECAP', 'Coursera', 'Cámara de Comercio', 'Cruz Roja', 'Universidad Central', 'Platzi')
+# Ordenadas de más a menos frecuente: se eligen con pesos de Zipf
+HABILIDADES = ('Python', 'Excel', 'Trabajo en equipo', 'Inglés', 'SQL', 'Django', 'JavaScript',
+               'Atención al cliente', 'Liderazgo', 'Git', 'Contabilidad', 'Linux', 'Docker', 'React',
+               'Photoshop', 'Ventas', 'Redacción', 'Power BI', 'Java', 'Kotlin', 'Negociación',
+               'AutoCAD', 'PostgreSQL', 'Kubernetes', 'Rust', 'Francés', 'Oratoria', 'Figma')
+PESOS_HABILIDADES = [1 / rango for rango in range(1, len(HABILIDADES) + 1)]
+PRODUCTOS_GARAGE = ('Silla de oficina', 'Bicicleta', 'Monitor 24"', 'Escritorio', 'Libros', 'Refrigeradora',
+                    'Cafetera', 'Coche de bebé', 'Guitarra', 'Microondas')
+
+# Promedio de filas por usuario (distribución geométrica, con tope)
+PROMEDIO_POR_SECCION = {
+    'experiencias': 3,
+    'cursos': 4,
+    'habilidades': 7,
+    'reconocimientos': 1,
+    'productos_academicos': 1,
+    'productos_laborales': 2,
+    'productos_garage': 1.5,
+}
+MAXIMO_POR_SECCION = 40
+
+
+class GeneradorCV:
+
+    def __init__(self, semilla=42, prefijo='sintetico'):
+        self.rng = random.Random(semilla)
+        self.prefijo = prefijo
+        self.hoy = date.today()
+
+    def _cantidad(self, seccion):
+        """Geométrica con la media de la sección: muchos 0-2, cola larga."""
+        promedio = PROMEDIO_POR_SECCION[seccion]
+        cantidad = 0
+        while self.rng.random() < promedio / (promedio + 1) and cantidad < MAXIMO_POR_SECCION:
+            cantidad += 1
+        return cantidad
+
+    def _fecha(self, anios_atras_max, anios_atras_min=0):
+        return self.hoy - timedelta(days=self.rng.randint(anios_atras_min * 365, anios_atras_max * 365))
+
+    def _visible(self):
+        return self.rng.random() < 0.9
+
+    def _texto(self, palabras=25):
+        base = ('responsable de coordinar actividades del área con resultados medibles y mejora continua '
+                'de los procesos internos en equipo con otras unidades').split()
+        return ' '.join(self.rng.choice(base) for _ in range(palabras)).capitalize() + '.'
+
+    def registro(self, indice):
+        rng = self.rng
+        sexo = rng.choice(('H', 'M'))
+        nombres, apellidos = rng.choice(NOMBRES_POR_SEXO[sexo]), f'{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}'
+        return {
+            'username': f'{self.prefijo}{indice:06d}',
+            'email': f'{self.prefijo}{indice:06d}@example.com',
+            'first_name': nombres,
+            'last_name': apellidos,
+            'datos_personales': {
+                'nombres': nombres,
+                'apellidos': apellidos,
+                # 9 + índice: no choca con cédulas reales (la primera cifra es la provincia, 01-24)
+                'numero_cedula': f'9{indice:09d}',
+                'sexo': sexo,
+                'estado_civil': rng.choice(('Soltero/a', 'Casado/a', 'Divorciado/a', 'Unión Libre')),
+                'fecha_nacimiento': self._fecha(60, 20).isoformat(),
+                'lugar_nacimiento': rng.choice(CIUDADES),
+                'titulo_profesional': rng.choice(CARGOS),
+                'descripcion_perfil': self._texto(rng.randint(20, 120)),
+                'perfil_activo': rng.random() < 0.95,
+            },
+            'experiencias': [self._experiencia() for _ in range(self._cantidad('experiencias'))],
+            'cursos': [self._curso() for _ in range(self._cantidad('cursos'))],
+            'habilidades': self._habilidades(),
+            'reconocimientos': [self._reconocimiento() for _ in range(self._cantidad('reconocimientos'))],
+            'productos_academicos': [self._producto_academico() for _ in range(self._cantidad('productos_academicos'))],
+            'productos_laborales': [self._producto_laboral() for _ in range(self._cantidad('productos_laborales'))],
+            'productos_garage': [self._venta_garage() for _ in range(self._cantidad('productos_garage'))],
+        }
+
+    def _experiencia(self):
+        inicio = self._fecha(25, 1)
+        actual = self.rng.random() < 0.25
+        fin = None if actual else min(inicio + timedelta(days=self.rng.randint(90, 2000)), self.hoy)
+        return {
+            'cargo_desempenado': self.rng.choice(CARGOS),
+            'nombre_empresa': self.rng.choice(EMPRESAS),
+            'lugar_empresa': self.rng.choice(CIUDADES),
+            'fecha_inicio_gestion': inicio.isoformat(),
+            'fecha_fin_gestion': fin and fin.isoformat(),
+            'actualmente_trabajando': actual,
+            'descripcion_funciones': self._texto(self.rng.randint(15, 80)),
+            'activar_para_que_se_vea_en_front': self._visible(),
+        }
+
+    def _curso(self):
+        inicio = self._fecha(15, 1)
+        return {
+            'nombre_curso': self.rng.choice(CURSOS),
+            'fecha_inicio': inicio.isoformat(),
+            'fecha_fin': (inicio + timedelta(days=self.rng.randint(1, 180))).isoformat(),
+            'total_horas': self.rng.choice((8, 16, 20, 40, 60, 120)),
+            'descripcion_curso': self._texto(12),
+            'entidad_patrocinadora': self.rng.choice(ENTIDADES),
+            'activar_para_que_se_vea_en_front': self._visible(),
+        }
+
+    def _habilidades(self):
+        cantidad = min(self._cantidad('habilidades'), len(HABILIDADES))
+        elegidas = set()
+        while len(elegidas) < cantidad:
+            elegidas.add(self.rng.choices(HABILIDADES, weights=PESOS_HABILIDADES)[0])
+        return [{
+            'nombre': nombre,
+            'nivel': self.rng.choice(('basico', 'intermedio', 'intermedio', 'avanzado', 'experto')),
+            'activar_para_que_se_vea_en_front': self._visible(),
+        } for nombre in sorted(elegidas)]
+
+    def _reconocimiento(self):
+        return {
+            'tipo_reconocimiento': self.rng.choice(('Académico', 'Público', 'Privado')),
+            'fecha_reconocimiento': self._fecha(20).isoformat(),
+            'descripcion_reconocimiento': self._texto(10),
+            'entidad_patrocinadora': self.rng.choice(ENTIDADES + EMPRESAS),
+            'activar_para_que_se_vea_en_front': self._visible(),
+        }
+
+    def _producto_academico(self):
+        return {
+            'nombre_recurso': f'Estudio sobre {self.rng.choice(HABILIDADES).lower()}',
+            'clasificador': self.rng.choice(('Artículo', 'Libro', 'Ponencia', 'Tesis')),
+            'descripcion': self._texto(20),
+            # Algunos sin fecha: la lista pagina también el tramo de NULL
+            'fecha_publicacion': self._fecha(15).isoformat() if self.rng.random() < 0.85 else None,
+            'activar_para_que_se_vea_en_front': self._visible(),
+        }
+
+    def _producto_laboral(self):
+        return {
+            'nombre_producto': f'Sistema de {self.rng.choice(("ventas", "inventario", "nómina", "turnos"))}',
+            'fecha_producto': self._fecha(10).isoformat(),
+            'descripcion': self._texto(20),
+            'empresa_relacionada': self.rng.choice(EMPRESAS),
+            'activar_para_que_se_vea_en_front': self._visible(),
+        }
+
+    def _venta_garage(self):
+        return {
+            'nombre_producto': self.rng.choice(PRODUCTOS_GARAGE),
+            'estado_producto': self.rng.choice(('Bueno', 'Regular')),
+            'descripcion': self._texto(15),
+            'valor_del_bien': f'{self.rng.lognormvariate(3.5, 1):.2f}',
+            'activar_para_que_se_vea_en_front': self._visible(),
+            'vendido': self.rng.random() < 0.2,
+        }
+
+
+# ==========================================
+# FOTOS: un conjunto chico compartido por muchas filas
+# ==========================================
+# Cada foto se guarda una vez (el almacenamiento deduplica por contenido) con
+# sus derivados; las filas la reciben con update() y BlobMedia suma una
+# referencia por fila, como si cada usuario hubiera subido la misma imagen.
+
+FOTOS_POR_MODELO = {
+    DatosPersonales: ('foto_perfil', 'perfiles/', (800, 800), ANCHOS_PERFIL, 0.7),
+    VentaGarage: ('foto_producto', 'garage/', (1200, 900), ANCHOS_GARAGE, 0.8),
+}
+
+
+def _imagen_sintetica(rng, tamano):
+    """JPEG con degradado y figuras: comprime como una foto, no como un color plano."""
+    imagen = Image.new('RGB', tamano)
+    dibujo = ImageDraw.Draw(imagen)
+    inicio = [rng.randint(0, 255) for _ in range(3)]
+    fin = [rng.randint(0, 255) for _ in range(3)]
+    for y in range(tamano[1]):
+        t = y / tamano[1]
+        dibujo.line([(0, y), (tamano[0], y)], fill=tuple(int(a + (b - a) * t) for a, b in zip(inicio, fin)))
+    for _ in range(12):
+        x, y = rng.randrange(tamano[0]), rng.randrange(tamano[1])
+        radio = rng.randint(20, tamano[0] // 4)
+        dibujo.ellipse((x - radio, y - radio, x + radio, y + radio),
+                       fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    buffer = BytesIO()
+    imagen.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class FotosSinteticas:
+
+    def __init__(self, rng, cantidad=12):
+        self.rng = rng
+        self.cantidad = cantidad
+        self.fotos = {}  # modelo -> [(nombre, anchos)]
+        self.sin_usar = set()
+
+    def _preparar(self, modelo):
+        campo_nombre, carpeta, tamano, anchos, _ = FOTOS_POR_MODELO[modelo]
+        campo = modelo._meta.get_field(campo_nombre)
+        fotos = []
+        for numero in range(self.cantidad):
+            nombre = almacenamiento_media().save(
+                f'{carpeta}sintetica_{numero}.jpg', ContentFile(_imagen_sintetica(self.rng, tamano)))
+            # save() ya contó una referencia: se descuenta al asignarla por primera vez
+            self.sin_usar.add(nombre)
+            fotos.append((nombre, generar_derivados(FieldFile(None, campo, nombre), anchos)))
+        self.fotos[modelo] = fotos
+
+    def asignar(self, modelo, pks):
+        """Pone foto a una parte de las filas (según la proporción del modelo)."""
+        if modelo not in self.fotos:
+            self._preparar(modelo)
+        campo, _, _, _, proporcion = FOTOS_POR_MODELO[modelo]
+        por_foto = {}
+        for pk in pks:
+            if self.rng.random() < proporcion:
+                por_foto.setdefault(self.rng.randrange(len(self.fotos[modelo])), []).append(pk)
+        for posicion, elegidos in por_foto.items():
+            nombre, anchos = self.fotos[modelo][posicion]
+            modelo.objects.filter(pk__in=elegidos).update(**{campo: nombre, f'{campo}_anchos': anchos})
+            referencias = len(elegidos) - (1 if nombre in self.sin_usar else 0)
+            self.sin_usar.discard(nombre)
+            BlobMedia.objects.filter(nombre=nombre).update(referencias=F('referencias') + referencias)
+        return sum(len(elegidos) for elegidos in por_foto.values())
+
+    def liberar_sin_usar(self):
+        """Borra las fotos del conjunto que no recibió ninguna fila (y sus derivados)."""
+        for modelo, fotos in self.fotos.items():
+            anchos_por_nombre = dict(fotos)
+            for nombre in self.sin_usar & set(anchos_por_nombre):
+                campo = modelo._meta.get_field(FOTOS_POR_MODELO[modelo][0])
+                eliminar_derivados(FieldFile(None, campo, nombre), anchos_por_nombre[nombre])
+                almacenamiento_media().delete(nombre)
+        self.sin_usar.clear()
@@ -1,3 +1,1291 @@
-from django.test import TestCase
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from types import ModuleType
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.forms import FileField
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, resolve, reverse
+from django.utils import timezone
+from PIL import Image
+from .models import (
+    DatosPersonales, Direccion, ExperienciaLaboral, Reconocimiento, CursoRealizado,
+    ProductoAcademico, ProductoLaboral, VentaGarage, Habilidad, TrabajoPDF, BlobMedia,
+    ContadoresPerfil, DocumentoBusqueda, TerminoHabilidad, VersionPerfil
+)
+from .admision import AdmisionPDF, CubetaFichas, admision_pdf
+from .almacenamiento import almacenamiento_media, nombre_por_contenido, sha256_archivo
+from .cache_pdf import NIVEL_PODA, SECCIONES_PDF, CachePDF, clave_pdf
+from .cola_pdf import OBSOLETO, reclamar_trabajo, renderizar_trabajo
+from .habilidades import TrieHabilidades, obtener_termino
+from .imagenes import rutas_derivados
+from .importacion import MODELO_POR_SECCION, ImportadorCV
+from .management.commands import limpiar_media
+from .metricas import LIMITES_MS, HistogramaDeslizante, RegistroLatencias, anotar, fases_peticion, medir
+from .middleware import PresupuestoSQLExcedido, PresupuestoSQLMiddleware
+from .paginacion import Keyset
+from .forms import CursoRealizadoForm
+from .perfil import _consultas_visibles, cache_fragmentos
+from .plantillas import PlantillasMedidas
+from .pool_pdf import PoolPDF, pool_pdf
+from .versiones import obtener_versiones_secciones
+from .volcado import registros_cv, usuarios_a_volcar
+from . import contadores, views
+from .urls import urlpatterns
 
-# Create your tests here.
+# Sección del CV público -> índice parcial que debe resolverla
+INDICE_POR_SECCION = {
+    'experiencias': 'exp_visible_idx',
+    'reconocimientos': 'rec_visible_idx',
+    'cursos': 'curso_visible_idx',
+    'productos_academicos': 'pacad_visible_idx',
+    'productos_laborales': 'plab_visible_idx',
+    'habilidades': 'hab_visible_idx',
+    'productos_garage': 'garage_visible_idx',
+}
+
+
+# ==========================================
+# ÍNDICES DE LA LECTURA PÚBLICA (cv_publico / descargar_pdf)
+# ==========================================
+class IndicesLecturaPublicaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('indices', password='x')
+        otro = User.objects.create_user('otro', password='x')
+        # Filas de dos usuarios, visibles y ocultas, para que el planificador tenga qué descartar.
+        # Dos visibles por usuario: con una sola, ANALYZE estima una fila y SQLite prefiere
+        # ordenar antes que recorrer en orden el índice parcial (hay índices de lista que compiten)
+        for user in (cls.usuario, otro):
+            for visible in (True, True, False):
+                comunes = {'user': user, 'activar_para_que_se_vea_en_front': visible}
+                ExperienciaLaboral.objects.create(
+                    cargo_desempenado='Dev', nombre_empresa='ACME', lugar_empresa='Quito',
+                    email_empresa='rh@acme.com', sitio_web_empresa='https://acme.com',
+                    nombre_contacto_empresarial='Ana', telefono_contacto_empresarial='0999999999',
+                    fecha_inicio_gestion=date(2020, 1, 1), descripcion_funciones='x', **comunes
+                )
+                Reconocimiento.objects.create(
+                    tipo_reconocimiento='Académico', fecha_reconocimiento=date(2021, 1, 1),
+                    descripcion_reconocimiento='x', entidad_patrocinadora='ONG',
+                    nombre_contacto_auspicia='Ana', telefono_contacto_auspicia='0999999999', **comunes
+                )
+                CursoRealizado.objects.create(
+                    nombre_curso='Django', fecha_inicio=date(2021, 1, 1), fecha_fin=date(2021, 2, 1),
+                    total_horas=10, descripcion_curso='x', entidad_patrocinadora='ONG',
+                    nombre_contacto_auspicia='Ana', telefono_contacto_auspicia='0999999999',
+                    email_empresa_patrocinadora='a@ong.org', **comunes
+                )
+                ProductoAcademico.objects.create(
+                    nombre_recurso='Paper', clasificador='Artículo', descripcion='x',
+                    fecha_publicacion=date(2022, 1, 1), **comunes
+                )
+                ProductoLaboral.objects.create(
+                    nombre_producto='App', fecha_producto=date(2022, 1, 1), descripcion='x', **comunes
+                )
+                VentaGarage.objects.create(
+                    nombre_producto='Silla', estado_producto='Bueno', descripcion='x',
+                    valor_del_bien=10, **comunes
+                )
+                Habilidad.objects.create(nombre='Python', nivel='experto', **comunes)
+
+    def _plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Con tablas de prueba diminutas Postgres prefiere el seq scan
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return queryset.explain()
+
+    def test_cada_seccion_usa_su_indice_sin_ordenar(self):
+        for seccion, (relacion, queryset) in _consultas_visibles().items():
+            with self.subTest(seccion=seccion):
+                plan = self._plan(queryset.filter(user=self.usuario))
+                self.assertIn(INDICE_POR_SECCION[seccion], plan)
+                # SQLite: "USE TEMP B-TREE FOR ORDER BY"; Postgres: nodo Sort / Incremental Sort
+                self.assertNotIn('TEMP B-TREE', plan)
+                self.assertIsNone(re.search(r'\bSort\b', plan), plan)
+
+
+# ==========================================
+# PRESUPUESTO DE CONSULTAS POR URL (regresiones N+1)
+# ==========================================
+def sembrar_cv(user, filas=3, cedula='1710034065'):
+    """CV completo: datos personales, direcciones y `filas` registros visibles por sección."""
+    DatosPersonales.objects.create(
+        user=user, apellidos='Pérez', nombres='Ana', numero_cedula=cedula,
+        sexo='M', estado_civil='Soltero/a', descripcion_perfil='Desarrolladora backend'
+    )
+    Direccion.objects.create(user=user, tipo='Domicilio', direccion_completa='Av. Amazonas', es_principal=True)
+    Direccion.objects.create(user=user, tipo='Trabajo', direccion_completa='Av. Patria')
+    for i in range(filas):
+        ExperienciaLaboral.objects.create(
+            user=user, cargo_desempenado='Dev', nombre_empresa=f'Empresa {i}',
+            fecha_inicio_gestion=date(2015 + i, 1, 1), actualmente_trabajando=True, descripcion_funciones='x'
+        )
+        CursoRealizado.objects.create(
+            user=user, nombre_curso=f'Curso {i}', fecha_inicio=date(2020, 1, 1 + i), total_horas=10,
+            descripcion_curso='x', entidad_patrocinadora='ONG'
+        )
+        Reconocimiento.objects.create(
+            user=user, tipo_reconocimiento='Público', fecha_reconocimiento=date(2020, 1, 1 + i),
+            descripcion_reconocimiento='x', entidad_patrocinadora='ONG'
+        )
+        ProductoAcademico.objects.create(
+            user=user, nombre_recurso=f'Paper {i}', clasificador='Artículo', descripcion='x',
+            fecha_publicacion=date(2020, 1, 1 + i)
+        )
+        ProductoLaboral.objects.create(
+            user=user, nombre_producto=f'App {i}', fecha_producto=date(2020, 1, 1 + i), descripcion='x'
+        )
+        VentaGarage.objects.create(
+            user=user, nombre_producto=f'Silla {i}', estado_producto='Bueno', descripcion='x', valor_del_bien=10
+        )
+        Habilidad.objects.create(user=user, nombre=f'Python {i}', nivel='avanzado')
+
+
+CACHE_PDF_PRUEBAS = os.path.join(tempfile.gettempdir(), 'cv_pdf_pruebas')
+
+# Sufijo de las URLs de edición -> tabla
+SECCION_POR_URL = {
+    'experiencia': ExperienciaLaboral,
+    'curso': CursoRealizado,
+    'habilidad': Habilidad,
+    'reconocimiento': Reconocimiento,
+    'producto_academico': ProductoAcademico,
+    'producto_laboral': ProductoLaboral,
+    'venta_garage': VentaGarage,
+}
+
+PDF_COMPLETO = {f'incluir_{seccion}': 'on' for seccion in SECCIONES_PDF}
+
+# Nombre de la URL -> (máximo de consultas en frío, parámetros GET).
+# Incluye sesión y usuario.
+PRESUPUESTOS = {
+    'home': (3, None),
+    'signup': (2, None),
+    'signin': (2, None),
+    'logout': (4, None),
+    'metricas': (0, None),
+    'cv_publico': (12, None),
+    'descargar_pdf': (8, PDF_COMPLETO),
+    'encolar_pdf': (6, PDF_COMPLETO),  # get_or_create: SAVEPOINT propio al crear
+    'estado_pdf': (1, None),
+    'buscar_perfiles': (4, {'q': 'python'}),
+    'buscar_por_habilidades': (5, {'habilidad': ['python 0:avanzado', 'python 1']}),
+    'autocompletar_habilidades': (1, {'q': 'pyt'}),
+    'editar_datos_personales': (3, None),
+}
+for sufijo in SECCION_POR_URL:
+    PRESUPUESTOS[f'crear_{sufijo}'] = (2, None)
+    PRESUPUESTOS[f'editar_{sufijo}'] = (3, None)
+    PRESUPUESTOS[f'eliminar_{sufijo}'] = (3, None)
+# Listas paginadas por cursor: un tramo extra cuando la columna admite NULL
+PRESUPUESTOS.update({
+    'lista_experiencias': (3, None),
+    'lista_cursos': (3, None),
+    'lista_habilidades': (3, None),
+    'lista_reconocimientos': (3, None),
+    'lista_productos_academicos': (4, None),
+    'lista_productos_laborales': (3, None),
+    'lista_ventas_garage': (3, None),
+})
+
+
+@override_settings(CV_PDF_CACHE_DIR=CACHE_PDF_PRUEBAS)
+class PresupuestoConsultasTests(TestCase):
+    """
+    Cota superior de consultas para cada URL de tasks/urls.py, en frío (cachés
+    vacías). Un template que vuelva a recorrer relaciones sin precarga rompe
+    aquí. Al cambiar una cota, ajustar también SQL_PRESUPUESTO en settings.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana', password='x')
+        sembrar_cv(cls.usuario)
+        for i in range(3):
+            sembrar_cv(User.objects.create_user(f'otro{i}', password='x'), cedula=f'171003406{i}')
+        cls.trabajo = TrabajoPDF.objects.create(user=cls.usuario)
+        cls.pks = {
+            modelo: modelo.objects.filter(user=cls.usuario).values_list('pk', flat=True).first()
+            for modelo in SECCION_POR_URL.values()
+        }
+
+    def setUp(self):
+        # Sin la línea JSON de tasks.metricas por cada petición
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def _en_frio(self):
+        for nombre in caches:
+            caches[nombre].clear()
+        shutil.rmtree(CACHE_PDF_PRUEBAS, ignore_errors=True)
+
+    def _kwargs(self, nombre, patron):
+        claves = patron.pattern.converters
+        if 'username' in claves:
+            return {'username': 'ana'}
+        if nombre == 'estado_pdf':
+            return {'pk': self.trabajo.pk}
+        if 'pk' in claves:
+            return {'pk': self.pks[SECCION_POR_URL[nombre.split('_', 1)[1]]]}
+        return {}
+
+    def _contar(self, url, params=None):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url, params)
+        self.assertLess(response.status_code, 400, url)
+        return len(consultas)
+
+    def test_cada_url_tiene_presupuesto(self):
+        nombres = {patron.name for patron in urlpatterns}
+        self.assertEqual(nombres - set(PRESUPUESTOS), set())
+
+    def test_consultas_por_url(self):
+        for patron in urlpatterns:
+            with self.subTest(url=patron.name):
+                # logout cierra la sesión: se vuelve a entrar antes de cada URL
+                self.client.force_login(self.usuario)
+                self._en_frio()
+                url = reverse(patron.name, kwargs=self._kwargs(patron.name, patron))
+                limite, params = PRESUPUESTOS[patron.name]
+                self.assertLessEqual(self._contar(url, params), limite)
+
+    def test_cv_publico_no_crece_con_las_filas(self):
+        extenso = User.objects.create_user('extenso', password='x')
+        sembrar_cv(extenso, filas=12, cedula='1710034073')
+        for vista, params in (('cv_publico', None), ('descargar_pdf', PDF_COMPLETO)):
+            with self.subTest(vista=vista):
+                self._en_frio()
+                corto = self._contar(reverse(vista, args=['ana']), params)
+                self._en_frio()
+                largo = self._contar(reverse(vista, args=['extenso']), params)
+                self.assertEqual(corto, largo)
+
+    @override_settings(SQL_PRESUPUESTO={'POR_VISTA': {'home': 1}, 'MODO': 'error'})
+    def test_middleware_rechaza_la_vista_que_excede(self):
+        self.client.force_login(self.usuario)
+        middleware = PresupuestoSQLMiddleware(lambda request: self.client.get(reverse('home')))
+        request = RequestFactory().get(reverse('home'))
+        request.resolver_match = resolve(reverse('home'))
+        with self.assertRaisesMessage(PresupuestoSQLExcedido, '(home)'):
+            middleware(request)
+
+
+# ==========================================
+# PAGINACIÓN POR CURSOR (KEYSET)
+# ==========================================
+class PaginacionKeysetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('ana', password='x')
+        # Dos fechas repetidas (desempate por pk) y un tramo de NULL al final
+        fechas = [date(2021, 5, 1), date(2023, 1, 1), None, date(2021, 5, 1), None, date(2022, 3, 1), None, None]
+        for i, fecha in enumerate(fechas):
+            ProductoAcademico.objects.create(
+                user=usuario, nombre_recurso=f'Paper {i}', clasificador='Artículo', descripcion='x',
+                fecha_publicacion=fecha
+            )
+        productos = ProductoAcademico.objects.filter(user=usuario)
+        con_fecha = sorted(
+            productos.exclude(fecha_publicacion=None), key=lambda p: (p.fecha_publicacion, p.pk), reverse=True
+        )
+        sin_fecha = sorted(productos.filter(fecha_publicacion=None), key=lambda p: p.pk, reverse=True)
+        cls.esperado = [producto.pk for producto in con_fecha + sin_fecha]
+        cls.keyset = Keyset(productos, '-fecha_publicacion')
+
+    def test_recorre_hacia_adelante_y_hacia_atras(self):
+        paginas = [self.keyset.pagina(por_pagina=3)]
+        while paginas[-1].has_next():
+            paginas.append(self.keyset.pagina(paginas[-1].cursor_siguiente, por_pagina=3))
+        adelante = [[producto.pk for producto in pagina] for pagina in paginas]
+        self.assertEqual(adelante, [self.esperado[0:3], self.esperado[3:6], self.esperado[6:8]])
+        self.assertFalse(paginas[0].has_previous())
+
+        # De vuelta desde la última: las mismas páginas, cruzando otra vez del tramo NULL al de fechas
+        atras = [adelante[-1]]
+        pagina = paginas[-1]
+        while pagina.has_previous():
+            pagina = self.keyset.pagina(pagina.cursor_anterior, por_pagina=3)
+            atras.insert(0, [producto.pk for producto in pagina])
+        self.assertEqual(atras, adelante)
+
+    def test_un_cursor_invalido_muestra_la_primera_pagina(self):
+        pagina = self.keyset.pagina('no-es-un-cursor', por_pagina=3)
+        self.assertEqual([producto.pk for producto in pagina], self.esperado[:3])
+
+
+# ==========================================
+# CACHÉ DE FRAGMENTOS POR SECCIÓN (VersionSeccion)
+# ==========================================
+class FragmentosPorSeccionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana', password='x')
+        sembrar_cv(cls.usuario)
+
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        for nombre in caches:
+            caches[nombre].clear()
+
+    def fragmentos_guardados(self):
+        """Claves de los {% cache %} que se (re)construyen al mostrar el CV público."""
+        cache = cache_fragmentos()
+        with mock.patch.object(cache, 'set', wraps=cache.set) as guardar:
+            self.assertEqual(self.client.get(reverse('cv_publico', args=['ana'])).status_code, 200)
+        return {llamada.args[0] for llamada in guardar.call_args_list}
+
+    def test_editar_un_curso_solo_reconstruye_los_cursos(self):
+        self.assertTrue(self.fragmentos_guardados())
+        antes = obtener_versiones_secciones(self.usuario.pk)
+
+        curso = CursoRealizado.objects.filter(user=self.usuario).first()
+        formulario = CursoRealizadoForm(instance=curso)
+        datos = {
+            nombre: formulario[nombre].value() for nombre, campo in formulario.fields.items()
+            if not isinstance(campo, FileField) and formulario[nombre].value() is not None
+        }
+        datos['nombre_curso'] = 'Curso editado'
+        self.client.force_login(self.usuario)
+        respuesta = self.client.post(reverse('editar_curso', args=[curso.pk]), datos)
+        self.assertRedirects(respuesta, reverse('lista_cursos'))
+        self.client.logout()
+
+        despues = obtener_versiones_secciones(self.usuario.pk)
+        self.assertEqual({seccion for seccion in despues if despues[seccion] != antes[seccion]}, {'cursos'})
+        # Solo los fragmentos de cursos (página y vista previa del PDF) cambian de clave
+        self.assertEqual(self.fragmentos_guardados(), {
+            make_template_fragment_key(fragmento, [self.usuario.pk, despues['cursos']])
+            for fragmento in ('cv_cursos', 'cv_pdf_cursos')
+        })
+
+
+# ==========================================
+# MÉTRICAS POR PETICIÓN (Server-Timing, log y /metricas/)
+# ==========================================
+class MetricasTests(TestCase):
+
+    @override_settings(SERVER_TIMING=True)
+    def test_encabezado_y_linea_de_log(self):
+        self.client.force_login(User.objects.create_user('ana', password='x'))
+        with self.assertLogs('tasks.metricas', logging.INFO) as registro:
+            respuesta = self.client.get(reverse('home'))
+        self.assertRegex(respuesta['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ consultas"')
+        self.assertRegex(respuesta['Server-Timing'], r'total;dur=[\d.]+$')
+        linea = json.loads(registro.records[0].getMessage())
+        self.assertEqual((linea['vista'], linea['metodo'], linea['estado']), ('home', 'GET', 200))
+        self.assertIsInstance(linea['consultas'], int)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_sin_server_timing_no_hay_encabezado(self):
+        with self.assertLogs('tasks.metricas', logging.INFO):
+            self.assertNotIn('Server-Timing', self.client.get(reverse('home')))
+
+    def test_el_log_por_peticion_esta_apagado_por_defecto(self):
+        self.assertFalse(logging.getLogger('tasks.metricas').isEnabledFor(logging.INFO))
+
+    def test_fuera_de_una_peticion_no_se_mide_nada(self):
+        with medir('pdf'):
+            anotar('pdf_bytes', 10)
+
+    def test_fases_acumuladas(self):
+        with fases_peticion() as fases:
+            for _ in range(2):
+                with medir('pdf'):
+                    anotar('pdf_bytes', 10)
+        self.assertRegex(fases.server_timing(), r'^pdf;dur=[\d.]+;desc="20 bytes", total;dur=[\d.]+$')
+        self.assertEqual(set(fases.como_dict()), {'total_ms', 'pdf_ms', 'pdf_bytes'})
+
+    def test_plantillas_medidas(self):
+        motor = PlantillasMedidas({'NAME': 'medidas', 'DIRS': [], 'APP_DIRS': False, 'OPTIONS': {}})
+        with fases_peticion() as fases:
+            self.assertEqual(motor.from_string('hola {{ nombre }}').render({'nombre': 'Ana'}), 'hola Ana')
+        self.assertIn('<cadena>', fases.como_dict()['plantillas_ms'])
+        self.assertIn('plantilla;dur=', fases.server_timing())
+
+    def test_histograma_de_ventana_deslizante(self):
+        histograma = HistogramaDeslizante(ventanas=2, segundos_ventana=60)
+        for milisegundos, ahora in ((3, 0), (30, 10), (700, 70)):
+            histograma.observar(milisegundos, ahora=ahora)
+        cubetas, suma, cantidad = histograma.resumen(ahora=70)
+        self.assertEqual((suma, cantidad), (733, 3))
+        self.assertEqual([cubetas[LIMITES_MS.index(limite)] for limite in (5, 50, 1000)], [1, 1, 1])
+        # La ventana del segundo 0 ya salió: solo queda la del 70
+        self.assertEqual(histograma.resumen(ahora=130)[1:], (700, 1))
+
+    def test_texto_prometheus(self):
+        registro = RegistroLatencias()
+        registro.observar('home', 3)
+        registro.observar('home', 30)
+        texto = registro.texto()
+        for linea in ('cv_latencia_ms_bucket{vista="home",le="5"} 1',
+                      'cv_latencia_ms_bucket{vista="home",le="50"} 2',
+                      'cv_latencia_ms_bucket{vista="home",le="+Inf"} 2',
+                      'cv_latencia_ms_count{vista="home"} 2'):
+            self.assertIn(linea, texto.splitlines())
+
+    def test_metricas_solo_para_las_ips_permitidas(self):
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('metricas'), REMOTE_ADDR='203.0.113.9').status_code, 404)
+
+
+# ==========================================
+# CONTADORES DEL DASHBOARD: fila y contador juntos
+# ==========================================
+class ContadoresAtomicosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana', password='x')
+        sembrar_cv(cls.usuario)
+
+    def test_si_falla_el_contador_no_queda_la_fila(self):
+        with mock.patch('tasks.signals.ajustar_contador', side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            Habilidad.objects.create(user=self.usuario, nombre='Go', nivel='basico')
+        self.assertFalse(Habilidad.objects.filter(user=self.usuario, nombre='Go').exists())
+
+    def test_sin_fila_de_contadores_se_crea_con_los_totales_reales(self):
+        ContadoresPerfil.objects.filter(user=self.usuario).delete()
+        Habilidad.objects.create(user=self.usuario, nombre='Go', nivel='basico')
+        fila = ContadoresPerfil.objects.get(user=self.usuario)
+        self.assertEqual((fila.total_habilidades, fila.total_cursos), (4, 3))
+
+    def test_fila_creada_a_la_vez_por_otra_transaccion(self):
+        ContadoresPerfil.objects.filter(user=self.usuario).delete()
+        conteos_reales = contadores.conteos_reales
+
+        def crear_antes(user_ids):
+            # Otra petición del mismo usuario inserta la fila entre el UPDATE y el INSERT
+            ContadoresPerfil.objects.create(user=self.usuario, total_habilidades=10)
+            return conteos_reales(user_ids)
+
+        with mock.patch('tasks.contadores.conteos_reales', side_effect=crear_antes):
+            Habilidad.objects.create(user=self.usuario, nombre='Go', nivel='basico')
+        self.assertTrue(Habilidad.objects.filter(user=self.usuario, nombre='Go').exists())
+        self.assertEqual(ContadoresPerfil.objects.get(user=self.usuario).total_habilidades, 11)
+
+    def test_signup_con_usuario_repetido_muestra_el_error(self):
+        # Con sesión abierta: antes el IntegrityError rompía la transacción de la petición
+        self.client.force_login(self.usuario)
+        respuesta = self.client.post(reverse('signup'), {'username': 'ana', 'password1': 'x', 'password2': 'x'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'El usuario ya existe.')
+
+
+# ==========================================
+# CACHÉ DE PDFs
+# ==========================================
+class ClavePDFTests(TestCase):
+
+    def test_la_clave_cambia_de_un_dia_a_otro(self):
+        # El PDF muestra la edad: tras un cumpleaños no debe servirse el de ayer
+        with mock.patch('tasks.cache_pdf.date') as fecha:
+            fecha.today.return_value = date(2026, 3, 1)
+            hoy = clave_pdf(1, 7, 63)
+            fecha.today.return_value = date(2026, 3, 2)
+            self.assertNotEqual(clave_pdf(1, 7, 63), hoy)
+
+
+class CachePDFTests(TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, True)
+        self.cache = CachePDF(self.directorio, max_bytes=100)
+
+    def test_solo_recorre_el_directorio_al_pasar_el_limite(self):
+        with mock.patch.object(CachePDF, '_archivos', autospec=True, side_effect=CachePDF._archivos) as recorrer:
+            for numero in range(3):
+                self.cache.guardar(f'pdf-{numero}', b'x' * 30)
+            # El primero cuenta lo que ya había; los demás solo suman
+            self.assertEqual(recorrer.call_count, 1)
+            self.cache.guardar('pdf-3', b'x' * 30)
+            self.assertEqual(recorrer.call_count, 2)
+        # Pasó de 100 bytes: quedan los más recientes, por debajo de NIVEL_PODA
+        self.assertIsNone(self.cache.obtener('pdf-0'))
+        self.assertEqual(self.cache.obtener('pdf-3'), b'x' * 30)
+        self.assertLessEqual(self.cache._total, 100 * NIVEL_PODA)
+
+    def test_reescribir_una_clave_no_infla_el_total(self):
+        for _ in range(5):
+            self.cache.guardar('pdf', b'x' * 30)
+        self.assertEqual(self.cache._total, 30)
+
+
+# ==========================================
+# FRESCURA DEL CV (ETag / Last-Modified)
+# ==========================================
+class FrescuraCVTests(TestCase):
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        sembrar_cv(User.objects.create_user('ana', password='x'))
+        for nombre in caches:
+            caches[nombre].clear()
+
+    def test_cv_publico_responde_304_con_etag_o_fecha(self):
+        respuesta = self.client.get('/cv/ana/')
+        self.assertEqual(respuesta.status_code, 200)
+        for cabecera, valor in (('If-None-Match', respuesta['ETag']), ('If-Modified-Since', respuesta['Last-Modified'])):
+            repetida = self.client.get('/cv/ana/', headers={cabecera: valor})
+            self.assertEqual(repetida.status_code, 304, cabecera)
+
+    def test_al_cambiar_el_dia_no_responde_304(self):
+        respuesta = self.client.get('/cv/ana/')
+        manana = timezone.localdate() + timedelta(days=1)
+        with mock.patch('tasks.frescura._hoy', return_value=manana):
+            for cabecera, valor in (('If-None-Match', respuesta['ETag']), ('If-Modified-Since', respuesta['Last-Modified'])):
+                repetida = self.client.get('/cv/ana/', headers={cabecera: valor})
+                self.assertEqual(repetida.status_code, 200, cabecera)
+
+
+# ==========================================
+# EXPORTACIÓN ESTÁTICA DEL CV PÚBLICO
+# ==========================================
+CV_EXPORT_PRUEBAS = os.path.join(tempfile.gettempdir(), 'cv_export_pruebas')
+
+
+@override_settings(CV_EXPORT_DIR=CV_EXPORT_PRUEBAS, CV_EXPORT_SERVIR=True)
+class ExportacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana', password='x')
+        sembrar_cv(cls.usuario)
+        DatosPersonales.objects.filter(user=cls.usuario).update(fecha_nacimiento=date(1990, 6, 15))
+
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        shutil.rmtree(CV_EXPORT_PRUEBAS, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, CV_EXPORT_PRUEBAS, True)
+
+    def test_la_copia_exportada_no_sobrevive_a_un_cumpleanos(self):
+        with mock.patch('tasks.exportacion.date') as fecha:
+            fecha.today.return_value = date(2026, 6, 14)
+            call_command('exportar_cvs', stdout=StringIO())
+            # WhiteNoise responde en streaming; el render dinámico no
+            self.assertTrue(self.client.get(reverse('cv_publico', args=['ana'])).streaming)
+            fecha.today.return_value = date(2026, 6, 15)
+            self.assertFalse(self.client.get(reverse('cv_publico', args=['ana'])).streaming)
+            call_command('exportar_cvs', '--incremental', stdout=StringIO())
+            self.assertTrue(self.client.get(reverse('cv_publico', args=['ana'])).streaming)
+
+
+# ==========================================
+# BÚSQUEDA DE TEXTO COMPLETO (/buscar/)
+# ==========================================
+class BusquedaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Los documentos se recalculan en on_commit
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.ana = User.objects.create_user('ana', password='x')
+            sembrar_cv(cls.ana)
+            cls.beto = User.objects.create_user('beto', password='x')
+            sembrar_cv(cls.beto, cedula='0926687856')
+
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def encontrados(self, q):
+        respuesta = self.client.get(reverse('buscar_perfiles'), {'q': q})
+        return sorted(resultado['username'] for resultado in respuesta.context['pagina'].object_list)
+
+    def test_un_perfil_oculto_no_aparece(self):
+        self.assertEqual(self.encontrados('backend'), ['ana', 'beto'])
+        datos = self.beto.datos_personales
+        datos.perfil_activo = False
+        with self.captureOnCommitCallbacks(execute=True):
+            datos.save()
+        self.assertEqual(self.encontrados('backend'), ['ana'])
+
+    def test_lo_no_visible_no_se_indexa(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ExperienciaLaboral.objects.create(
+                user=self.ana, cargo_desempenado='Astronauta', nombre_empresa='NASA',
+                fecha_inicio_gestion=date(2010, 1, 1), descripcion_funciones='x',
+                activar_para_que_se_vea_en_front=False
+            )
+        self.assertEqual(self.encontrados('astronauta'), [])
+
+    def test_editar_y_borrar_actualizan_el_indice(self):
+        habilidad = Habilidad.objects.filter(user=self.ana).first()
+        habilidad.nombre = 'Haskell'
+        with self.captureOnCommitCallbacks(execute=True):
+            habilidad.save()
+        # Por prefijo: "hask" encuentra "Haskell"
+        self.assertEqual(self.encontrados('hask'), ['ana'])
+        with self.captureOnCommitCallbacks(execute=True):
+            habilidad.delete()
+        self.assertEqual(self.encontrados('haskell'), [])
+
+
+# ==========================================
+# VOCABULARIO DE HABILIDADES
+# ==========================================
+class TerminosHabilidadTests(TestCase):
+
+    def test_la_clave_normalizada_cabe_en_la_columna(self):
+        # 'ß' se vuelve 'ss' al normalizar: 100 caracteres pasan a 200
+        usuario = User.objects.create_user('ana', password='x')
+        habilidad = Habilidad.objects.create(user=usuario, nombre='ß' * 100, nivel='basico')
+        self.assertEqual(habilidad.termino.clave, 's' * 100)
+        self.assertEqual(obtener_termino('SS' * 60), habilidad.termino)
+
+    def test_el_trie_ve_terminos_confirmados_con_fecha_anterior_a_la_marca(self):
+        trie = TrieHabilidades()
+        TerminoHabilidad.objects.create(clave='python', nombre='Python', total_usuarios=3)
+        self.assertEqual(trie.sugerir('py'), [('Python', 3)])
+        # Guardado antes de la última sincronización, pero confirmado después
+        TerminoHabilidad.objects.create(clave='pytest', nombre='pytest', total_usuarios=1)
+        TerminoHabilidad.objects.filter(clave='pytest').update(fecha_actualizacion=trie.marca - timedelta(minutes=1))
+        self.assertEqual(trie.sugerir('py'), [('Python', 3), ('pytest', 1)])
+
+
+# ==========================================
+# VOLCADO E IMPORTACIÓN DE CVs
+# ==========================================
+class VolcadoImportacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana', email='ana@example.com', password='x')
+        sembrar_cv(cls.usuario)
+
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, True)
+
+    def filas_por_seccion(self, user):
+        return {modelo: modelo.objects.filter(user=user).count() for modelo in MODELO_POR_SECCION.values()}
+
+    def test_el_volcado_se_vuelve_a_importar(self):
+        esperadas = self.filas_por_seccion(self.usuario)
+        for formato, extension in (('ndjson', 'jsonl'), ('csv', 'csv')):
+            with self.subTest(formato=formato):
+                archivo = os.path.join(self.directorio, f'cvs.{extension}')
+                call_command('volcar_cvs', '--formato', formato, '--salida', archivo, stderr=StringIO())
+                User.objects.filter(username='ana').delete()
+                errores = StringIO()
+                call_command('importar_cvs', archivo, stdout=StringIO(), stderr=errores)
+                self.assertEqual(errores.getvalue(), '')
+                usuario = User.objects.get(username='ana')
+                self.assertEqual(usuario.email, 'ana@example.com')
+                self.assertEqual(usuario.datos_personales.numero_cedula, '1710034065')
+                self.assertEqual(self.filas_por_seccion(usuario), esperadas)
+
+    def test_los_metadatos_solo_con_la_opcion(self):
+        registro, = registros_cv(usuarios_a_volcar())
+        self.assertNotIn('user_id', registro)
+        self.assertNotIn('id', registro['experiencias'][0])
+        registro, = registros_cv(usuarios_a_volcar(), metadatos=True)
+        self.assertEqual(registro['user_id'], self.usuario.pk)
+        self.assertIn('termino_id', registro['habilidades'][0])
+
+
+def registro_importado(username, cedula, **extra):
+    return {
+        'username': username, 'email': f'{username}@example.com',
+        'datos_personales': {
+            'nombres': username.title(), 'apellidos': 'Mora', 'numero_cedula': cedula,
+            'sexo': 'M', 'estado_civil': 'Soltero/a', 'descripcion_perfil': 'Analista de datos',
+        },
+        **extra,
+    }
+
+
+class ImportacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = User.objects.create_user('ana', password='x')
+        sembrar_cv(cls.ana)
+
+    def importar(self, *registros):
+        importador = ImportadorCV()
+        errores = importador.procesar_lote([(linea, registro, None) for linea, registro in enumerate(registros, 1)])
+        return importador, {linea: errores for linea, username, errores in errores}
+
+    def test_duplicados_en_el_archivo_y_en_la_base(self):
+        importador, errores = self.importar(
+            registro_importado('carla', '0926687856'),
+            registro_importado('carla', '1713175071'),   # username repetido en el archivo
+            registro_importado('dario', '0926687856'),   # cédula repetida en el archivo
+            registro_importado('ana', '1804329090'),     # username ya en la base
+            registro_importado('elena', '1710034065'),   # cédula ya en la base
+        )
+        self.assertEqual(importador.usuarios_importados, 1)
+        self.assertEqual(errores, {
+            2: {'username': ['Ya existe un usuario con este nombre.']},
+            3: {'datos_personales.numero_cedula': ['Ya existe un perfil con esta cédula.']},
+            4: {'username': ['Ya existe un usuario con este nombre.']},
+            5: {'datos_personales.numero_cedula': ['Ya existe un perfil con esta cédula.']},
+        })
+        # Un lote posterior también ve lo importado en el anterior
+        importador.procesar_lote([(6, registro_importado('carla', '0102030405'), None)])
+        self.assertEqual(importador.errores, 5)
+
+    def test_reporta_todos_los_errores_del_registro(self):
+        registro = registro_importado(
+            'carla', '0926687856', email='no-es-correo', edad=30,
+            experiencias=[{'cargo_desempenado': 'Dev', 'fecha_inicio_gestion': 'ayer'}],
+            cursos={'nombre_curso': 'x'},
+            habilidades=[{'nombre': 'Go', 'nivel': 'basico', 'id': 4}],
+        )
+        importador, errores = self.importar(registro)
+        self.assertEqual(importador.usuarios_importados, 0)
+        self.assertFalse(User.objects.filter(username='carla').exists())
+        self.assertEqual(set(errores[1]), {
+            'registro', 'email', 'cursos', 'habilidades[0]', 'experiencias[0].fecha_inicio_gestion',
+            'experiencias[0].nombre_empresa', 'experiencias[0].descripcion_funciones',
+        })
+
+    def test_pone_al_dia_lo_que_mantienen_las_senales(self):
+        Habilidad.objects.create(user=self.ana, nombre='Django', nivel='avanzado')
+        registro = registro_importado(
+            'carla', '0926687856',
+            experiencias=[{
+                'cargo_desempenado': 'Analista', 'nombre_empresa': 'ACME', 'fecha_inicio_gestion': '2020-01-01',
+                'actualmente_trabajando': True, 'descripcion_funciones': 'Reportes',
+            }],
+            habilidades=[{'nombre': ' DJANGO ', 'nivel': 'basico'}, {'nombre': 'Pandas', 'nivel': 'avanzado'}],
+        )
+        importador, errores = self.importar(registro)
+        self.assertEqual(errores, {})
+        carla = User.objects.get(username='carla')
+        contadores = ContadoresPerfil.objects.get(user=carla)
+        self.assertEqual((contadores.total_experiencias, contadores.total_habilidades), (1, 2))
+        self.assertEqual(VersionPerfil.objects.get(user=carla).version, 1)
+        # El término ya existente se reutiliza y cuenta a los dos usuarios
+        self.assertEqual(TerminoHabilidad.objects.get(clave='django').total_usuarios, 2)
+        self.assertEqual(TerminoHabilidad.objects.get(clave='pandas').total_usuarios, 1)
+        self.assertIn('Pandas', DocumentoBusqueda.objects.get(user=carla).perfil)
+
+
+# ==========================================
+# DERIVADOS DE FOTOS (WebP/JPEG redimensionados)
+# ==========================================
+def foto_subida(ancho=400, alto=300, nombre='foto.png'):
+    buffer = BytesIO()
+    Image.new('RGBA', (ancho, alto), (200, 30, 30, 128)).save(buffer, 'PNG')
+    return SimpleUploadedFile(nombre, buffer.getvalue(), content_type='image/png')
+
+
+class DerivadosFotosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana', password='x')
+        sembrar_cv(cls.usuario)
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, True)
+        ajuste = override_settings(MEDIA_ROOT=self.media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.datos = DatosPersonales.objects.get(user=self.usuario)
+
+    def test_se_generan_despues_del_commit_sin_ampliar(self):
+        self.datos.foto_perfil = foto_subida()
+        with self.captureOnCommitCallbacks() as pendientes:
+            self.datos.save()
+            # Dentro de la transacción todavía no se codificó nada
+            self.assertEqual(DatosPersonales.objects.get(pk=self.datos.pk).foto_perfil_anchos, [])
+        for callback in pendientes:
+            callback()
+        datos = DatosPersonales.objects.get(pk=self.datos.pk)
+        # 500 > 400 px de la foto: ese derivado queda con el ancho original
+        self.assertEqual(datos.foto_perfil_anchos, [250, 400])
+        for nombre in rutas_derivados(datos.foto_perfil.name, [250, 400]):
+            self.assertTrue(default_storage.exists(nombre), nombre)
+        with default_storage.open(rutas_derivados(datos.foto_perfil.name, [250])[0]) as derivado:
+            imagen = Image.open(derivado)
+            self.assertEqual((imagen.format, imagen.size), ('WEBP', (250, 188)))
+
+    def test_srcset_y_src(self):
+        self.datos.foto_perfil = foto_subida()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.datos.save()
+        foto = DatosPersonales.objects.get(pk=self.datos.pk).foto_perfil_derivados
+        webp_250, jpg_250, webp_400, jpg_400 = (
+            default_storage.url(nombre) for nombre in rutas_derivados(foto.archivo.name, [250, 400])
+        )
+        self.assertEqual(foto.srcset_webp, f'{webp_250} 250w, {webp_400} 400w')
+        self.assertEqual(foto.srcset_jpg, f'{jpg_250} 250w, {jpg_400} 400w')
+        self.assertEqual(foto.src, jpg_250)
+
+    def test_una_bomba_de_descompresion_deja_el_original(self):
+        self.datos.foto_perfil = foto_subida()
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.datos.save()
+        datos = DatosPersonales.objects.get(pk=self.datos.pk)
+        self.assertEqual(datos.foto_perfil_anchos, [])
+        self.assertEqual(datos.foto_perfil_derivados.src, datos.foto_perfil.url)
+
+    def test_una_foto_reemplazada_antes_del_commit_no_genera_derivados(self):
+        self.datos.foto_perfil = foto_subida()
+        with self.captureOnCommitCallbacks() as pendientes:
+            self.datos.save()
+            DatosPersonales.objects.filter(pk=self.datos.pk).update(foto_perfil='')
+        with mock.patch('tasks.signals.generar_derivados') as generar:
+            for callback in pendientes:
+                callback()
+        generar.assert_not_called()
+
+
+# ==========================================
+# DEDUPLICACIÓN DE MEDIA
+# ==========================================
+class DeduplicarMediaTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, True)
+        ajuste = override_settings(MEDIA_ROOT=media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+    def test_un_archivo_ya_nombrado_por_hash_no_se_borra(self):
+        storage = almacenamiento_media()
+        ruta = storage.path('perfiles/x.jpg')
+        os.makedirs(os.path.dirname(ruta))
+        with open(ruta, 'wb') as archivo:
+            archivo.write(b'foto')
+        # Subido con su hash antes de que existiera BlobMedia
+        nombre = nombre_por_contenido('perfiles/x.jpg', sha256_archivo(ruta))
+        os.rename(ruta, storage.path(nombre))
+        usuario = User.objects.create_user('ana', password='x')
+        sembrar_cv(usuario)
+        DatosPersonales.objects.filter(user=usuario).update(foto_perfil=nombre)
+
+        call_command('deduplicar_media', stdout=StringIO())
+
+        self.assertTrue(os.path.isfile(storage.path(nombre)))
+        self.assertEqual(BlobMedia.objects.get(nombre=nombre).referencias, 1)
+
+
+# ==========================================
+# SERVICIO DE ARCHIVOS MEDIA (Range, ETag, X-Accel-Redirect)
+# ==========================================
+class ServirMediaTests(TestCase):
+
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, True)
+        ajuste = override_settings(MEDIA_ROOT=self.media, MEDIA_ACCEL='')
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        for nombre, contenido in (('doc.txt', b'0123456789'), ('vacio.txt', b'')):
+            with open(os.path.join(self.media, nombre), 'wb') as archivo:
+                archivo.write(contenido)
+
+    def pedir(self, nombre='doc.txt', **cabeceras):
+        return self.client.get(reverse('media', args=[nombre]), headers=cabeceras)
+
+    def contenido(self, respuesta):
+        return b''.join(respuesta.streaming_content)
+
+    def test_archivo_completo(self):
+        respuesta = self.pedir()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.contenido(respuesta), b'0123456789')
+        self.assertEqual(respuesta['Content-Length'], '10')
+        self.assertEqual(respuesta['Accept-Ranges'], 'bytes')
+        self.assertIn('public', respuesta['Cache-Control'])
+
+    def test_rango_parcial_y_sufijo(self):
+        for rango, esperado, content_range in (
+            ('bytes=2-5', b'2345', 'bytes 2-5/10'),
+            ('bytes=7-', b'789', 'bytes 7-9/10'),
+            ('bytes=-3', b'789', 'bytes 7-9/10'),
+            ('bytes=-50', b'0123456789', 'bytes 0-9/10'),
+        ):
+            with self.subTest(rango=rango):
+                respuesta = self.pedir(Range=rango)
+                self.assertEqual(respuesta.status_code, 206)
+                self.assertEqual(self.contenido(respuesta), esperado)
+                self.assertEqual(respuesta['Content-Range'], content_range)
+                self.assertEqual(respuesta['Content-Length'], str(len(esperado)))
+
+    def test_rango_imposible_responde_416(self):
+        for nombre, rango, content_range in (
+            ('doc.txt', 'bytes=10-', 'bytes */10'),
+            ('doc.txt', 'bytes=-0', 'bytes */10'),
+            ('vacio.txt', 'bytes=-5', 'bytes */0'),
+            ('vacio.txt', 'bytes=0-', 'bytes */0'),
+        ):
+            with self.subTest(nombre=nombre, rango=rango):
+                respuesta = self.pedir(nombre, Range=rango)
+                self.assertEqual(respuesta.status_code, 416)
+                self.assertEqual(respuesta['Content-Range'], content_range)
+
+    def test_etag_condicional(self):
+        etag = self.pedir()['ETag']
+        self.assertEqual(self.pedir(If_None_Match=etag).status_code, 304)
+        # If-Range con otra versión: el archivo completo, no el rango
+        respuesta = self.pedir(Range='bytes=2-5', If_Range='"otra"')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.pedir(Range='bytes=2-5', If_Range=etag).status_code, 206)
+
+    def test_el_proxy_envia_el_archivo(self):
+        with self.settings(MEDIA_ACCEL='x-accel-redirect', MEDIA_ACCEL_PREFIX='/media-interno/'):
+            respuesta = self.pedir()
+            self.assertEqual(respuesta['X-Accel-Redirect'], '/media-interno/doc.txt')
+            self.assertEqual(respuesta.content, b'')
+        with self.settings(MEDIA_ACCEL='x-sendfile'):
+            self.assertEqual(self.pedir()['X-Sendfile'], os.path.join(self.media, 'doc.txt'))
+        self.assertEqual(self.pedir('no-existe.txt').status_code, 404)
+
+
+# ==========================================
+# LIMPIEZA DE MEDIA HUÉRFANA
+# ==========================================
+class LimpiarMediaTests(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, True)
+        ajuste = override_settings(MEDIA_ROOT=self.media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        usuario = User.objects.create_user('ana', password='x')
+        sembrar_cv(usuario)
+        # update(): sin señales, el archivo se crea a mano
+        DatosPersonales.objects.filter(user=usuario).update(foto_perfil='perfiles/vivo.jpg', foto_perfil_anchos=[160])
+        self.viejos = ['perfiles/vivo.jpg', *rutas_derivados('perfiles/vivo.jpg', [160]), 'perfiles/huerfano.jpg']
+        for nombre in self.viejos:
+            self.escribir(nombre, antiguedad=48 * 3600)
+        self.escribir('perfiles/reciente.jpg')
+        BlobMedia.objects.create(nombre='perfiles/huerfano.jpg', sha256='0' * 64, tamano=4)
+
+    def escribir(self, nombre, antiguedad=0):
+        ruta = os.path.join(self.media, nombre)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, 'wb') as archivo:
+            archivo.write(b'data')
+        instante = time.time() - antiguedad
+        os.utime(ruta, (instante, instante))
+
+    def existentes(self):
+        return sorted(
+            os.path.relpath(os.path.join(raiz, nombre), self.media).replace(os.sep, '/')
+            for raiz, carpetas, nombres in os.walk(self.media) for nombre in nombres
+        )
+
+    def test_solo_borra_los_viejos_sin_referencia(self):
+        antes = self.existentes()
+        call_command('limpiar_media', stdout=StringIO())
+        self.assertEqual(self.existentes(), [nombre for nombre in antes if nombre != 'perfiles/huerfano.jpg'])
+        self.assertFalse(BlobMedia.objects.filter(nombre='perfiles/huerfano.jpg').exists())
+
+    def test_dry_run_no_toca_nada(self):
+        antes = self.existentes()
+        salida = StringIO()
+        call_command('limpiar_media', '--dry-run', stdout=salida)
+        self.assertEqual(self.existentes(), antes)
+        self.assertIn('1 huérfanos', salida.getvalue())
+        self.assertTrue(BlobMedia.objects.filter(nombre='perfiles/huerfano.jpg').exists())
+
+    def test_cuarentena_mueve_en_lugar_de_borrar(self):
+        cuarentena = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cuarentena, True)
+        call_command('limpiar_media', '--cuarentena', cuarentena, stdout=StringIO())
+        self.assertNotIn('perfiles/huerfano.jpg', self.existentes())
+        self.assertTrue(os.path.isfile(os.path.join(cuarentena, 'perfiles', 'huerfano.jpg')))
+
+    def test_revalida_contra_la_base_antes_de_borrar(self):
+        # Una fila empezó a usar el archivo después de leer las rutas vivas
+        with mock.patch.object(limpiar_media.Command, '_rutas_vivas', return_value=limpiar_media.RutasVivas()):
+            call_command('limpiar_media', '--lote', '1', stdout=StringIO())
+        self.assertIn('perfiles/vivo.jpg', self.existentes())
+        self.assertNotIn('perfiles/huerfano.jpg', self.existentes())
+
+
+# ==========================================
+# COLA DE PDFs
+# ==========================================
+class ColaPDFTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana', password='x')
+        sembrar_cv(cls.usuario)
+
+    def setUp(self):
+        # encolar_pdf pasa por la cubeta de fichas por IP, guardada en la caché
+        for nombre in caches:
+            caches[nombre].clear()
+
+    def _encolar(self, **params):
+        return self.client.get(reverse('encolar_pdf', args=['ana']), params or PDF_COMPLETO)
+
+    def test_pedir_el_mismo_pdf_no_crea_otro_trabajo(self):
+        primero = self._encolar().json()['trabajo']
+        self.assertEqual(self._encolar().json()['trabajo'], primero)
+        self._encolar(incluir_cursos='on')
+        self.assertEqual(TrabajoPDF.objects.count(), 2)
+
+    def test_trabajo_con_error_se_informa_con_200_y_se_reintenta(self):
+        trabajo = TrabajoPDF.objects.get(pk=self._encolar().json()['trabajo'])
+        TrabajoPDF.objects.filter(pk=trabajo.pk).update(estado='error', error='sin memoria')
+        respuesta = self.client.get(reverse('estado_pdf', args=[trabajo.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['estado'], 'error')
+        # Recién fallado se devuelve tal cual; pasado REINTENTO_ERROR vuelve a la cola
+        self.assertEqual(self._encolar().json()['estado'], 'error')
+        TrabajoPDF.objects.filter(pk=trabajo.pk).update(fecha_actualizacion=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self._encolar().json()['estado'], 'pendiente')
+        self.assertEqual(TrabajoPDF.objects.count(), 1)
+
+    def test_perfil_inactivo_no_encola(self):
+        DatosPersonales.objects.filter(user=self.usuario).update(perfil_activo=False)
+        self.assertEqual(self._encolar().status_code, 404)
+        self.assertFalse(TrabajoPDF.objects.exists())
+
+    @override_settings(CV_PDF_ADMISION={'FICHAS_POR_MINUTO': 60, 'RAFAGA': 2})
+    def test_encolar_pasa_por_la_cubeta_de_fichas(self):
+        with mock.patch('tasks.admision._admision', None):
+            self._encolar(incluir_cursos='on')
+            self._encolar(incluir_habilidades='on')
+            self.assertEqual(self._encolar().status_code, 429)
+        self.assertEqual(TrabajoPDF.objects.count(), 2)
+
+    @override_settings(CV_PDF_CACHE_DIR=CACHE_PDF_PRUEBAS)
+    def test_un_cambio_mientras_espera_no_se_guarda_bajo_la_version_vieja(self):
+        trabajo = TrabajoPDF.objects.get(pk=self._encolar().json()['trabajo'])
+        Habilidad.objects.create(user=self.usuario, nombre='Go', nivel='basico')
+        self.assertTrue(reclamar_trabajo(trabajo.pk))
+        with mock.patch('tasks.cola_pdf.generar_pdf') as generar:
+            self.assertEqual(renderizar_trabajo(trabajo.pk), 'error')
+        generar.assert_not_called()
+        trabajo.refresh_from_db()
+        self.assertFalse(trabajo.archivo)
+        self.assertEqual(trabajo.error, OBSOLETO)
+        # Pedirlo otra vez crea el trabajo de la versión nueva
+        self.assertNotEqual(self._encolar().json()['trabajo'], str(trabajo.pk))
+
+
+# ==========================================
+# CONTROL DE ADMISIÓN DE descargar_pdf
+# ==========================================
+@override_settings(CV_PDF_CACHE_DIR=CACHE_PDF_PRUEBAS)
+class AdmisionPDFTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        sembrar_cv(User.objects.create_user('ana', password='x'))
+
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        for nombre in caches:
+            caches[nombre].clear()
+        shutil.rmtree(CACHE_PDF_PRUEBAS, ignore_errors=True)
+
+    def _con_limites(self, **config):
+        parche = mock.patch('tasks.admision._admision', AdmisionPDF(config))
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def _pdf(self, ip='10.0.0.1', **params):
+        return self.client.get(reverse('descargar_pdf', args=['ana']), params or PDF_COMPLETO, REMOTE_ADDR=ip)
+
+    def test_cubeta_por_ip_responde_429(self):
+        self._con_limites(FICHAS_POR_MINUTO=6, RAFAGA=2)
+        # Reloj fijo: los renders no reponen fichas y Retry-After no depende de su duración
+        reloj = mock.patch('tasks.admision.time.time', return_value=1000.0)
+        reloj.start()
+        self.addCleanup(reloj.stop)
+        self.assertEqual(self._pdf().status_code, 200)
+        self.assertEqual(self._pdf().status_code, 200)
+        rechazada = self._pdf()
+        self.assertEqual(rechazada.status_code, 429)
+        self.assertEqual(rechazada['Retry-After'], '10')
+        # Otra IP y las páginas baratas no se ven afectadas
+        self.assertEqual(self._pdf(ip='10.0.0.2').status_code, 200)
+        self.assertEqual(self.client.get(reverse('cv_publico', args=['ana'])).status_code, 200)
+
+    def test_la_cubeta_se_repone_con_el_tiempo(self):
+        cubeta = CubetaFichas(caches['default'], por_minuto=60, rafaga=1)
+        with mock.patch('tasks.admision.time.time', return_value=1000.0):
+            self.assertEqual(cubeta.tomar('ip'), 0)
+            self.assertAlmostEqual(cubeta.tomar('ip'), 1.0)
+        with mock.patch('tasks.admision.time.time', return_value=1001.0):
+            self.assertEqual(cubeta.tomar('ip'), 0)
+
+    def test_sin_cupo_global_responde_503_salvo_pdfs_en_cache(self):
+        self._con_limites(FICHAS_POR_MINUTO=0, GLOBAL=2)
+        self.assertEqual(self._pdf().status_code, 200)
+        # Otros workers ocupan todos los cupos
+        caches['default'].set_many({'pdf_cupo:0': 'otro', 'pdf_cupo:1': 'otro'})
+        self.assertEqual(self._pdf().status_code, 200)
+        rechazada = self._pdf(incluir_cursos='on')
+        self.assertEqual(rechazada.status_code, 503)
+        self.assertIn('Retry-After', rechazada)
+
+    def test_sin_cupo_en_el_proceso_responde_503(self):
+        self._con_limites(FICHAS_POR_MINUTO=0, POR_PROCESO=1)
+        with admision_pdf().cupos.ocupar():
+            self.assertEqual(self._pdf().status_code, 503)
+        self.assertEqual(self._pdf().status_code, 200)
+
+
+# ==========================================
+# POOL DE PROCESOS DE PDFs
+# ==========================================
+class ExecutorFalso:
+
+    def __init__(self):
+        self.futuros = []
+        self.cerrado = False
+
+    def submit(self, funcion, *args):
+        self.futuros.append(Future())
+        return self.futuros[-1]
+
+    def romper(self):
+        for futuro in self.futuros:
+            futuro.set_exception(BrokenProcessPool())
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.cerrado = True
+
+
+class PoolPDFTests(TestCase):
+
+    async def test_un_fallo_tardio_no_cierra_el_pool_nuevo(self):
+        pool = PoolPDF(procesos=2)
+        viejo, nuevo = ExecutorFalso(), ExecutorFalso()
+        pool._executor = viejo
+        pendiente = asyncio.ensure_future(pool.renderizar('<p>a</p>'))
+        await asyncio.sleep(0)
+        # Otra petición ya descartó el pool roto y arrancó uno nuevo
+        pool._executor = nuevo
+        viejo.romper()
+        with self.assertRaises(BrokenProcessPool):
+            await pendiente
+        self.assertIs(pool._executor, nuevo)
+        self.assertFalse(nuevo.cerrado)
+        self.assertEqual(pool.en_curso, 0)
+
+    async def test_un_pool_roto_se_reemplaza(self):
+        pool = PoolPDF(procesos=2)
+        roto = ExecutorFalso()
+        pool._executor = roto
+        pendiente = asyncio.ensure_future(pool.renderizar('<p>a</p>'))
+        await asyncio.sleep(0)
+        roto.romper()
+        with self.assertRaises(BrokenProcessPool):
+            await pendiente
+        self.assertTrue(roto.cerrado)
+        self.assertIsNone(pool._executor)
+
+
+# ==========================================
+# VISTAS ASYNC (ASGI) = VISTAS SÍNCRONAS
+# ==========================================
+# Las rutas de djangocrud/asgi.py, delante de las síncronas
+URLS_ASYNC = ModuleType('urls_async')
+URLS_ASYNC.urlpatterns = [
+    path('cv/<str:username>/', views.cv_publico_async, name='cv_publico'),
+    path('buscar/habilidades/', views.buscar_por_habilidades_async, name='buscar_por_habilidades'),
+    path('cv/<str:username>/pdf/', views.descargar_pdf_async, name='descargar_pdf'),
+    *urlpatterns,
+]
+
+
+@override_settings(CV_PDF_CACHE_DIR=CACHE_PDF_PRUEBAS)
+class VistasAsyncTests(TransactionTestCase):
+    """
+    Transaccional: las secciones se leen en el pool de hilos, con otra
+    conexión, y solo ven datos confirmados.
+    """
+
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        sembrar_cv(User.objects.create_user('ana', password='x'))
+        Habilidad.objects.create(user=User.objects.get(username='ana'), nombre='Django', nivel='avanzado')
+        for nombre in caches:
+            caches[nombre].clear()
+        shutil.rmtree(CACHE_PDF_PRUEBAS, ignore_errors=True)
+
+    def _sincronas(self, *rutas):
+        respuestas = [self.client.get(ruta) for ruta in rutas]
+        for nombre in caches:
+            caches[nombre].clear()
+        return respuestas
+
+    async def test_mismas_respuestas_que_las_sincronas(self):
+        rutas = ['/cv/ana/', '/buscar/habilidades/?habilidad=django:intermedio', '/buscar/habilidades/?habilidad=x:y']
+        esperadas = await sync_to_async(self._sincronas)(*rutas)
+        with override_settings(ROOT_URLCONF=URLS_ASYNC):
+            for ruta, esperada in zip(rutas, esperadas):
+                # Dos veces: con la caché de fragmentos vacía y llena
+                for _ in range(2):
+                    respuesta = await AsyncClient().get(ruta)
+                    self.assertEqual(respuesta.status_code, esperada.status_code, ruta)
+                    self.assertEqual(respuesta.content, esperada.content, ruta)
+
+    async def test_cv_publico_condicional_y_404(self):
+        with override_settings(ROOT_URLCONF=URLS_ASYNC):
+            cliente = AsyncClient()
+            respuesta = await cliente.get('/cv/ana/')
+            self.assertEqual(respuesta.status_code, 200)
+            repetida = await cliente.get('/cv/ana/', headers={'If-None-Match': respuesta['ETag']})
+            self.assertEqual(repetida.status_code, 304)
+            self.assertEqual((await cliente.get('/cv/nadie/')).status_code, 404)
+
+    async def test_pdf_en_el_pool_de_procesos(self):
+        self.addCleanup(pool_pdf().cerrar)
+        with override_settings(ROOT_URLCONF=URLS_ASYNC):
+            respuesta = await AsyncClient().get('/cv/ana/pdf/', PDF_COMPLETO)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Type'], 'application/pdf')
+        self.assertTrue(respuesta.content.startswith(b'%PDF'))
+
+    async def test_pdf_con_el_pool_lleno_responde_503(self):
+        lleno = PoolPDF(procesos=1)
+        lleno.en_curso = lleno.limite
+        with override_settings(ROOT_URLCONF=URLS_ASYNC), mock.patch('tasks.pdf.pool_pdf', return_value=lleno):
+            respuesta = await AsyncClient().get('/cv/ana/pdf/', PDF_COMPLETO)
+        self.assertEqual(respuesta.status_code, 503)
+        self.assertIn('Retry-After', respuesta)
@@ -1,6 +1,15 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Bajo ASGI las lecturas públicas más visitadas usan sus variantes async (tasks/views.py)
+if settings.VISTAS_ASYNC:
+    cv_publico, descargar_pdf = views.cv_publico_async, views.descargar_pdf_async
+    buscar_por_habilidades = views.buscar_por_habilidades_async
+else:
+    cv_publico, descargar_pdf = views.cv_publico, views.descargar_pdf
+    buscar_por_habilidades = views.buscar_por_habilidades
+
 urlpatterns = [
     # ==========================================
     # Autenticación y Home
@@ -9,12 +18,18 @@ urlpatterns = [
     path('signup/', views.signup, name='signup'),
     path('signin/', views.signin, name='signin'),
     path('logout/', views.signout, name='logout'),
+    path('metricas/', views.metricas, name='metricas'),
     
     # ==========================================
     # CV Público y PDF
     # ==========================================
-    path('cv/<str:username>/', views.cv_publico, name='cv_publico'),
-    path('cv/<str:username>/pdf/', views.descargar_pdf, name='descargar_pdf'),  
+    path('cv/<str:username>/', cv_publico, name='cv_publico'),
+    path('cv/<str:username>/pdf/', descargar_pdf, name='descargar_pdf'),  
+    path('cv/<str:username>/pdf/encolar/', views.encolar_pdf, name='encolar_pdf'),
+    path('pdf/trabajos/<uuid:pk>/', views.estado_pdf, name='estado_pdf'),
+    path('buscar/', views.buscar_perfiles, name='buscar_perfiles'),
+    path('buscar/habilidades/', buscar_por_habilidades, name='buscar_por_habilidades'),
+    path('habilidades/autocompletar/', views.autocompletar_habilidades, name='autocompletar_habilidades'),
     
     # ==========================================
     # Gestión de Datos Personales
@@ -0,0 +1,125 @@
+from django.db.models import F
+from django.utils import timezone
+from .models import (
+    VersionPerfil, VersionSeccion,
+    DatosPersonales, Direccion, ExperienciaLaboral,
+    Reconocimiento, CursoRealizado, ProductoAcademico,
+    ProductoLaboral, VentaGarage, Habilidad
+)
+
+# Sección del CV que representa cada tabla (mismos nombres que el contexto)
+SECCION_POR_MODELO = {
+    DatosPersonales: 'datos_personales',
+    Direccion: 'direcciones',
+    ExperienciaLaboral: 'experiencias',
+    Reconocimiento: 'reconocimientos',
+    CursoRealizado: 'cursos',
+    ProductoAcademico: 'productos_academicos',
+    ProductoLaboral: 'productos_laborales',
+    VentaGarage: 'productos_garage',
+    Habilidad: 'habilidades',
+}
+
+
+# ==========================================
+# VERSIÓN DEL PERFIL POR USUARIO
+# ==========================================
+def obtener_version(user_id):
+    """Devuelve la versión actual de los datos del CV (0 si nunca cambió)."""
+    version = VersionPerfil.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+    return version or 0
+
+
+def incrementar_version(user_id, seccion=None):
+    """Incrementa atómicamente la versión del CV del usuario (y de la sección, si se indica)."""
+    if seccion:
+        incrementar_seccion(user_id, seccion)
+    ahora = timezone.now()
+    actualizados = VersionPerfil.objects.filter(user_id=user_id).update(
+        version=F('version') + 1,
+        fecha_actualizacion=ahora
+    )
+    if not actualizados:
+        perfil, created = VersionPerfil.objects.get_or_create(
+            user_id=user_id,
+            defaults={'version': 1, 'fecha_actualizacion': ahora}
+        )
+        if not created:
+            # Otro proceso creó la fila entre el UPDATE y el INSERT
+            incrementar_version(user_id)
+
+
+def incrementar_versiones(user_ids, seccion=None):
+    """Incrementa la versión de varios usuarios con un solo UPDATE."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    if seccion:
+        VersionSeccion.objects.filter(user_id__in=user_ids, seccion=seccion).update(version=F('version') + 1)
+        existentes = set(VersionSeccion.objects.filter(
+            user_id__in=user_ids, seccion=seccion
+        ).values_list('user_id', flat=True))
+        for user_id in user_ids - existentes:
+            incrementar_seccion(user_id, seccion)
+    VersionPerfil.objects.filter(user_id__in=user_ids).update(
+        version=F('version') + 1,
+        fecha_actualizacion=timezone.now()
+    )
+    existentes = set(VersionPerfil.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+    for user_id in user_ids - existentes:
+        incrementar_version(user_id)
+
+
+def actualizar_y_versionar(queryset, **campos):
+    """
+    queryset.update() no dispara señales: usar esta función en acciones
+    masivas para que las cachés de los usuarios afectados se invaliden.
+    """
+    user_ids = set(queryset.values_list('user_id', flat=True))
+    actualizados = queryset.update(**campos)
+    incrementar_versiones(user_ids, SECCION_POR_MODELO.get(queryset.model))
+    return actualizados
+
+
+# ==========================================
+# VERSIÓN POR SECCIÓN (caché de fragmentos)
+# ==========================================
+def obtener_versiones_secciones(user_id):
+    """Diccionario sección -> versión; las secciones nunca modificadas valen 0."""
+    versiones = dict.fromkeys(SECCION_POR_MODELO.values(), 0)
+    versiones.update(VersionSeccion.objects.filter(user_id=user_id).values_list('seccion', 'version'))
+    return versiones
+
+
+async def aobtener_versiones_secciones(user_id):
+    versiones = dict.fromkeys(SECCION_POR_MODELO.values(), 0)
+    async for seccion, version in VersionSeccion.objects.filter(user_id=user_id).values_list('seccion', 'version'):
+        versiones[seccion] = version
+    return versiones
+
+
+def incrementar_seccion(user_id, seccion):
+    actualizados = VersionSeccion.objects.filter(user_id=user_id, seccion=seccion).update(
+        version=F('version') + 1
+    )
+    if not actualizados:
+        perfil, created = VersionSeccion.objects.get_or_create(
+            user_id=user_id, seccion=seccion, defaults={'version': 1}
+        )
+        if not created:
+            # Otro proceso creó la fila entre el UPDATE y el INSERT
+            incrementar_seccion(user_id, seccion)
+
+
+# ==========================================
+# CLAVES DE CACHÉ
+# ==========================================
+def clave_cache(prefijo, user_id, *partes, version=None):
+    """
+    Clave de caché ligada a la versión del CV: cualquier cambio en los datos
+    del usuario produce una clave nueva, así que no hace falta borrar nada.
+    Pasar version si ya se consultó para ahorrar la consulta.
+    """
+    if version is None:
+        version = obtener_version(user_id)
+    return ':'.join(str(parte) for parte in (prefijo, user_id, f'v{version}', *partes))
@@ -1,91 +1,210 @@
 import os
+from functools import wraps
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.http import HttpResponse  
-from xhtml2pdf import pisa    
+from django.http import Http404, HttpResponse, JsonResponse
+from django.core.paginator import Paginator
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from .models import (
-    DatosPersonales, Direccion, ExperienciaLaboral, 
+    DatosPersonales, ExperienciaLaboral, 
     Reconocimiento, CursoRealizado, ProductoAcademico,
-    ProductoLaboral, VentaGarage, Habilidad
+    ProductoLaboral, VentaGarage, Habilidad, TrabajoPDF
 )
 from .forms import (
     DatosPersonalesForm, ExperienciaLaboralForm, CursoRealizadoForm,
     HabilidadForm, ReconocimientoForm, ProductoAcademicoForm, ProductoLaboralForm
 )
+from . import busqueda
+from .habilidades import NIVELES, ausuarios_con_habilidades, trie_habilidades, usuarios_con_habilidades
+from .metricas import registro_latencias
+from .cache_pdf import cache_pdf, clave_pdf, mascara_secciones
+from .cola_pdf import encolar_trabajo
+from .exportacion import servir_exportacion
+from .frescura import afrescura_perfil, etag_cv_publico, etag_pdf, frescura_perfil, ultima_modificacion_cv
+from .paginacion import paginar_keyset
+from .admision import Rechazo, admision_pdf, limitar_por_cliente
+from .pdf import agenerar_pdf, generar_pdf
+from .pool_pdf import PoolPDFSaturado
+from .perfil import acargar_perfil_publico, cargar_perfil, cargar_resumen, obtener_usuario
+from .versiones import obtener_versiones_secciones
 
 # ==========================================
 # VISTA PÚBLICA DEL CV
 # ==========================================
+@condition(etag_func=etag_cv_publico, last_modified_func=ultima_modificacion_cv)
 def cv_publico(request, username):
-    usuario = get_object_or_404(User, username=username)
+    # Las versiones se leen ANTES que los datos (ver descargar_pdf)
+    frescura = frescura_perfil(request, username)
+    if frescura is None:
+        raise Http404('Usuario no encontrado')
     
-    # Protegido contra Error 500
-    datos_personales = DatosPersonales.objects.filter(user=usuario, perfil_activo=True).first()
+    # 🗂️ Visitantes anónimos: servir la copia exportada si está al día (WhiteNoise)
+    if settings.CV_EXPORT_SERVIR and not request.user.is_authenticated:
+        response = servir_exportacion(
+            request, frescura['user_id'], frescura['version'], frescura['fecha_nacimiento']
+        )
+        if response is not None:
+            return response
     
-    # 🔄 Orden cronológico ASCENDENTE (más antiguo primero)
-    experiencias = ExperienciaLaboral.objects.filter(user=usuario, activar_para_que_se_vea_en_front=True).order_by('fecha_inicio_gestion')
-    reconocimientos = Reconocimiento.objects.filter(user=usuario, activar_para_que_se_vea_en_front=True).order_by('fecha_reconocimiento')
-    cursos = CursoRealizado.objects.filter(user=usuario, activar_para_que_se_vea_en_front=True).order_by('fecha_inicio')
+    return renderizar_cv_publico(request, username, frescura['user_id'])
+
+
+def renderizar_cv_publico(request, username, user_id):
+    versiones = obtener_versiones_secciones(user_id)
     
-    productos_academicos = ProductoAcademico.objects.filter(user=usuario, activar_para_que_se_vea_en_front=True).order_by('-fecha_publicacion')
-    productos_laborales = ProductoLaboral.objects.filter(user=usuario, activar_para_que_se_vea_en_front=True).order_by('-fecha_producto')
-    habilidades = Habilidad.objects.filter(user=usuario, activar_para_que_se_vea_en_front=True)
-    direcciones = Direccion.objects.filter(user=usuario).order_by('-es_principal', 'tipo')
+    # Secciones diferidas: las que están en la caché de fragmentos no se consultan
+    perfil = cargar_perfil(username, diferido=True)
+    context = perfil.contexto()
+    context['versiones'] = versiones
+    return render(request, 'cv_publico.html', context)
+
+# ==========================================
+# ⚡ VISTAS PÚBLICAS ASYNC (ASGI)
+# ==========================================
+# Bajo djangocrud/asgi.py, tasks/urls.py usa estas variantes (settings.VISTAS_ASYNC).
+
+def precargar_frescura(vista):
+    """
+    @condition llama al ETag y a la fecha de forma síncrona dentro del event
+    loop: la frescura y el visitante se resuelven antes con el ORM async, y
+    esas funciones solo leen lo memorizado en la petición.
+    """
+    @wraps(vista)
+    async def envuelta(request, username):
+        await afrescura_perfil(request, username)
+        request.user = await request.auser()
+        return await vista(request, username)
+    return envuelta
+
+
+@precargar_frescura
+@condition(etag_func=etag_cv_publico, last_modified_func=ultima_modificacion_cv)
+async def cv_publico_async(request, username):
+    frescura = frescura_perfil(request, username)
+    if frescura is None:
+        raise Http404('Usuario no encontrado')
     
-    # Módulo Venta Garage
-    productos_garage = VentaGarage.objects.filter(user=usuario, activar_para_que_se_vea_en_front=True, vendido=False).order_by('-fecha_creacion')
+    if settings.CV_EXPORT_SERVIR and not request.user.is_authenticated:
+        response = await sync_to_async(servir_exportacion)(
+            request, frescura['user_id'], frescura['version'], frescura['fecha_nacimiento']
+        )
+        if response is not None:
+            return response
     
-    context = {
-        'datos_personales': datos_personales,
-        'experiencias': experiencias,
-        'reconocimientos': reconocimientos,
-        'cursos': cursos,
-        'productos_academicos': productos_academicos,
-        'productos_laborales': productos_laborales,
-        'habilidades': habilidades,
-        'direcciones': direcciones,
-        'productos_garage': productos_garage,
-        'username': username,
-    }
-    return render(request, 'cv_publico.html', context)
+    # Las secciones sin fragmento en caché se leen a la vez (ver acargar_perfil_publico)
+    cargado = await acargar_perfil_publico(frescura['user_id'])
+    if cargado is None:
+        raise Http404('Usuario no encontrado')
+    perfil, versiones = cargado
+    context = perfil.contexto()
+    context['versiones'] = versiones
+    return await sync_to_async(render)(request, 'cv_publico.html', context)
+
+
+async def buscar_por_habilidades_async(request):
+    criterios, error = _criterios_habilidades(request)
+    if error:
+        return error
+    paginador = Paginator(await ausuarios_con_habilidades(criterios), RESULTADOS_POR_PAGINA)
+    pagina = paginador.get_page(request.GET.get('pagina'))
+    perfiles = {datos['user_id']: datos async for datos in _perfiles_encontrados(pagina.object_list)}
+    return _respuesta_habilidades(paginador, pagina, perfiles)
+
+# ==========================================
+# 🔎 BÚSQUEDA DE PERFILES PÚBLICOS
+# ==========================================
+RESULTADOS_POR_PAGINA = 20
+
+def buscar_perfiles(request):
+    """Búsqueda de texto completo en los CVs públicos, del más relevante al menos."""
+    texto = request.GET.get('q', '').strip()
+    paginador = Paginator(busqueda.buscar_perfiles(texto), RESULTADOS_POR_PAGINA)
+    pagina = paginador.get_page(request.GET.get('pagina'))
+    return render(request, 'busqueda.html', {'q': texto, 'pagina': pagina})
+
+
+def autocompletar_habilidades(request):
+    """Sugerencias del vocabulario de habilidades por prefijo (?q=pyt)."""
+    prefijo = request.GET.get('q', '')
+    sugerencias = trie_habilidades.sugerir(prefijo) if prefijo.strip() else []
+    return JsonResponse({'sugerencias': [
+        {'nombre': nombre, 'usuarios': total} for nombre, total in sugerencias
+    ]})
+
+
+def buscar_por_habilidades(request):
+    """
+    Perfiles con TODAS las habilidades pedidas y nivel mínimo opcional:
+    ?habilidad=python:avanzado&habilidad=django
+    """
+    criterios, error = _criterios_habilidades(request)
+    if error:
+        return error
+    
+    paginador = Paginator(usuarios_con_habilidades(criterios), RESULTADOS_POR_PAGINA)
+    pagina = paginador.get_page(request.GET.get('pagina'))
+    perfiles = {datos['user_id']: datos for datos in _perfiles_encontrados(pagina.object_list)}
+    return _respuesta_habilidades(paginador, pagina, perfiles)
+
+
+def _criterios_habilidades(request):
+    """([(nombre, nivel o None), ...], respuesta de error o None)"""
+    criterios = []
+    for valor in request.GET.getlist('habilidad')[:busqueda.MAX_TERMINOS]:
+        nombre, _, nivel = valor.partition(':')
+        if nivel and nivel not in NIVELES:
+            return None, JsonResponse({'error': f'Nivel desconocido: {nivel}'}, status=400)
+        if nombre.strip():
+            criterios.append((nombre, nivel or None))
+    if not criterios:
+        return None, JsonResponse({'error': 'Indica al menos una habilidad'}, status=400)
+    return criterios, None
+
+
+def _perfiles_encontrados(user_ids):
+    return DatosPersonales.objects.filter(user_id__in=user_ids).values(
+        'user_id', 'user__username', 'nombres', 'apellidos', 'titulo_profesional'
+    )
+
+
+def _respuesta_habilidades(paginador, pagina, perfiles):
+    return JsonResponse({
+        'total': paginador.count,
+        'pagina': pagina.number,
+        'paginas': paginador.num_pages,
+        'resultados': [{
+            'username': perfiles[user_id]['user__username'],
+            'nombre': f"{perfiles[user_id]['nombres']} {perfiles[user_id]['apellidos']}",
+            'titulo': perfiles[user_id]['titulo_profesional'],
+            'url': reverse('cv_publico', args=[perfiles[user_id]['user__username']]),
+        } for user_id in pagina.object_list if user_id in perfiles],
+    })
 
 # ==========================================
 # DASHBOARD PRINCIPAL
 # ==========================================
 @login_required
 def home(request):
-    try:
-        datos_personales = DatosPersonales.objects.filter(user=request.user).first()
-        context = {
-            'datos_personales': datos_personales,
-            'total_experiencias': ExperienciaLaboral.objects.filter(user=request.user).count(),
-            'total_cursos': CursoRealizado.objects.filter(user=request.user).count(),
-            'total_habilidades': Habilidad.objects.filter(user=request.user).count(),
-            'total_reconocimientos': Reconocimiento.objects.filter(user=request.user).count(),
-            'total_productos_academicos': ProductoAcademico.objects.filter(user=request.user).count(),
-            'total_productos_laborales': ProductoLaboral.objects.filter(user=request.user).count(),
-            'total_ventas': VentaGarage.objects.filter(user=request.user, vendido=False).count(),
-        }
-        return render(request, 'home.html', context)
-    except Exception as e:
-        print(f"Error en home: {e}")
-        return render(request, 'home.html', {
-            'datos_personales': None,
-            'total_experiencias': 0,
-            'total_cursos': 0,
-            'total_habilidades': 0,
-            'total_reconocimientos': 0,
-            'total_productos_academicos': 0,
-            'total_productos_laborales': 0,
-            'total_ventas': 0,
-        })
+    # Totales desnormalizados: una sola consulta, sin COUNT(*) por tabla
+    context = cargar_resumen(request.user.pk)
+    return render(request, 'home.html', context)
+
+# ==========================================
+# 📈 MÉTRICAS (solo desde la red local)
+# ==========================================
+def metricas(request):
+    """Histogramas de latencia por URL de este proceso, en texto de Prometheus."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICAS_IPS:
+        raise Http404
+    return HttpResponse(registro_latencias.texto(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 # ==========================================
 # AUTENTICACIÓN
@@ -95,7 +214,9 @@ def signup(request):
         return render(request, 'signup.html', {'form': UserCreationForm})
     if request.POST['password1'] == request.POST['password2']:
         try:
-            user = User.objects.create_user(username=request.POST['username'], password=request.POST['password1'])
+            # Savepoint propio: el IntegrityError no debe dejar inutilizable una transacción exterior
+            with transaction.atomic():
+                user = User.objects.create_user(username=request.POST['username'], password=request.POST['password1'])
             login(request, user)
             return redirect('editar_datos_personales')
         except IntegrityError:
@@ -150,8 +271,8 @@ def editar_datos_personales(request):
 # ==========================================
 @login_required
 def lista_experiencias(request):
-    experiencias = ExperienciaLaboral.objects.filter(user=request.user).order_by('fecha_inicio_gestion')
-    return render(request, 'experiencias/lista.html', {'experiencias': experiencias})
+    pagina = paginar_keyset(request, ExperienciaLaboral.objects.filter(user=request.user), 'fecha_inicio_gestion')
+    return render(request, 'experiencias/lista.html', {'experiencias': pagina, 'pagina': pagina})
 
 @login_required
 def crear_experiencia(request):
@@ -194,8 +315,8 @@ def eliminar_experiencia(request, pk):
 # ==========================================
 @login_required
 def lista_cursos(request):
-    cursos = CursoRealizado.objects.filter(user=request.user).order_by('fecha_inicio')
-    return render(request, 'cursos/lista.html', {'cursos': cursos})
+    pagina = paginar_keyset(request, CursoRealizado.objects.filter(user=request.user), 'fecha_inicio')
+    return render(request, 'cursos/lista.html', {'cursos': pagina, 'pagina': pagina})
 
 @login_required
 def crear_curso(request):
@@ -238,8 +359,8 @@ def eliminar_curso(request, pk):
 # ==========================================
 @login_required
 def lista_habilidades(request):
-    habilidades = Habilidad.objects.filter(user=request.user)
-    return render(request, 'habilidades/lista.html', {'habilidades': habilidades})
+    pagina = paginar_keyset(request, Habilidad.objects.filter(user=request.user), 'pk')
+    return render(request, 'habilidades/lista.html', {'habilidades': pagina, 'pagina': pagina})
 
 @login_required
 def crear_habilidad(request):
@@ -282,8 +403,8 @@ def eliminar_habilidad(request, pk):
 # ==========================================
 @login_required
 def lista_reconocimientos(request):
-    reconocimientos = Reconocimiento.objects.filter(user=request.user).order_by('fecha_reconocimiento')
-    return render(request, 'reconocimientos/lista.html', {'reconocimientos': reconocimientos})
+    pagina = paginar_keyset(request, Reconocimiento.objects.filter(user=request.user), 'fecha_reconocimiento')
+    return render(request, 'reconocimientos/lista.html', {'reconocimientos': pagina, 'pagina': pagina})
 
 @login_required
 def crear_reconocimiento(request):
@@ -326,8 +447,8 @@ def eliminar_reconocimiento(request, pk):
 # ==========================================
 @login_required
 def lista_productos_academicos(request):
-    productos = ProductoAcademico.objects.filter(user=request.user).order_by('-fecha_publicacion')
-    return render(request, 'productos_academicos/lista.html', {'productos_academicos': productos})
+    pagina = paginar_keyset(request, ProductoAcademico.objects.filter(user=request.user), '-fecha_publicacion')
+    return render(request, 'productos_academicos/lista.html', {'productos_academicos': pagina, 'pagina': pagina})
 
 @login_required
 def crear_producto_academico(request):
@@ -419,8 +540,8 @@ def eliminar_producto_academico(request, pk):
 # ==========================================
 @login_required
 def lista_productos_laborales(request):
-    productos = ProductoLaboral.objects.filter(user=request.user).order_by('-fecha_producto')
-    return render(request, 'productos_laborales/lista.html', {'productos_laborales': productos})
+    pagina = paginar_keyset(request, ProductoLaboral.objects.filter(user=request.user), '-fecha_producto')
+    return render(request, 'productos_laborales/lista.html', {'productos_laborales': pagina, 'pagina': pagina})
 
 @login_required
 def crear_producto_laboral(request):
@@ -512,8 +633,8 @@ def eliminar_producto_laboral(request, pk):
 # ==========================================
 @login_required
 def lista_ventas_garage(request):
-    productos = VentaGarage.objects.filter(user=request.user).order_by('-fecha_creacion')
-    return render(request, 'venta_garage/lista.html', {'productos': productos})
+    pagina = paginar_keyset(request, VentaGarage.objects.filter(user=request.user), '-fecha_creacion')
+    return render(request, 'venta_garage/lista.html', {'productos': pagina, 'pagina': pagina})
 
 @login_required
 def crear_venta_garage(request):
@@ -562,73 +683,100 @@ def eliminar_venta_garage(request, pk):
 # ==========================================
 # 📄 GENERAR PDF DINÁMICO CON SECCIONES SELECCIONADAS
 # ==========================================
+@limitar_por_cliente
+@condition(etag_func=etag_pdf, last_modified_func=ultima_modificacion_cv)
 def descargar_pdf(request, username):
     """Genera un PDF personalizado con las secciones seleccionadas por el usuario."""
-    usuario = get_object_or_404(User, username=username)
-    datos_personales = DatosPersonales.objects.filter(user=usuario, perfil_activo=True).first()
-    
-    # 📋 Obtener parámetros de secciones a incluir
-    incluir_experiencias = request.GET.get('incluir_experiencias') == 'on'
-    incluir_cursos = request.GET.get('incluir_cursos') == 'on'
-    incluir_reconocimientos = request.GET.get('incluir_reconocimientos') == 'on'
-    incluir_productos_academicos = request.GET.get('incluir_productos_academicos') == 'on'
-    incluir_productos_laborales = request.GET.get('incluir_productos_laborales') == 'on'
-    incluir_habilidades = request.GET.get('incluir_habilidades') == 'on'
-    
-    # 🔄 Cargar datos en orden cronológico ASCENDENTE (más antiguo primero)
-    context = {
-        'datos_personales': datos_personales,
-        'direcciones': Direccion.objects.filter(user=usuario).order_by('-es_principal'),
-        
-        # Flags para controlar qué secciones mostrar
-        'incluir_experiencias': incluir_experiencias,
-        'incluir_cursos': incluir_cursos,
-        'incluir_reconocimientos': incluir_reconocimientos,
-        'incluir_productos_academicos': incluir_productos_academicos,
-        'incluir_productos_laborales': incluir_productos_laborales,
-        'incluir_habilidades': incluir_habilidades,
-    }
-    
-    # Solo cargar los datos si la sección está incluida (optimización)
-    if incluir_experiencias:
-        context['experiencias'] = ExperienciaLaboral.objects.filter(
-            user=usuario, 
-            activar_para_que_se_vea_en_front=True
-        ).order_by('fecha_inicio_gestion')
-    
-    if incluir_cursos:
-        context['cursos'] = CursoRealizado.objects.filter(
-            user=usuario, 
-            activar_para_que_se_vea_en_front=True
-        ).order_by('fecha_inicio')
+    # Misma consulta que ya usó @condition para ETag/Last-Modified
+    frescura = frescura_perfil(request, username)
+    if frescura is None:
+        raise Http404('Usuario no encontrado')
     
-    if incluir_reconocimientos:
-        context['reconocimientos'] = Reconocimiento.objects.filter(
-            user=usuario, 
-            activar_para_que_se_vea_en_front=True
-        ).order_by('fecha_reconocimiento')
+    # 📋 Normalizar las secciones a incluir en una máscara de bits (64 combinaciones)
+    mascara = mascara_secciones(request.GET)
     
-    if incluir_productos_academicos:
-        context['productos_academicos'] = ProductoAcademico.objects.filter(
-            user=usuario, 
-            activar_para_que_se_vea_en_front=True
-        ).order_by('-fecha_publicacion')
-    
-    if incluir_productos_laborales:
-        context['productos_laborales'] = ProductoLaboral.objects.filter(
-            user=usuario, 
-            activar_para_que_se_vea_en_front=True
-        ).order_by('-fecha_producto')
-    
-    if incluir_habilidades:
-        context['habilidades'] = Habilidad.objects.filter(
-            user=usuario, 
-            activar_para_que_se_vea_en_front=True
-        )
+    # ⚡ Buscar primero en la caché: la versión se lee ANTES que los datos para
+    # que un cambio concurrente nunca quede guardado bajo una versión nueva
+    clave = clave_pdf(frescura['user_id'], frescura['version'], mascara)
+    contenido = cache_pdf().obtener(clave)
+    if contenido is None:
+        # 🚦 Renders simultáneos acotados (tasks/admision.py): sin cupo, 503
+        try:
+            with admision_pdf().cupos.ocupar():
+                contenido = generar_pdf(obtener_usuario(username), mascara)
+        except Rechazo as rechazo:
+            return rechazo.respuesta()
+        cache_pdf().guardar(clave, contenido)
+    return _respuesta_pdf(username, contenido)
+
+
+@limitar_por_cliente
+@precargar_frescura
+@condition(etag_func=etag_pdf, last_modified_func=ultima_modificacion_cv)
+async def descargar_pdf_async(request, username):
+    """descargar_pdf bajo ASGI: xhtml2pdf corre en el pool de procesos (tasks/pool_pdf.py)."""
+    frescura = frescura_perfil(request, username)
+    if frescura is None:
+        raise Http404('Usuario no encontrado')
     
-    # Renderizar template y generar PDF
-    html_string = render_to_string('cv_pdf.html', context)
-    response = HttpResponse(content_type='application/pdf')
+    mascara = mascara_secciones(request.GET)
+    clave = clave_pdf(frescura['user_id'], frescura['version'], mascara)
+    contenido = await sync_to_async(cache_pdf().obtener, thread_sensitive=False)(clave)
+    if contenido is None:
+        cupos = admision_pdf().cupos
+        try:
+            ficha = await sync_to_async(cupos.tomar, thread_sensitive=False)()
+        except Rechazo as rechazo:
+            return rechazo.respuesta()
+        try:
+            contenido = await agenerar_pdf(username, mascara)
+        except PoolPDFSaturado:
+            # Contrapresión: mejor reintentar en unos segundos que esperar sin límite
+            return Rechazo(503, 5, 'Demasiados PDFs en curso').respuesta()
+        finally:
+            await sync_to_async(cupos.soltar, thread_sensitive=False)(ficha)
+        await sync_to_async(cache_pdf().guardar, thread_sensitive=False)(clave, contenido)
+    return _respuesta_pdf(username, contenido)
+
+
+def _respuesta_pdf(username, contenido):
+    response = HttpResponse(contenido, content_type='application/pdf')
     response['Content-Disposition'] = f'inline; filename="CV_{username}.pdf"'
-    pisa.CreatePDF(html_string, dest=response)
-    return response
\ No newline at end of file
+    return response
+
+
+# ==========================================
+# 📄 PDF EN SEGUNDO PLANO (cola + consulta de estado)
+# ==========================================
+def _respuesta_trabajo(trabajo, status):
+    url_estado = reverse('estado_pdf', args=[trabajo.pk])
+    response = JsonResponse({
+        'trabajo': str(trabajo.pk),
+        'estado': trabajo.estado,
+        'url_estado': url_estado,
+        'error': trabajo.error,
+    }, status=status)
+    if status == 202:
+        response['Location'] = url_estado
+        response['Retry-After'] = '2'
+    return response
+
+
+@limitar_por_cliente
+def encolar_pdf(request, username):
+    """Encola la generación del PDF y devuelve el id del trabajo sin bloquear el worker."""
+    # Misma barrera que descargar_pdf: cada combinación de secciones es un render
+    usuario = get_object_or_404(User, username=username, datos_personales__perfil_activo=True)
+    trabajo = encolar_trabajo(usuario, mascara_secciones(request.GET))
+    return _respuesta_trabajo(trabajo, 202)
+
+
+def estado_pdf(request, pk):
+    """Redirige al PDF terminado, o informa el estado mientras se procesa."""
+    trabajo = get_object_or_404(TrabajoPDF, pk=pk)
+    if trabajo.estado == 'listo' and trabajo.archivo:
+        return redirect(trabajo.archivo.url)
+    if trabajo.estado == 'error':
+        # La consulta funcionó: el fallo es del trabajo y va en el cuerpo
+        return _respuesta_trabajo(trabajo, 200)
+    return _respuesta_trabajo(trabajo, 202)
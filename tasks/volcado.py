@@ -0,0 +1,142 @@
+import csv
+import json
+import logging
+import time
+from itertools import islice
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from .importacion import CAMPOS_POR_MODELO, CAMPOS_USUARIO, MODELO_POR_SECCION
+from .models import DatosPersonales
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# VOLCADO COMPLETO DE CVs (NDJSON / CSV) EN STREAMING
+# ==========================================
+# Un documento por usuario con las nueve tablas del CV. Por defecto solo
+# lleva los campos que acepta importar_cvs, así el volcado se puede volver
+# a importar. Con metadatos=True agrega lo que solo sirve al data warehouse
+# (user_id, date_joined, is_active, ids, fechas, termino_id, archivos) y
+# el resultado ya no es importable. Los usuarios se leen con
+# iterator(chunk_size) y sus secciones se precargan por bloque (una
+# consulta por tabla): la memoria depende del tamaño del bloque, no del
+# total de filas.
+
+CAMPOS_METADATOS = ('date_joined', 'is_active')
+
+# Sección del documento -> tabla
+SECCIONES = MODELO_POR_SECCION
+
+
+def _columnas(modelo, metadatos, con_id=True):
+    return [
+        campo.attname for campo in modelo._meta.concrete_fields
+        if campo.name != 'user' and (
+            campo.name in CAMPOS_POR_MODELO[modelo] or metadatos and (con_id or not campo.primary_key)
+        )
+    ]
+
+
+# {metadatos: columnas}
+COLUMNAS_DATOS = {metadatos: _columnas(DatosPersonales, metadatos, con_id=False) for metadatos in (False, True)}
+COLUMNAS_POR_SECCION = {
+    metadatos: {seccion: _columnas(modelo, metadatos) for seccion, modelo in SECCIONES.items()}
+    for metadatos in (False, True)
+}
+
+
+def _campos_usuario(metadatos):
+    return (*CAMPOS_USUARIO, *CAMPOS_METADATOS) if metadatos else CAMPOS_USUARIO
+
+
+def usuarios_a_volcar(solo_activos=False):
+    usuarios = User.objects.order_by('pk')
+    if solo_activos:
+        usuarios = usuarios.filter(datos_personales__perfil_activo=True)
+    return usuarios
+
+
+def _por_usuario(modelo, user_ids, columnas):
+    """Filas del bloque agrupadas por usuario; values() evita construir instancias."""
+    agrupadas = {}
+    filas = modelo.objects.filter(user_id__in=user_ids).order_by('user_id', 'pk').values('user_id', *columnas)
+    for fila in filas:
+        agrupadas.setdefault(fila.pop('user_id'), []).append(fila)
+    return agrupadas
+
+
+def registros_cv(usuarios, tamano_lote=500, metadatos=False):
+    """Genera un dict por usuario; registra el avance cada tamano_lote usuarios."""
+    inicio = time.monotonic()
+    total = filas = 0
+    cursor = usuarios.values('pk', *_campos_usuario(metadatos)).iterator(chunk_size=tamano_lote)
+    while bloque := list(islice(cursor, tamano_lote)):
+        # Una consulta por tabla para todo el bloque de usuarios
+        user_ids = [usuario['pk'] for usuario in bloque]
+        datos = _por_usuario(DatosPersonales, user_ids, COLUMNAS_DATOS[metadatos])
+        secciones = {
+            seccion: _por_usuario(modelo, user_ids, COLUMNAS_POR_SECCION[metadatos][seccion])
+            for seccion, modelo in SECCIONES.items()
+        }
+        for usuario in bloque:
+            user_id = usuario.pop('pk')
+            registro = {'user_id': user_id} if metadatos else {}
+            registro.update(usuario, datos_personales=datos.get(user_id, [None])[0])
+            for seccion, por_usuario in secciones.items():
+                registro[seccion] = por_usuario.get(user_id, [])
+                filas += len(registro[seccion])
+            yield registro
+
+        total += len(bloque)
+        transcurrido = max(time.monotonic() - inicio, 1e-9)
+        logger.info('Volcado: %d usuarios, %d filas (%.0f usuarios/s)', total, filas, total / transcurrido)
+    transcurrido = max(time.monotonic() - inicio, 1e-9)
+    logger.info('Volcado terminado: %d usuarios, %d filas en %.1fs (%.0f usuarios/s)',
+                total, filas, transcurrido, total / transcurrido)
+
+
+# ==========================================
+# FORMATOS DE SALIDA (generadores de texto)
+# ==========================================
+def lineas_ndjson(registros, metadatos=False):
+    codificador = DjangoJSONEncoder(ensure_ascii=False)
+    for registro in registros:
+        yield codificador.encode(registro) + '\n'
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return valor
+
+
+def lineas_csv(registros, metadatos=False):
+    """
+    Una fila por usuario: datos personales en columnas y cada sección como
+    lista JSON (lo mismo que lee importar_cvs --formato csv).
+    """
+    campos = ('user_id', *_campos_usuario(metadatos)) if metadatos else CAMPOS_USUARIO
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow([*campos, *COLUMNAS_DATOS[metadatos], *SECCIONES])
+    for registro in registros:
+        datos = registro['datos_personales'] or {}
+        yield escritor.writerow([
+            *(_valor_csv(registro[campo]) for campo in campos),
+            *(_valor_csv(datos.get(columna)) for columna in COLUMNAS_DATOS[metadatos]),
+            *(json.dumps(registro[seccion], cls=DjangoJSONEncoder, ensure_ascii=False) for seccion in SECCIONES),
+        ])
+
+
+FORMATOS = {
+    'ndjson': (lineas_ndjson, 'application/x-ndjson', 'ndjson'),
+    'csv': (lineas_csv, 'text/csv; charset=utf-8', 'csv'),
+}